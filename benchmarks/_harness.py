@@ -0,0 +1,169 @@
+"""Shared helpers for the benchmark scripts in this directory.
+
+- `bootstrap()` makes the in-repo packages importable and sets the env vars
+  the configs require, so scripts run without installing anything.
+- `measure()` times a callable with auto-calibrated loop counts.
+- `seed()` fills a database with roles, scopes and users for the scripts.
+- Results are written as JSON (`write_results`) and compared against an
+  earlier run (`compare`), so runs can be tracked across versions.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+ROLES = ["admin", "ops", "viewer"]
+
+
+def bootstrap() -> None:
+    """Allow running benchmark files directly without installing packages."""
+
+    for p in (REPO_ROOT / "core" / "src", REPO_ROOT / "server" / "src"):
+        p_str = str(p)
+        if p_str not in sys.path:
+            sys.path.insert(0, p_str)
+    os.environ.setdefault("ZENAUTH_SECRET_KEY", "**BENCH**")
+    os.environ.setdefault("ZENAUTH_AUTH_SERVER_ORIGIN", "http://bench")
+    os.environ.setdefault("ZENAUTH_SERVER_DSN", "sqlite+pysqlite:///:memory:")
+
+
+def seed(dsn: str, *, users: int, password_hash: str, scopes: int = 20) -> list[Any]:
+    """Create roles admin/ops/viewer, `scopes` scopes bound to viewer and `users` users.
+
+    User `i` is named `user{i:05d}`, has the first `1 + i % 3` roles and the
+    (already hashed) password `password_hash`. Returns the users as `UserDTO`.
+    Call `bootstrap()` first.
+    """
+
+    from zen_auth.dto import RoleDTOForCreate, ScopeDTOForCreate, UserDTOForCreate
+    from zen_auth.server.persistence import init_db
+    from zen_auth.server.persistence.session import (
+        create_engine_from_dsn,
+        create_sessionmaker,
+        session_scope,
+    )
+    from zen_auth.server.usecases import role_service, scope_service, user_service
+
+    engine = create_engine_from_dsn(dsn)
+    init_db(engine)
+    created: list[Any] = []
+    with session_scope(create_sessionmaker(engine)) as session:
+        for role in ROLES:
+            role_service.create_role(session, RoleDTOForCreate(role_name=role, display_name=role.title()))
+        for i in range(scopes):
+            scope_service.create_scope(session, ScopeDTOForCreate(scope_name=f"scope:{i}", display_name=""))
+        role_service.set_role_scopes(session, "viewer", [f"scope:{i}" for i in range(scopes)])
+        for i in range(users):
+            created.append(
+                user_service.create_user(
+                    session,
+                    UserDTOForCreate(
+                        user_name=f"user{i:05d}",
+                        password=password_hash,
+                        roles=ROLES[: 1 + i % 3],
+                        real_name=f"User {i}",
+                        division="Platform",
+                        description="benchmark user",
+                    ),
+                    already_hashed=True,
+                )
+            )
+    engine.dispose()
+    return created
+
+
+def measure(fn: Callable[[], object], *, min_time: float = 0.2, rounds: int = 5) -> dict[str, float]:
+    """Time `fn`; each round runs long enough to take about `min_time / rounds` seconds."""
+
+    fn()  # warm up caches, lazy imports, connections
+    loops = 1
+    target = min_time / rounds
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= target or loops >= 1 << 24:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(target / elapsed) + 1))
+
+    per_call: list[float] = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        per_call.append((time.perf_counter() - start) / loops * 1e6)
+    return {
+        "mean_us": statistics.fmean(per_call),
+        "median_us": statistics.median(per_call),
+        "min_us": min(per_call),
+        "stdev_us": statistics.stdev(per_call) if len(per_call) > 1 else 0.0,
+        "loops": loops,
+        "rounds": rounds,
+    }
+
+
+def _git_revision() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, timeout=5
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def environment() -> dict[str, object]:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "git_revision": _git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def write_results(path: str, suite: str, results: dict[str, dict[str, Any]]) -> None:
+    doc = {"suite": suite, "environment": environment(), "results": results}
+    Path(path).write_text(json.dumps(doc, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def compare(
+    baseline_path: str,
+    results: dict[str, dict[str, Any]],
+    *,
+    key: str = "median_us",
+    threshold: float = 0.1,
+    higher_is_better: bool = False,
+) -> list[str]:
+    """Print the change of `key` against `baseline_path`; return names worse by more than `threshold`.
+
+    Lower is better by default (times, latency percentiles); pass
+    `higher_is_better` for throughput.
+    """
+
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))["results"]
+    regressions: list[str] = []
+    for name, result in results.items():
+        before = baseline.get(name, {}).get(key)
+        after = result.get(key)
+        if not before or after is None:
+            print(f"{name:>36}: {after} (no baseline)")
+            continue
+        change = after / before - 1.0
+        flag = ""
+        if (-change if higher_is_better else change) > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:>36}: {before:10.2f} -> {after:10.2f} {key} ({change:+.1%}){flag}")
+    return regressions
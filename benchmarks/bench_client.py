@@ -0,0 +1,349 @@
+"""Overhead the `Claims` client adds to a downstream FastAPI app.
+
+A downstream app (like `examples/webapp_fastapi/app.py`) runs under uvicorn
+in this process with four routes:
+
+- `plain`:         no auth (baseline)
+- `guard`:         `Depends(Claims.guard())`
+- `role_or_scope`: `Depends(Claims.role_or_scope(roles=[...], scopes=[...]))`
+- `verify_user`:   `Claims.verify_user(...)` (login form post)
+
+`Claims` talks to a stub auth server on localhost that answers the
+`/verify/*` and discovery endpoints with canned data after a configurable
+delay, and can inject failures (503 with `Retry-After`) and connection resets.
+
+For each route the script reports latency percentiles, the latency added
+over `plain`, auth server requests and new TCP connections per request, the
+number of threads that called the auth server and the peak thread count.
+
+`--cache-ttl` enables the `Claims` verification cache and `--pool` swaps the
+module-level `requests.post` for a pooled `requests.Session`, so client side
+caching and connection reuse can be evaluated without a real auth server.
+
+Usage:
+    python benchmarks/bench_client.py [--requests 2000] [--concurrency 8]
+        [--latency-ms 2] [--fail-rate 0.01] [--reset-rate 0.01]
+        [--cache-ttl 30] [--pool] [--json out.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+
+from _harness import bootstrap, write_results
+
+bootstrap()
+
+import httpx  # noqa: E402
+import requests  # noqa: E402
+import uvicorn  # noqa: E402
+from fastapi import Depends, FastAPI, Form, Request, Response  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from zen_auth.claims import Claims  # noqa: E402
+from zen_auth.config import ZENAUTH_CONFIG  # noqa: E402
+from zen_auth.dto import UserDTO  # noqa: E402
+from zen_auth.errors import ClaimError, ClaimSourceError  # noqa: E402
+from zen_auth.logger import AUDIT_LOGGER  # noqa: E402
+
+API = "/zen_auth/v1"
+_USER = UserDTO(
+    user_name="bench",
+    roles=["viewer"],
+    real_name="Bench User",
+    division="Platform",
+    description="",
+    policy_epoch=1,
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return int(s.getsockname()[1])
+
+
+# --- Stub auth server ---
+
+
+class StubAuthServer(ThreadingHTTPServer):
+    """Canned `/verify/*` answers with injected latency and failures."""
+
+    daemon_threads = True
+
+    def __init__(self, *, latency_ms: float, fail_rate: float, reset_rate: float) -> None:
+        super().__init__(("127.0.0.1", _free_port()), _StubHandler)
+        self.latency_ms = latency_ms
+        self.fail_rate = fail_rate
+        self.reset_rate = reset_rate
+        self.origin = f"http://127.0.0.1:{self.server_address[1]}"
+        self.token = Claims.from_user(_USER).token
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._rnd = random.Random(0)
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        with self._lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+    def counters(self) -> tuple[int, int]:
+        with self._lock:
+            return self.connections, self.requests
+
+    def roll(self) -> float:
+        with self._lock:
+            self.requests += 1
+            return self._rnd.random()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: StubAuthServer
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send(self, status: int, body: dict[str, Any], headers: dict[str, str] | None = None) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _answer(self, payload: dict[str, Any]) -> None:
+        stub = self.server
+        roll = stub.roll()
+        if stub.latency_ms:
+            time.sleep(stub.latency_ms / 1000.0)
+        if roll < stub.reset_rate:
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return
+        if roll < stub.reset_rate + stub.fail_rate:
+            self._send(503, {"detail": "overloaded", "code": "overloaded"}, {"retry-after": "1"})
+            return
+
+        path = self.path.removeprefix(API)
+        if path == "/meta/endpoints":
+            keys = ["verify_token", "verify_user", "verify_user_role", "verify_user_scope"]
+            data: dict[str, Any] = {k: f"{stub.origin}{API}/verify/{k[7:].replace('_', '/')}" for k in keys}
+            data["verify_token"] = f"{stub.origin}{API}/verify/token"
+            data["verify_user_role_or_scope"] = f"{stub.origin}{API}/verify/user/role_or_scope"
+            self._send(200, {"data": data})
+        elif path == "/verify/token":
+            self._send(200, {"data": {"token": stub.token, "user": _USER.model_dump()}})
+        elif path == "/verify/user":
+            self._send(200, {"data": {"token": stub.token}})
+        elif path == "/verify/user/role_or_scope":
+            user_name = payload.get("user_name")
+            self._send(200, {"data": {"user_name": user_name, "has_access": True}})
+        elif path == "/verify/user/role":
+            self._send(200, {"data": {"user_name": payload.get("user_name"), "has_role": True}})
+        elif path == "/verify/user/scope":
+            self._send(200, {"data": {"user_name": payload.get("user_name"), "allowed": True}})
+        else:
+            self._send(404, {"detail": "not found"})
+
+    def do_GET(self) -> None:
+        self._answer({})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("content-length") or 0)
+        body = self.rfile.read(length) if length else b"{}"
+        self._answer(json.loads(body or b"{}"))
+
+
+# --- Downstream app ---
+
+
+def downstream_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/plain")
+    def plain() -> dict[str, str]:
+        return {"user": "-"}
+
+    @app.get("/guard")
+    def guarded(user: UserDTO = Depends(Claims.guard())) -> dict[str, str]:
+        return {"user": user.user_name}
+
+    @app.get("/role_or_scope")
+    def role_or_scope(
+        user: UserDTO = Depends(Claims.role_or_scope(roles=["admin"], scopes=["example:read"])),
+    ) -> dict[str, str]:
+        return {"user": user.user_name}
+
+    @app.post("/verify_user")
+    def verify_user(req: Request, user_name: str = Form(), password: str = Form()) -> Response:
+        return Claims.verify_user(req, JSONResponse({"ok": True}), user_name, password)
+
+    @app.exception_handler(ClaimError)
+    def _claim_error(req: Request, exc: ClaimError) -> JSONResponse:
+        if isinstance(exc, ClaimSourceError):
+            return JSONResponse({"code": exc.code}, status_code=503)
+        return JSONResponse({"detail": str(exc)}, status_code=401)
+
+    return app
+
+
+class _ThreadCounter:
+    """Wraps `Claims._POST`: records which threads call the auth server."""
+
+    def __init__(self, post: Callable[..., requests.Response]) -> None:
+        self.post = post
+        self.idents: set[int] = set()
+
+    def __call__(self, *args: Any, **kwargs: Any) -> requests.Response:
+        self.idents.add(threading.get_ident())
+        return self.post(*args, **kwargs)
+
+
+def _peak_threads(stop: threading.Event, out: list[int]) -> None:
+    peak = 0
+    while not stop.is_set():
+        peak = max(peak, threading.active_count())
+        time.sleep(0.005)
+    out.append(peak)
+
+
+def run_route(
+    base_url: str, route: str, token: str, stub: StubAuthServer, *, requests_n: int, concurrency: int
+) -> dict[str, Any]:
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    lock = threading.Lock()
+    local = threading.local()
+    headers = {"authorization": f"Bearer {token}"}
+
+    def one(_: int) -> None:
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = httpx.Client(base_url=base_url, headers=headers, timeout=30.0)
+        t0 = time.perf_counter()
+        try:
+            if route == "verify_user":
+                res = client.post("/verify_user", data={"user_name": "bench", "password": "pw"})
+            else:
+                res = client.get(f"/{route}")
+            code = res.status_code
+        except httpx.HTTPError:
+            code = 0
+        ms = (time.perf_counter() - t0) * 1000.0
+        with lock:
+            latencies.append(ms)
+            statuses[code] = statuses.get(code, 0) + 1
+
+    counter = _ThreadCounter(Claims._POST)
+    Claims._POST = counter
+    stop = threading.Event()
+    peak: list[int] = []
+    sampler = threading.Thread(target=_peak_threads, args=(stop, peak), daemon=True)
+    conns0, reqs0 = stub.counters()
+    sampler.start()
+    try:
+        with ThreadPoolExecutor(concurrency) as pool:
+            list(pool.map(one, range(requests_n)))
+    finally:
+        stop.set()
+        sampler.join()
+        Claims._POST = counter.post
+    conns1, reqs1 = stub.counters()
+
+    values = sorted(latencies)
+
+    def pct(q: float) -> float:
+        return values[min(len(values) - 1, int(q / 100.0 * len(values)))]
+
+    return {
+        "requests": requests_n,
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "mean_ms": sum(values) / len(values),
+        "errors": sum(n for code, n in statuses.items() if code != 200),
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "auth_requests_per_req": (reqs1 - reqs0) / requests_n,
+        "connections_per_req": (conns1 - conns0) / requests_n,
+        "auth_threads": len(counter.idents),
+        "peak_threads": peak[0] if peak else threading.active_count(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the Claims client against a stub auth server")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per route")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Stub delay per auth server request")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of stub answers that are 503")
+    parser.add_argument("--reset-rate", type=float, default=0.0, help="Share of stub connections reset")
+    parser.add_argument("--cache-ttl", type=float, default=0.0, help="Claims verification cache TTL (sec)")
+    parser.add_argument("--pool", action="store_true", help="Use a pooled requests.Session in Claims")
+    parser.add_argument("--routes", default="plain,guard,role_or_scope,verify_user")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    # Not `disabled`: uvicorn's logging setup re-enables existing loggers.
+    AUDIT_LOGGER.setLevel(logging.CRITICAL)
+    stub = StubAuthServer(latency_ms=args.latency_ms, fail_rate=args.fail_rate, reset_rate=args.reset_rate)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    os.environ["ZENAUTH_AUTH_SERVER_ORIGIN"] = stub.origin
+    ZENAUTH_CONFIG.cache_clear()
+
+    Claims._VERIFY_CACHE_TTL_SEC = args.cache_ttl
+    if args.pool:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=args.concurrency)
+        session.mount("http://", adapter)
+        Claims._GET, Claims._POST = session.get, session.post
+
+    port = _free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(downstream_app(), host="127.0.0.1", port=port, log_level="warning", access_log=False)
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    token = stub.token
+    base_url = f"http://127.0.0.1:{port}"
+    results: dict[str, dict[str, Any]] = {}
+    try:
+        for route in args.routes.split(","):
+            results[route] = r = run_route(
+                base_url, route, token, stub, requests_n=args.requests, concurrency=args.concurrency
+            )
+            added = r["p50_ms"] - results["plain"]["p50_ms"] if "plain" in results else float("nan")
+            r["added_p50_ms"] = added
+            print(
+                f"{route:>14}: p50 {r['p50_ms']:7.2f}  p95 {r['p95_ms']:7.2f}  p99 {r['p99_ms']:7.2f} ms"
+                f"  (+{added:.2f} p50)  auth req/req {r['auth_requests_per_req']:.2f}"
+                f"  conn/req {r['connections_per_req']:.2f}  auth threads {r['auth_threads']}"
+                f"  peak threads {r['peak_threads']}  errors {r['errors']}"
+            )
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+        stub.shutdown()
+
+    if args.json:
+        results["config"] = {k: v for k, v in vars(args).items() if k != "json"}
+        write_results(args.json, "client", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+"""End-to-end load test of the auth server under uvicorn.
+
+Seeds a database, starts `uvicorn zen_auth.server.run:app` in a subprocess
+and replays a weighted request mix at fixed concurrency levels (closed loop:
+each client connection sends its next request when the previous one
+returns). Reports throughput and p50/p90/p95/p99 latency per concurrency
+step, overall and per operation, plus a latency histogram.
+
+A scenario is a JSON file (see `benchmarks/scenarios/`):
+
+    {
+      "name": "verify_mix",
+      "users": 500,
+      "duration_sec": 10, "warmup_sec": 2,
+      "concurrency": [8, 32, 64],
+      "workers": 1, "client_procs": 1,
+      "server_env": {"ZENAUTH_SERVER_PASSWORD_BCRYPT_ROUNDS": "10"},
+      "mix": {"verify_token": 90, "role_or_scope": 8, "login": 2},
+      "thresholds": {"min_rps": 200, "max_p99_ms": 250, "max_error_rate": 0.01}
+    }
+
+Operations: `verify_token`, `role_or_scope`, `verify_role`, `verify_scope`,
+`login` (`POST /verify/user`, i.e. a bcrypt verify). Tokens are minted
+locally with the same secret key as the server.
+
+`thresholds` turn the run into a gate (exit 1 when a step misses one);
+`--json`/`--compare` store and compare runs like the other benchmarks.
+The highest `rps` of the sweep is the throughput ceiling for the given
+worker count; `client_procs` > 1 spreads the client over processes so the
+load generator is not the bottleneck.
+
+Usage:
+    python benchmarks/bench_load.py benchmarks/scenarios/verify_mix.json
+        [--dsn postgresql+psycopg://...] [--duration 5] [--concurrency 16,64]
+        [--json out.json] [--compare baseline.json [--fail-threshold 0.2]]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import bisect
+import json
+import math
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from _harness import REPO_ROOT, bootstrap, compare, seed, write_results
+
+bootstrap()
+
+import httpx  # noqa: E402
+
+API = "/zen_auth/v1"
+_PASSWORD = "bench-password"
+
+# Operation -> endpoint (relative to the API prefix).
+_OPS = {
+    "verify_token": "/verify/token",
+    "role_or_scope": "/verify/user/role_or_scope",
+    "verify_role": "/verify/user/role",
+    "verify_scope": "/verify/user/scope",
+    "login": "/verify/user",
+}
+
+
+@dataclass
+class Scenario:
+    name: str
+    mix: dict[str, float]
+    users: int = 200
+    duration_sec: float = 10.0
+    warmup_sec: float = 2.0
+    concurrency: list[int] = field(default_factory=lambda: [16])
+    workers: int = 1
+    client_procs: int = 1
+    server_env: dict[str, str] = field(default_factory=dict)
+    thresholds: dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: str) -> Scenario:
+        doc = json.loads(Path(path).read_text(encoding="utf-8"))
+        unknown = set(doc.get("mix", {})) - set(_OPS)
+        if unknown:
+            raise SystemExit(f"{path}: unknown operations in mix: {', '.join(sorted(unknown))}")
+        if isinstance(doc.get("concurrency"), int):
+            doc["concurrency"] = [doc["concurrency"]]
+        doc.setdefault("name", Path(path).stem)
+        return cls(**doc)
+
+
+# --- Client ---
+
+
+def _payload(op: str, user: dict[str, Any]) -> dict[str, Any]:
+    if op == "verify_token":
+        return {"token": user["token"]}
+    if op == "login":
+        return {"user_name": user["user_name"], "password": _PASSWORD}
+    if op == "verify_role":
+        return {"user_name": user["user_name"], "required_roles": ["admin", "ops"]}
+    if op == "verify_scope":
+        return {"user_name": user["user_name"], "required_scopes": ["scope:0"]}
+    return {"user_name": user["user_name"], "required_roles": ["admin"], "required_scopes": ["scope:0"]}
+
+
+async def _drive(
+    base_url: str,
+    mix: dict[str, float],
+    users: list[dict[str, Any]],
+    concurrency: int,
+    warmup: float,
+    duration: float,
+) -> list[tuple[str, float, int]]:
+    """Run `concurrency` closed-loop clients; return (op, latency_ms, status) of the measured window."""
+
+    ops = list(mix)
+    weights = [mix[op] for op in ops]
+    samples: list[tuple[str, float, int]] = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    # Same-origin Origin header: the server's CSRF check applies once a login cookie is set.
+    headers = {"origin": base_url}
+    async with httpx.AsyncClient(
+        base_url=base_url + API, limits=limits, headers=headers, timeout=30.0
+    ) as client:
+        start = time.perf_counter()
+        measure_from = start + warmup
+        stop_at = measure_from + duration
+
+        async def worker(seed_: int) -> None:
+            rnd = random.Random(seed_)
+            while True:
+                t0 = time.perf_counter()
+                if t0 >= stop_at:
+                    return
+                op = rnd.choices(ops, weights)[0]
+                try:
+                    res = await client.post(_OPS[op], json=_payload(op, rnd.choice(users)))
+                    status = res.status_code
+                except httpx.HTTPError:
+                    status = 0
+                t1 = time.perf_counter()
+                if t0 >= measure_from and t1 <= stop_at:
+                    samples.append((op, (t1 - t0) * 1000.0, status))
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return samples
+
+
+def _client_proc(
+    args: tuple[str, dict[str, float], list[dict[str, Any]], int, float, float],
+) -> list[tuple[str, float, int]]:
+    return asyncio.run(_drive(*args))
+
+
+def run_step(
+    base_url: str, scenario: Scenario, users: list[dict[str, Any]], concurrency: int
+) -> list[tuple[str, float, int]]:
+    procs = max(1, min(scenario.client_procs, concurrency))
+    if procs == 1:
+        return _client_proc(
+            (base_url, scenario.mix, users, concurrency, scenario.warmup_sec, scenario.duration_sec)
+        )
+    shares = [concurrency // procs + (1 if i < concurrency % procs else 0) for i in range(procs)]
+    jobs = [(base_url, scenario.mix, users, n, scenario.warmup_sec, scenario.duration_sec) for n in shares]
+    with multiprocessing.get_context("spawn").Pool(procs) as pool:
+        return [s for part in pool.map(_client_proc, jobs) for s in part]
+
+
+# --- Statistics ---
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return math.nan
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(q / 100.0 * len(sorted_values)) - 1))]
+
+
+def _latency_stats(latencies: list[float]) -> dict[str, float]:
+    values = sorted(latencies)
+    return {
+        "p50_ms": percentile(values, 50),
+        "p90_ms": percentile(values, 90),
+        "p95_ms": percentile(values, 95),
+        "p99_ms": percentile(values, 99),
+        "max_ms": values[-1] if values else math.nan,
+    }
+
+
+# Histogram bucket upper bounds (ms), roughly log-spaced.
+_BUCKETS_MS = [0.5, 1, 2, 3, 5, 7.5, 10, 15, 20, 30, 50, 75, 100, 150, 250, 500, 1000, 2500, 5000, math.inf]
+
+
+def histogram(latencies: list[float]) -> list[tuple[float, int]]:
+    counts = [0] * len(_BUCKETS_MS)
+    for v in latencies:
+        counts[bisect.bisect_left(_BUCKETS_MS, v)] += 1
+    return list(zip(_BUCKETS_MS, counts))
+
+
+def summarize(samples: list[tuple[str, float, int]], duration_sec: float) -> dict[str, Any]:
+    """Throughput, error counts and latency percentiles of one step.
+
+    Errors are transport failures and 5xx except 503 (shed / overloaded),
+    which is counted as `rejected`. 4xx are valid answers (e.g. access denied).
+    """
+
+    errors = sum(1 for _, _, status in samples if status == 0 or (status >= 500 and status != 503))
+    rejected = sum(1 for _, _, status in samples if status in (429, 503))
+    per_op: dict[str, dict[str, float]] = {}
+    for op in sorted({op for op, _, _ in samples}):
+        lat = [ms for o, ms, _ in samples if o == op]
+        per_op[op] = {"requests": len(lat), "rps": len(lat) / duration_sec, **_latency_stats(lat)}
+    latencies = [ms for _, ms, _ in samples]
+    return {
+        "requests": len(samples),
+        "rps": len(samples) / duration_sec,
+        "errors": errors,
+        "rejected": rejected,
+        "error_rate": errors / len(samples) if samples else 1.0,
+        **_latency_stats(latencies),
+        "ops": per_op,
+        "histogram": [[bound if bound != math.inf else None, n] for bound, n in histogram(latencies)],
+    }
+
+
+def check_thresholds(name: str, result: dict[str, Any], thresholds: dict[str, float]) -> list[str]:
+    failures = []
+    if "min_rps" in thresholds and result["rps"] < thresholds["min_rps"]:
+        failures.append(f"{name}: rps {result['rps']:.1f} < {thresholds['min_rps']}")
+    if "max_p99_ms" in thresholds and not result["p99_ms"] <= thresholds["max_p99_ms"]:
+        failures.append(f"{name}: p99 {result['p99_ms']:.1f} ms > {thresholds['max_p99_ms']}")
+    if "max_p50_ms" in thresholds and not result["p50_ms"] <= thresholds["max_p50_ms"]:
+        failures.append(f"{name}: p50 {result['p50_ms']:.1f} ms > {thresholds['max_p50_ms']}")
+    if "max_error_rate" in thresholds and result["error_rate"] > thresholds["max_error_rate"]:
+        failures.append(f"{name}: error rate {result['error_rate']:.2%} > {thresholds['max_error_rate']:.2%}")
+    return failures
+
+
+def _print_step(name: str, r: dict[str, Any]) -> None:
+    print(
+        f"{name}: {r['requests']} req, {r['rps']:.1f} req/s, errors {r['errors']}, rejected {r['rejected']}\n"
+        f"  latency ms  p50 {r['p50_ms']:.2f}  p90 {r['p90_ms']:.2f}  p95 {r['p95_ms']:.2f}"
+        f"  p99 {r['p99_ms']:.2f}  max {r['max_ms']:.2f}"
+    )
+    for op, s in r["ops"].items():
+        print(
+            f"  {op:>14}: {s['requests']:7d} req  p50 {s['p50_ms']:8.2f}  p95 {s['p95_ms']:8.2f}"
+            f"  p99 {s['p99_ms']:8.2f}"
+        )
+    total = r["requests"] or 1
+    for bound, n in r["histogram"]:
+        if n:
+            label = f"<= {bound:g} ms" if bound is not None else "> 5000 ms"
+            print(f"  {label:>12} {n:7d} {'#' * max(1, round(40 * n / total))}")
+
+
+# --- Server ---
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return int(s.getsockname()[1])
+
+
+def _server_env(scenario: Scenario, dsn: str) -> dict[str, str]:
+    env = dict(os.environ)
+    env.update(scenario.server_env)
+    env["ZENAUTH_SERVER_DSN"] = dsn
+    env["PYTHONPATH"] = os.pathsep.join(
+        [str(REPO_ROOT / "core" / "src"), str(REPO_ROOT / "server" / "src"), env.get("PYTHONPATH", "")]
+    )
+    return env
+
+
+def start_server(env: dict[str, str], workers: int, log_path: Path) -> tuple[subprocess.Popen[bytes], str]:
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    cmd = [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "zen_auth.server.run:app",
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(port),
+        "--workers",
+        str(workers),
+        "--log-level",
+        "warning",
+        "--no-access-log",
+    ]
+    log = log_path.open("wb")
+    proc = subprocess.Popen(cmd, env=env, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"Server exited with {proc.returncode}; see {log_path}")
+        try:
+            if httpx.get(f"{base_url}{API}/meta/endpoints", timeout=1.0).status_code == 200:
+                return proc, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit(f"Server did not start; see {log_path}")
+
+
+def prepare_users(scenario: Scenario, dsn: str, env: dict[str, str]) -> list[dict[str, Any]]:
+    """Seed the DB with the server's password settings; return users with a fresh token."""
+
+    os.environ.update({k: v for k, v in env.items() if k.startswith("ZENAUTH_")})
+    from zen_auth.claims import Claims
+    from zen_auth.server.config import ZENAUTH_SERVER_CONFIG
+    from zen_auth.server.usecases import passwords
+
+    ZENAUTH_SERVER_CONFIG.cache_clear()
+    cfg = ZENAUTH_SERVER_CONFIG()
+    passwords.configure_context(cfg.password_scheme_list(), cfg.password_costs())
+    # Hash once: one bcrypt per user would dominate setup time.
+    password_hash = passwords.hash_password(_PASSWORD)
+    users = seed(dsn, users=scenario.users, password_hash=password_hash)
+    return [{"user_name": u.user_name, "token": Claims.from_user(u).token} for u in users]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the ZenAuth server under uvicorn")
+    parser.add_argument("scenario", help="Scenario JSON file")
+    parser.add_argument("--dsn", help="Use this (empty) database instead of a temporary SQLite file")
+    parser.add_argument("--duration", type=float, help="Override duration_sec")
+    parser.add_argument("--concurrency", help="Override concurrency (comma separated)")
+    parser.add_argument("--workers", type=int, help="Override uvicorn workers")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Compare p99 and rps against an earlier --json file")
+    parser.add_argument(
+        "--fail-threshold", type=float, help="With --compare: exit 1 if p99 or rps is worse by this ratio"
+    )
+    args = parser.parse_args()
+
+    scenario = Scenario.load(args.scenario)
+    if args.duration:
+        scenario.duration_sec = args.duration
+    if args.concurrency:
+        scenario.concurrency = [int(c) for c in args.concurrency.split(",")]
+    if args.workers:
+        scenario.workers = args.workers
+
+    results: dict[str, dict[str, Any]] = {}
+    failures: list[str] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        dsn = args.dsn or f"sqlite+pysqlite:///{Path(tmp) / 'load.sqlite3'}"
+        env = _server_env(scenario, dsn)
+        users = prepare_users(scenario, dsn, env)
+        proc, base_url = start_server(env, scenario.workers, Path(tmp) / "server.log")
+        try:
+            print(f"{scenario.name}: {scenario.workers} worker(s), mix {scenario.mix}")
+            for concurrency in scenario.concurrency:
+                name = f"{scenario.name}@c{concurrency}"
+                result = summarize(run_step(base_url, scenario, users, concurrency), scenario.duration_sec)
+                result["concurrency"] = concurrency
+                result["workers"] = scenario.workers
+                results[name] = result
+                _print_step(name, result)
+                failures += check_thresholds(name, result, scenario.thresholds)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    best = max(results.values(), key=lambda r: r["rps"])
+    print(
+        f"\nCeiling: {best['rps']:.1f} req/s at concurrency {best['concurrency']} ({scenario.workers} worker(s))"
+    )
+
+    if args.json:
+        write_results(args.json, f"load:{scenario.name}", results)
+    if args.compare:
+        threshold = args.fail_threshold or 0.1
+        print()
+        regressions = compare(args.compare, results, key="p99_ms", threshold=threshold)
+        regressions += compare(args.compare, results, key="rps", threshold=threshold, higher_is_better=True)
+        if args.fail_threshold is not None:
+            failures += [f"{name}: regression against {args.compare}" for name in dict.fromkeys(regressions)]
+    if failures:
+        print("\n" + "\n".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Compare per-request overhead of the server middleware stack.
+
+Runs an in-process ASGI request loop (no network, no FastAPI routing) through:
+
+- `legacy`: the previous `BaseHTTPMiddleware` stack (access log, CSRF, request id)
+- `asgi`:   the same three layers as pure ASGI middlewares
+- `merged`: the single `ServerMiddleware` layer used by `create_app()`
+
+Usage:
+    python benchmarks/bench_middleware.py [--requests N] [--method POST]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Awaitable, Callable
+
+
+def _bootstrap_sys_path() -> None:
+    """Allow running this file directly without installing packages."""
+
+    repo_root = Path(__file__).resolve().parents[1]
+    for p in (repo_root / "core" / "src", repo_root / "server" / "src"):
+        p_str = str(p)
+        if p_str not in sys.path:
+            sys.path.insert(0, p_str)
+
+
+_bootstrap_sys_path()
+os.environ.setdefault("ZENAUTH_SECRET_KEY", "**BENCH**")
+os.environ.setdefault("ZENAUTH_AUTH_SERVER_ORIGIN", "http://bench")
+os.environ.setdefault("ZENAUTH_SERVER_DSN", "sqlite+pysqlite:///:memory:")
+os.environ.setdefault("ZENAUTH_SERVER_CSRF_TRUSTED_ORIGINS", "http://bench, http://other")
+
+from fastapi import Request, Response  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+from starlette.types import ASGIApp, Message, Receive, Scope, Send  # noqa: E402
+from zen_auth.config import ZENAUTH_CONFIG  # noqa: E402
+from zen_auth.server.api.util.req_id import RequestIDMiddleWare  # noqa: E402
+from zen_auth.server.config import ZENAUTH_SERVER_CONFIG  # noqa: E402
+from zen_auth.server.middleware import (  # noqa: E402
+    CSRFPolicy,
+    ServerMiddleware,
+    _csrf_failure,
+    _log_access,
+    _origin_from_url,
+    _split_csv,
+)
+
+_Next = Callable[[Request], Awaitable[Response]]
+
+
+class _LegacyRequestID(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: _Next) -> Response:
+        import uuid
+
+        num = uuid.uuid4().int
+        chars = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+        out = []
+        while num:
+            num, rem = divmod(num, 62)
+            out.append(chars[rem])
+        request.state.req_id = "".join(reversed(out))
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request.state.req_id
+        return response
+
+
+class _LegacyCSRF(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: _Next) -> Response:
+        cfg = ZENAUTH_SERVER_CONFIG()
+        if not cfg.csrf_protect or request.method.upper() not in {"POST", "PUT", "PATCH", "DELETE"}:
+            return await call_next(request)
+        if ZENAUTH_CONFIG().cookie_name not in request.cookies:
+            return await call_next(request)
+        trusted = set(_split_csv(cfg.csrf_trusted_origins.strip()))
+        origin = request.headers.get("origin")
+        if origin:
+            if origin not in trusted:
+                return Response(status_code=403)
+            return await call_next(request)
+        ref_origin = _origin_from_url(request.headers.get("referer") or "")
+        if ref_origin in trusted:
+            return await call_next(request)
+        return Response(status_code=403)
+
+
+class _LegacyAccessLog(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: _Next) -> Response:
+        start = time.perf_counter()
+        response = await call_next(request)
+        duration_ms = (time.perf_counter() - start) * 1000.0
+        request_line = f"{request.method} {request.url.path} HTTP/{request.scope.get('http_version', '1.1')}"
+        logging.getLogger("access").info(
+            request_line,
+            extra={
+                "client_addr": request.client.host if request.client else "-",
+                "request_line": request_line,
+                "status_code": response.status_code,
+                "duration_ms": f"{duration_ms:.2f}",
+            },
+        )
+        return response
+
+
+class _AsgiCSRF:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.policy = CSRFPolicy()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            reason = self.policy.check(scope)
+            if reason is not None:
+                await _csrf_failure(reason)(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+class _AsgiAccessLog:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _log_access(scope, status_code, start)
+
+
+async def _endpoint(scope: Scope, receive: Receive, send: Send) -> None:
+    body = b'{"data":{}}'
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", b"11")],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+def _stack(name: str) -> ASGIApp:
+    app: ASGIApp = _endpoint
+    if name == "legacy":
+        layers: list[Callable[[ASGIApp], ASGIApp]] = [_LegacyRequestID, _LegacyCSRF, _LegacyAccessLog]
+    elif name == "asgi":
+        layers = [RequestIDMiddleWare, _AsgiCSRF, _AsgiAccessLog]
+    else:
+        layers = [ServerMiddleware]
+    for layer in layers:
+        app = layer(app)
+    return app
+
+
+def _scope(method: str) -> Scope:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": "/zen_auth/v1/verify/token",
+        "raw_path": b"/zen_auth/v1/verify/token",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"bench"),
+            (b"origin", b"http://bench"),
+            (b"cookie", b"access_token=abc; theme=dark"),
+            (b"content-type", b"application/json"),
+            (b"content-length", b"2"),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+
+async def _run(app: ASGIApp, method: str, n: int) -> float:
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"{}", "more_body": False}
+
+    async def send(message: Message) -> None:
+        return None
+
+    for _ in range(min(n, 500)):
+        await app(_scope(method), receive, send)
+
+    start = time.perf_counter()
+    for _ in range(n):
+        await app(_scope(method), receive, send)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark server middleware overhead")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--method", default="POST")
+    parser.add_argument("--log", action="store_true", help="Emit access log lines (to /dev/null)")
+    args = parser.parse_args()
+
+    access = logging.getLogger("access")
+    access.propagate = False
+    access.setLevel(logging.INFO)
+    if args.log:
+        access.addHandler(logging.FileHandler(os.devnull))
+    else:
+        access.addHandler(logging.NullHandler())
+
+    results = {
+        name: asyncio.run(_run(_stack(name), args.method, args.requests))
+        for name in ("legacy", "asgi", "merged")
+    }
+    base = results["legacy"]
+    for name, us in results.items():
+        print(f"{name:>7}: {us:8.2f} us/request  ({base / us:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Microbenchmarks for the hot primitives behind the verify, auth and admin APIs.
+
+- JWT: `Claims.token` (encode) and `Claims.from_token` (decode)
+- `ClaimsSelf._verify_token_with_session` against a seeded SQLite file
+- `rbac_checks.has_required_scopes` and `user_service.user_to_dto`
+- `VerifyResponse` serialization and `AuditFormatter.format`
+- zen_html rendering of the admin `UserList` for 20/200/2000 rows
+
+Results can be stored as JSON and compared with an earlier run; with
+`--fail-threshold` the script exits non-zero on regressions.
+
+Usage:
+    python benchmarks/bench_primitives.py [--filter verify] [--json out.json]
+        [--compare baseline.json [--fail-threshold 0.2]] [--min-time 0.5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Callable
+
+from _harness import ROLES, bootstrap, compare, measure, seed, write_results
+
+bootstrap()
+
+from starlette.requests import Request  # noqa: E402
+from zen_auth.claims import Claims  # noqa: E402
+from zen_auth.dto import UserDTO, VerifyTokenDTO  # noqa: E402
+from zen_auth.logger import AuditFormatter  # noqa: E402
+from zen_auth.server.api.v1._tmp_lib import HResponse  # noqa: E402
+from zen_auth.server.api.v1.admin.user_tmpl import UserList  # noqa: E402
+from zen_auth.server.api.v1.verify.verify import VerifyResponse  # noqa: E402
+from zen_auth.server.claims_self import ClaimsSelf  # noqa: E402
+from zen_auth.server.persistence import UserOrm  # noqa: E402
+from zen_auth.server.persistence.session import (  # noqa: E402
+    create_engine_from_dsn,
+    create_sessionmaker,
+    session_scope,
+)
+from zen_auth.server.run import create_app  # noqa: E402
+from zen_auth.server.usecases import rbac_checks, user_service  # noqa: E402
+
+# Any string works: users are created with `already_hashed=True` and never log in here.
+_HASH = "$2b$12$" + "x" * 53
+
+
+def _request() -> Request:
+    app = create_app()
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "scheme": "http",
+            "server": ("bench", 80),
+            "path": "/zen_auth/v1/admin/user",
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"host", b"bench"), (b"user-agent", b"bench")],
+            "client": ("127.0.0.1", 50000),
+            "app": app,
+            "router": app.router,
+            "state": {"req_id": "bench"},
+        }
+    )
+
+
+def _cases(tmp: Path) -> dict[str, Callable[[], object]]:
+    dsn = f"sqlite:///{tmp / 'bench.sqlite3'}"
+    seed(dsn, users=2000, password_hash=_HASH)
+    factory = create_sessionmaker(create_engine_from_dsn(dsn))
+    request = _request()
+
+    with session_scope(factory) as session:
+        users = [user_service.user_to_dto(u) for u in session.query(UserOrm).order_by(UserOrm.user_name)]
+    user = next(u for u in users if "viewer" in u.roles)
+    claims = Claims.from_user(user)
+    token = claims.token
+
+    def verify_token_with_session() -> object:
+        with session_scope(factory) as session:
+            return ClaimsSelf._verify_token_with_session(session, token)
+
+    def has_required_scopes() -> object:
+        with session_scope(factory) as session:
+            return rbac_checks.has_required_scopes(session, user.user_name, ["scope:19", "missing"])
+
+    # Kept open (and never committed) so the loaded user and its roles stay fresh.
+    orm_session = factory()
+    orm_user = orm_session.get(UserOrm, user.user_name)
+    assert orm_user is not None
+
+    verify_dto = VerifyTokenDTO(token=token, user=user)
+
+    formatter = AuditFormatter()
+    record = logging.LogRecord("zen_auth.audit", logging.INFO, __file__, 0, "Verify token.", None, None)
+    record.__dict__.update(
+        user_name=user.user_name,
+        roles=user.roles,
+        result="success",
+        required_context={"action": "verify_token"},
+        request=request,
+        token=None,
+    )
+
+    role_map = {r: r.title() for r in ROLES}
+
+    def render_user_list(rows: list[UserDTO]) -> Callable[[], object]:
+        return lambda: "".join(
+            HResponse._render(UserList(rows, req=request, page=1, num_pages=1, role_map=role_map), False)
+        )
+
+    return {
+        "jwt_encode": lambda: claims.token,
+        "jwt_decode": lambda: Claims.from_token(token),
+        "verify_token_with_session": verify_token_with_session,
+        "rbac_has_required_scopes": has_required_scopes,
+        "user_to_dto": lambda: user_service.user_to_dto(orm_user),
+        "verify_response": lambda: VerifyResponse(data=verify_dto, request=request),
+        "audit_formatter": lambda: formatter.format(record),
+        "user_list_render_20": render_user_list(users[:20]),
+        "user_list_render_200": render_user_list(users[:200]),
+        "user_list_render_2000": render_user_list(users[:2000]),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark ZenAuth hot primitives")
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Seconds per benchmark (approx.)")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Compare against an earlier --json file")
+    parser.add_argument(
+        "--fail-threshold", type=float, help="With --compare: exit 1 if any median is slower by this ratio"
+    )
+    args = parser.parse_args()
+
+    logging.getLogger("zen_auth.slow_query").disabled = True
+    results: dict[str, dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, fn in _cases(Path(tmp)).items():
+            if args.filter not in name:
+                continue
+            results[name] = measure(fn, min_time=args.min_time, rounds=args.rounds)
+            r = results[name]
+            print(
+                f"{name:>36}: {r['median_us']:10.2f} us  (min {r['min_us']:.2f}, stdev {r['stdev_us']:.2f})"
+            )
+
+    if args.json:
+        write_results(args.json, "primitives", results)
+    if args.compare:
+        print()
+        regressions = compare(args.compare, results, threshold=args.fail_threshold or 0.1)
+        if args.fail_threshold is not None and regressions:
+            print(f"Regressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
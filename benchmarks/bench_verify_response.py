@@ -0,0 +1,110 @@
+"""Compare building `/verify/*` JSON responses.
+
+- `legacy`: `jsonable_encoder` + a new JST `timezone` per response + stdlib json
+- `fast`:   `VerifyResponse` (pydantic-core `to_json`, cached JST timestamp)
+
+Both produce the same `{"data": ..., "meta": ...}` document.
+
+Usage:
+    python benchmarks/bench_verify_response.py [--iterations N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+
+def _bootstrap_sys_path() -> None:
+    """Allow running this file directly without installing packages."""
+
+    repo_root = Path(__file__).resolve().parents[1]
+    for p in (repo_root / "core" / "src", repo_root / "server" / "src"):
+        p_str = str(p)
+        if p_str not in sys.path:
+            sys.path.insert(0, p_str)
+
+
+_bootstrap_sys_path()
+os.environ.setdefault("ZENAUTH_SECRET_KEY", "**BENCH**")
+os.environ.setdefault("ZENAUTH_AUTH_SERVER_ORIGIN", "http://bench")
+os.environ.setdefault("ZENAUTH_SERVER_DSN", "sqlite+pysqlite:///:memory:")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+from zen_auth.dto import UserDTO, VerifyTokenDTO  # noqa: E402
+from zen_auth.server.api.v1.verify.verify import (  # noqa: E402
+    VerifyResponse,
+    VerifyUserRoleResultDTO,
+)
+
+
+def _legacy(data: Any, request: Request) -> JSONResponse:
+    meta = {
+        "req_id": getattr(request.state, "req_id", "--"),
+        "timestamp": datetime.now(tz=timezone(timedelta(hours=9))).isoformat(
+            sep="T", timespec="milliseconds"
+        ),
+    }
+    return JSONResponse(content={"data": jsonable_encoder(data), "meta": meta})
+
+
+def _fast(data: Any, request: Request) -> JSONResponse:
+    return VerifyResponse(data=data, request=request)
+
+
+def _payloads() -> dict[str, Any]:
+    user = UserDTO(
+        user_name="alice",
+        roles=["admin", "ops", "viewer"],
+        real_name="Alice Example",
+        division="Platform",
+        description="benchmark user",
+        policy_epoch=3,
+        created_at="2025-01-01T00:00:00",
+        updated_at="2025-06-01T12:34:56",
+    )
+    return {
+        "verify_token": VerifyTokenDTO(token="x" * 180, user=user),
+        "verify_user_role": VerifyUserRoleResultDTO(user_name="alice", role_name="admin", has_role=True),
+    }
+
+
+def _bench(fn: Callable[[Any, Request], JSONResponse], data: Any, request: Request, n: int) -> float:
+    for _ in range(min(n, 1000)):
+        fn(data, request)
+    start = time.perf_counter()
+    for _ in range(n):
+        fn(data, request)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark verify API response rendering")
+    parser.add_argument("--iterations", type=int, default=50000)
+    args = parser.parse_args()
+
+    request = Request(
+        {"type": "http", "method": "POST", "path": "/", "headers": [], "state": {"req_id": "r1"}}
+    )
+    for name, data in _payloads().items():
+        legacy_doc = json.loads(bytes(_legacy(data, request).body))
+        fast_doc = json.loads(bytes(_fast(data, request).body))
+        legacy_doc["meta"].pop("timestamp")
+        fast_doc["meta"].pop("timestamp")
+        assert legacy_doc == fast_doc, name
+
+        legacy = _bench(_legacy, data, request, args.iterations)
+        fast = _bench(_fast, data, request, args.iterations)
+        print(f"{name:>16}: legacy {legacy:7.2f} us  fast {fast:7.2f} us  ({legacy / fast:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@ import json
 import time
 from threading import Lock
 from typing import Any, Callable, ClassVar, Iterable, Literal, TypeVar, cast
-from urllib.parse import urlencode
+from urllib.parse import urlencode, urlparse
 
 import requests
 from fastapi import Depends, Header, status
@@ -15,7 +15,7 @@ from requests import exceptions as req_exc
 from typing_extensions import Self
 
 from ..config import ZENAUTH_CONFIG
-from ..dto import UserDTO, VerifyTokenDTO
+from ..dto import PolicyEventsDTO, UserDTO, VerifyTokenDTO
 from ..errors import (
     ClaimError,
     ClaimSourceError,
@@ -27,10 +27,15 @@ from ..errors import (
     MissingRequiredScopesError,
     UserVerificationError,
 )
-from ..logger import AUDIT_LOGGER, LOGGER
+from ..logger import AUDIT_LOGGER, LOGGER, ZENAUTH_AUDIT_CONFIG, admit_audit_success
+from ..timing import TimingStats, parse_server_timing, phase
+from .listener import PolicyEventListener
 
 TokenType = Literal["access"]
 
+# (user_name, check kind, required roles, required scopes)
+_DecisionKey = tuple[str, str, tuple[str, ...], tuple[str, ...]]
+
 _RespT = TypeVar("_RespT", bound=Response)
 
 
@@ -44,6 +49,52 @@ def _as_dict(value: object, *, message: str) -> dict[str, object]:
     return value
 
 
+# Server-side phases (`Server-Timing`) and client round trips per auth server path.
+SERVER_TIMING_STATS = TimingStats()
+
+
+def _record_server_timing(res: requests.Response) -> None:
+    headers = getattr(res, "headers", None)
+    value = headers.get("Server-Timing") if headers is not None else None
+    phases = parse_server_timing(value) if isinstance(value, str) else {}
+    elapsed = getattr(res, "elapsed", None)
+    if isinstance(elapsed, DT.timedelta):
+        phases["client"] = elapsed.total_seconds() * 1000.0
+    if phases:
+        url = getattr(res, "url", None)
+        SERVER_TIMING_STATS.record(urlparse(url).path if isinstance(url, str) else "-", phases)
+
+
+def _check_response(res: requests.Response) -> None:
+    """Record timings, then raise for load-shedding and rate-limit responses.
+
+    The auth server's `Server-Timing` phases and the client-side round trip
+    (`client`) go to `SERVER_TIMING_STATS`, see `Claims.server_timing_stats`.
+
+    503 (verify queue shed) maps to `code="overloaded"` and 429 (login
+    admission / brute-force throttling) to `code="rate_limited"`. Both carry
+    `Retry-After`; callers should back off instead of treating the response as
+    bad credentials or an invalid token.
+    """
+
+    _record_server_timing(res)
+    if res.status_code == status.HTTP_503_SERVICE_UNAVAILABLE:
+        code, msg = "overloaded", "Auth server is overloaded"
+    elif res.status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+        code, msg = "rate_limited", "Auth server rate limit exceeded"
+    else:
+        return
+    retry_after = res.headers.get("Retry-After")
+    raise ClaimSourceError(
+        msg,
+        code=code,
+        info={
+            "status_code": res.status_code,
+            "retry_after": int(retry_after) if retry_after and retry_after.isdigit() else None,
+        },
+    )
+
+
 def _extract_bool_field(data: dict[str, object], field: str, *, message: str) -> bool:
     value = data.get(field)
     if not isinstance(value, bool):
@@ -76,6 +127,10 @@ def _build_role_or_scope_dep(
 
 
 def _token_data(req: Request) -> dict[str, str] | None:
+    # Only token timestamps are ever logged, and only when opted in; skip the
+    # JWT decode otherwise.
+    if not ZENAUTH_AUDIT_CONFIG().include_token_timestamps:
+        return None
     identity_config = ZENAUTH_CONFIG()
     token = req.cookies.get(identity_config.cookie_name) or _extract_bearer(req.headers.get("authorization"))
     if not token:
@@ -94,28 +149,37 @@ def log_audit_success(
     required_context: object = None,
     request: Request | None = None,
     include_token: bool = True,
+    action: str | None = None,
 ) -> None:
     """Write a success entry to the audit logger.
 
+    Success events are subject to the per-action sampling/aggregation policy
+    (`ZENAUTH_AUDIT_SUCCESS_POLICIES`); failures are always written.
+
     Args:
         msg: Human readable message.
         user_name: The username associated with the event.
         roles: The user's roles if available.
         required_context: Context for the operation (roles, scopes, etc).
         request: Optional Request object for additional context.
+        action: Policy key; defaults to `required_context["action"]`.
     """
 
-    AUDIT_LOGGER.info(
-        msg,
-        extra={
-            "user_name": user_name,
-            "roles": roles,
-            "result": "success",
-            "required_context": required_context,
-            "request": request,
-            "token": _token_data(request) if (include_token and request) else None,
-        },
-    )
+    with phase("audit"):
+        if not admit_audit_success(user_name, required_context, action):
+            return
+
+        AUDIT_LOGGER.info(
+            msg,
+            extra={
+                "user_name": user_name,
+                "roles": roles,
+                "result": "success",
+                "required_context": required_context,
+                "request": request,
+                "token": _token_data(request) if (include_token and request) else None,
+            },
+        )
 
 
 def log_audit_fail(
@@ -136,17 +200,18 @@ def log_audit_fail(
         request: Optional Request object for additional context.
     """
 
-    AUDIT_LOGGER.info(
-        msg,
-        extra={
-            "user_name": user_name,
-            "roles": roles,
-            "result": "failure",
-            "required_context": required_context,
-            "request": request,
-            "token": _token_data(request) if (include_token and request) else None,
-        },
-    )
+    with phase("audit"):
+        AUDIT_LOGGER.info(
+            msg,
+            extra={
+                "user_name": user_name,
+                "roles": roles,
+                "result": "failure",
+                "required_context": required_context,
+                "request": request,
+                "token": _token_data(request) if (include_token and request) else None,
+            },
+        )
 
 
 class Claims(BaseModel):
@@ -170,6 +235,15 @@ class Claims(BaseModel):
     _endpoints_cache_lock: ClassVar[Lock] = Lock()
     _endpoints_cache: ClassVar[dict[str, tuple[float, dict[str, str]]]] = {}
 
+    # Verification caches (disabled when TTL is 0). Entries are evicted early
+    # by `apply_policy_events`, so a running policy listener allows long TTLs.
+    _VERIFY_CACHE_TTL_SEC: ClassVar[float] = 0.0
+    _VERIFY_CACHE_MAX_ENTRIES: ClassVar[int] = 10000
+    _verify_cache_lock: ClassVar[Lock] = Lock()
+    _token_cache: ClassVar[dict[str, tuple[float, VerifyTokenDTO]]] = {}
+    _decision_cache: ClassVar[dict[_DecisionKey, tuple[float, bool]]] = {}
+    _policy_listener: ClassVar[PolicyEventListener | None] = None
+
     typ: TokenType
     sub: str
     policy_epoch: int
@@ -326,6 +400,7 @@ class Claims(BaseModel):
         except Exception as e:
             raise ClaimSourceError(ERROR_UNKNOWN, code="internal") from e
 
+        _check_response(res)
         if res.status_code != status.HTTP_200_OK:
             raise ClaimSourceError(
                 "Auth server returned non-200 for endpoints discovery",
@@ -375,6 +450,125 @@ class Claims(BaseModel):
             )
         return url
 
+    @classmethod
+    def _cache_put(cls, cache: dict[Any, tuple[float, Any]], key: Any, value: Any) -> None:
+        now = time.monotonic()
+        with cls._verify_cache_lock:
+            if len(cache) >= cls._VERIFY_CACHE_MAX_ENTRIES:
+                for k in [k for k, (at, _) in cache.items() if now - at > cls._VERIFY_CACHE_TTL_SEC]:
+                    del cache[k]
+                if len(cache) >= cls._VERIFY_CACHE_MAX_ENTRIES:
+                    cache.clear()
+            cache[key] = (now, value)
+
+    @classmethod
+    def _cache_get(cls, cache: dict[Any, tuple[float, Any]], key: Any) -> Any:
+        if cls._VERIFY_CACHE_TTL_SEC <= 0:
+            return None
+        with cls._verify_cache_lock:
+            cached = cache.get(key)
+            if cached is None:
+                return None
+            cached_at, value = cached
+            if time.monotonic() - cached_at <= cls._VERIFY_CACHE_TTL_SEC:
+                return value
+            del cache[key]
+            return None
+
+    @classmethod
+    def _cached_token(cls, token: str) -> VerifyTokenDTO | None:
+        return cast(VerifyTokenDTO | None, cls._cache_get(cls._token_cache, token))
+
+    @classmethod
+    def _cache_token(cls, token: str, dto: VerifyTokenDTO) -> None:
+        if cls._VERIFY_CACHE_TTL_SEC > 0:
+            cls._cache_put(cls._token_cache, token, dto)
+
+    @classmethod
+    def _cached_decision(cls, key: _DecisionKey) -> bool | None:
+        return cast(bool | None, cls._cache_get(cls._decision_cache, key))
+
+    @classmethod
+    def _cache_decision(cls, key: _DecisionKey, allowed: bool) -> bool:
+        if cls._VERIFY_CACHE_TTL_SEC > 0:
+            cls._cache_put(cls._decision_cache, key, allowed)
+        return allowed
+
+    @classmethod
+    def invalidate_user(cls, user_name: str) -> None:
+        """Drop cached token verifications and decisions for one user."""
+
+        with cls._verify_cache_lock:
+            for token in [t for t, (_, dto) in cls._token_cache.items() if dto.user.user_name == user_name]:
+                del cls._token_cache[token]
+            for key in [k for k in cls._decision_cache if k[0] == user_name]:
+                del cls._decision_cache[key]
+
+    @classmethod
+    def invalidate_all(cls) -> None:
+        """Drop every cached token verification and decision."""
+
+        with cls._verify_cache_lock:
+            cls._token_cache.clear()
+            cls._decision_cache.clear()
+
+    @classmethod
+    def apply_policy_events(cls, page: PolicyEventsDTO) -> None:
+        """Evict cache entries affected by a page of policy events.
+
+        User events evict that user only. Role/scope binding changes can affect
+        any user holding the role, which the client cannot resolve locally, so
+        they flush everything.
+        """
+
+        if page.reset:
+            cls.invalidate_all()
+            return
+        for event in page.events:
+            if event.kind in ("user_epoch", "user_deleted"):
+                cls.invalidate_user(event.subject)
+            else:
+                cls.invalidate_all()
+                return
+
+    @classmethod
+    def start_policy_listener(cls, url: str | None = None, *, wait_sec: float = 25.0) -> PolicyEventListener:
+        """Subscribe to the auth server's policy events in a background thread.
+
+        Optional args:
+            url: Override the `/meta/policy_events` endpoint URL. Defaults to
+                `ZENAUTH_AUTH_SERVER_ORIGIN` + `/zen_auth/v1/meta/policy_events`.
+            wait_sec: Long-poll wait per request.
+        """
+
+        cls.stop_policy_listener()
+        if url is None:
+            origin = (ZENAUTH_CONFIG().auth_server_origin or "").rstrip("/")
+            url = f"{origin}/zen_auth/v1/meta/policy_events"
+        listener = PolicyEventListener(cls, url, wait_sec=wait_sec)
+        listener.start()
+        cls._policy_listener = listener
+        return listener
+
+    @classmethod
+    def stop_policy_listener(cls) -> None:
+        listener = cls._policy_listener
+        cls._policy_listener = None
+        if listener is not None:
+            listener.stop()
+
+    @staticmethod
+    def server_timing_stats() -> dict[str, dict[str, dict[str, float]]]:
+        """Per auth server path: count/total_ms/max_ms of each phase.
+
+        Phases are those reported by the server's `Server-Timing` header
+        (enabled with `ZENAUTH_SERVER_SERVER_TIMING`) plus `client`, the round
+        trip measured here. `client` minus the server's `total` is network and
+        proxy time.
+        """
+
+        return SERVER_TIMING_STATS.snapshot()
+
     @classmethod
     def _get_token(cls, req: Request, authorization: str | None) -> str | None:
         return req.cookies.get(ZENAUTH_CONFIG().cookie_name) or _extract_bearer(authorization)
@@ -444,20 +638,26 @@ class Claims(BaseModel):
 
         def _verify_roles(req: Request, user_name: str) -> bool:
             nonlocal role_url
+            roles = [r for r in required_roles if r]
+            key: _DecisionKey = (user_name, "role", tuple(roles), ())
+            cached = cls._cached_decision(key)
+            if cached is not None:
+                return cached
+
             if role_url is None:
                 role_url = cls._endpoint_url(
                     req,
                     "verify_user_role",
                 )
 
-            roles = [r for r in required_roles if r]
             res = cls._POST(
                 role_url,
                 timeout=3.0,
                 json={"user_name": user_name, "required_roles": roles},
             )
+            _check_response(res)
             if res.status_code == status.HTTP_403_FORBIDDEN:
-                return False
+                return cls._cache_decision(key, False)
             if res.status_code != status.HTTP_200_OK:
                 raise ClaimSourceError(
                     "Auth server returned non-200 for role verify",
@@ -472,7 +672,7 @@ class Claims(BaseModel):
             has_role = data.get("has_role")
             if not isinstance(has_role, bool):
                 raise ClaimSourceError("Auth server returned invalid data", code="invalid_data")
-            return has_role
+            return cls._cache_decision(key, has_role)
 
         def dep(req: Request, user: UserDTO = Depends(guard)) -> UserDTO:
             roles = [r for r in required_roles if r]
@@ -534,20 +734,26 @@ class Claims(BaseModel):
 
         def _user_allowed_any_scope(req: Request, user_name: str) -> bool:
             nonlocal scope_url
+            scopes = [s for s in required_scopes if s]
+            key: _DecisionKey = (user_name, "scope", (), tuple(scopes))
+            cached = cls._cached_decision(key)
+            if cached is not None:
+                return cached
+
             if scope_url is None:
                 scope_url = cls._endpoint_url(
                     req,
                     "verify_user_scope",
                 )
 
-            scopes = [s for s in required_scopes if s]
             res = cls._POST(
                 scope_url,
                 timeout=3.0,
                 json={"user_name": user_name, "required_scopes": scopes},
             )
+            _check_response(res)
             if res.status_code == status.HTTP_403_FORBIDDEN:
-                return False
+                return cls._cache_decision(key, False)
             if res.status_code != status.HTTP_200_OK:
                 raise ClaimSourceError(
                     "Auth server returned non-200 for scope verify",
@@ -562,7 +768,7 @@ class Claims(BaseModel):
             allowed = data.get("allowed")
             if not isinstance(allowed, bool):
                 raise ClaimSourceError("Auth server returned invalid data", code="invalid_data")
-            return allowed
+            return cls._cache_decision(key, allowed)
 
         def dep(req: Request, user: UserDTO = Depends(guard)) -> UserDTO:
             scopes = [s for s in required_scopes if s]
@@ -653,10 +859,16 @@ class Claims(BaseModel):
         if not role_list:
             return False
 
+        key: _DecisionKey = (user_name, "role", tuple(role_list), ())
+        cached = cls._cached_decision(key)
+        if cached is not None:
+            return cached
+
         url = role_url or cls._endpoint_url(req, "verify_user_role")
         res = cls._POST(url, timeout=3.0, json={"user_name": user_name, "required_roles": role_list})
+        _check_response(res)
         if res.status_code == status.HTTP_403_FORBIDDEN:
-            return False
+            return cls._cache_decision(key, False)
         if res.status_code != status.HTTP_200_OK:
             raise ClaimSourceError(
                 "Auth server returned non-200 for role verify",
@@ -666,7 +878,9 @@ class Claims(BaseModel):
 
         res_dict = _as_dict(res.json(), message="Auth server returned invalid data")
         data = _as_dict(res_dict.get("data"), message="Auth server returned invalid data")
-        return _extract_bool_field(data, "has_role", message="Auth server returned invalid data")
+        return cls._cache_decision(
+            key, _extract_bool_field(data, "has_role", message="Auth server returned invalid data")
+        )
 
     @classmethod
     def _verify_user_scopes_any(
@@ -680,10 +894,16 @@ class Claims(BaseModel):
         if not scope_list:
             return False
 
+        key: _DecisionKey = (user_name, "scope", (), tuple(scope_list))
+        cached = cls._cached_decision(key)
+        if cached is not None:
+            return cached
+
         url = scope_url or cls._endpoint_url(req, "verify_user_scope")
         res = cls._POST(url, timeout=3.0, json={"user_name": user_name, "required_scopes": scope_list})
+        _check_response(res)
         if res.status_code == status.HTTP_403_FORBIDDEN:
-            return False
+            return cls._cache_decision(key, False)
         if res.status_code != status.HTTP_200_OK:
             raise ClaimSourceError(
                 "Auth server returned non-200 for scope verify",
@@ -693,7 +913,9 @@ class Claims(BaseModel):
 
         res_dict = _as_dict(res.json(), message="Auth server returned invalid data")
         data = _as_dict(res_dict.get("data"), message="Auth server returned invalid data")
-        return _extract_bool_field(data, "allowed", message="Auth server returned invalid data")
+        return cls._cache_decision(
+            key, _extract_bool_field(data, "allowed", message="Auth server returned invalid data")
+        )
 
     @classmethod
     def _role_or_scope_check(
@@ -717,12 +939,16 @@ class Claims(BaseModel):
             )
 
         try:
+            key: _DecisionKey = (user.user_name, "role_or_scope", tuple(role_list), tuple(scope_list))
+            cached = cls._cached_decision(key)
             combined_url = role_or_scope_url
-            if combined_url is None:
+            if combined_url is None and cached is None:
                 endpoints = cls._get_cached_endpoints(req)
                 combined_url = endpoints.get("verify_user_role_or_scope")
 
-            if combined_url:
+            if cached is not None:
+                has_access = cached
+            elif combined_url:
                 res = cls._POST(
                     combined_url,
                     timeout=3.0,
@@ -732,6 +958,7 @@ class Claims(BaseModel):
                         "required_scopes": scope_list,
                     },
                 )
+                _check_response(res)
                 if res.status_code == status.HTTP_200_OK:
                     has_access = True
                 elif res.status_code == status.HTTP_403_FORBIDDEN:
@@ -742,6 +969,7 @@ class Claims(BaseModel):
                         code="invalid_data",
                         info={"status_code": res.status_code},
                     )
+                cls._cache_decision(key, has_access)
             else:
                 has_access = cls._verify_user_roles_any(
                     req, user.user_name, role_list, role_url=role_url
@@ -754,6 +982,7 @@ class Claims(BaseModel):
                     user.roles,
                     required_context={"roles": role_list, "scopes": scope_list},
                     request=req,
+                    action="role_or_scope",
                 )
                 return user
 
@@ -816,12 +1045,19 @@ class Claims(BaseModel):
                 claims = cls._validate_token(token)
                 user_name = claims.username
 
+                cached = cls._cached_token(token)
+                if cached is not None:
+                    cls.set_cookie(resp, cached.token)
+                    return cached.user
+
                 res = cls._POST(url, timeout=3.0, json={"token": token})
+                _check_response(res)
                 if res.status_code != status.HTTP_200_OK:
                     raise InvalidTokenError(f"Invalid token. (user: {user_name})", user_name=user_name)
 
                 res_dict: dict[str, object] = res.json()
                 res_dto = VerifyTokenDTO.model_validate(res_dict["data"])
+                cls._cache_token(token, res_dto)
 
                 cls.set_cookie(resp, res_dto.token)
                 return res_dto.user
@@ -876,6 +1112,7 @@ class Claims(BaseModel):
                 )
 
             res = cls._POST(url, timeout=3.0, json=dict(user_name=user_name, password=password))
+            _check_response(res)
             if res.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR:
                 msg = f"Auth server internal error during user verification. (user: {user_name})"
                 LOGGER.critical(msg)
@@ -889,6 +1126,8 @@ class Claims(BaseModel):
             res_dict: dict[str, object] = res.json()
             res_dto = Claims.TokenDTO.model_validate(res_dict["data"])
             return cls.set_cookie(resp, res_dto.token)
+        except ClaimSourceError:
+            raise
         except UserVerificationError as e:
             raise InvalidCredentialsError(
                 f"Invalid user or password. (user: {user_name})",
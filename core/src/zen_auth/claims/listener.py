@@ -0,0 +1,59 @@
+"""Background subscriber for the auth server's policy-change event stream."""
+
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING
+
+from ..dto import PolicyEventsDTO
+from ..logger import LOGGER
+
+if TYPE_CHECKING:
+    from .base import Claims
+
+
+class PolicyEventListener(threading.Thread):
+    """Long-poll `/meta/policy_events` and evict affected `Claims` cache entries.
+
+    The listener keeps its cursor across reconnects, so events published while
+    the auth server was unreachable are replayed on the next successful poll.
+    """
+
+    _MAX_BACKOFF_SEC = 30.0
+
+    def __init__(self, claims_cls: type[Claims], url: str, *, wait_sec: float = 25.0) -> None:
+        super().__init__(name="zen_auth-policy-listener", daemon=True)
+        self._claims_cls = claims_cls
+        self._url = url
+        self._wait_sec = wait_sec
+        self._stop_event = threading.Event()
+        self.cursor: int | None = None
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def poll_once(self) -> PolicyEventsDTO:
+        """Fetch one page of events and apply it to the claims caches."""
+
+        res = self._claims_cls._GET(
+            self._url,
+            params={"cursor": self.cursor, "wait": self._wait_sec},
+            timeout=self._wait_sec + 5.0,
+        )
+        if res.status_code != 200:
+            raise RuntimeError(f"policy_events returned {res.status_code}")
+        page = PolicyEventsDTO.model_validate(res.json()["data"])
+        self._claims_cls.apply_policy_events(page)
+        self.cursor = page.cursor
+        return page
+
+    def run(self) -> None:
+        backoff = 1.0
+        while not self._stop_event.is_set():
+            try:
+                self.poll_once()
+                backoff = 1.0
+            except Exception as e:
+                LOGGER.warning("Policy event poll failed (retry in %.0fs): %s", backoff, e)
+                self._stop_event.wait(backoff)
+                backoff = min(backoff * 2, self._MAX_BACKOFF_SEC)
@@ -1,4 +1,5 @@
 from .claims import VerifyTokenDTO
+from .policy import PolicyEventDTO, PolicyEventKind, PolicyEventsDTO
 from .role import RoleDTO, RoleDTOForCreate, RoleDTOForUpdate
 from .scope import ScopeDTO, ScopeDTOForCreate, ScopeDTOForUpdate
 from .user import UserDTO, UserDTOForCreate, UserDTOForUpdate, UserOperationProtocol
@@ -18,4 +19,8 @@ __all__ = [
     "ScopeDTOForUpdate",
     # Claims
     "VerifyTokenDTO",
+    # Policy events
+    "PolicyEventKind",
+    "PolicyEventDTO",
+    "PolicyEventsDTO",
 ]
@@ -0,0 +1,43 @@
+"""Policy-change event DTOs."""
+
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+PolicyEventKind = Literal[
+    "user_epoch",
+    "user_deleted",
+    "role_scopes",
+    "role_deleted",
+    "scope_roles",
+    "scope_deleted",
+]
+
+
+class PolicyEventDTO(BaseModel):
+    """A single policy change (user epoch bump, role/scope binding edit or delete)."""
+
+    id: int
+    kind: PolicyEventKind
+    subject: str
+    policy_epoch: int | None = None
+    created_at: str | None = None
+
+    def __str__(self) -> str:
+        return f"#<PolicyEvent {self.id}: {self.kind} {self.subject}>"
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class PolicyEventsDTO(BaseModel):
+    """A page of policy events after a cursor.
+
+    `cursor` is the id of the last event the client has seen after applying
+    `events`. `reset` tells the client its cursor is unknown to the server
+    (e.g. the DB was recreated) and every cached decision must be dropped.
+    """
+
+    cursor: int
+    reset: bool = False
+    events: list[PolicyEventDTO] = Field(default_factory=list)
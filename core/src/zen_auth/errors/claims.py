@@ -50,7 +50,9 @@ class ClaimValidationError(ClaimError):
 class ClaimSourceError(ClaimError):
     """Errors contacting/parsing external auth sources.
 
-    `code` can be one of: "timeout", "connection", "invalid_data", "internal".
+    `code` can be one of: "timeout", "connection", "invalid_data", "internal",
+    "overloaded" (503, request shed) or "rate_limited" (429); for the last two
+    `info["retry_after"]` holds the server's `Retry-After` seconds.
     """
 
     code: str | None
@@ -1,4 +1,24 @@
 from .formatter import AuditFormatter
-from .logger import AUDIT_LOGGER, LOGGER
+from .logger import (
+    AUDIT_LOGGER,
+    LOGGER,
+    admit_audit_success,
+    audit_log_stats,
+    configure_audit_logging,
+    flush_audit_log,
+)
+from .pipeline import AuditQueueHandler
+from .settings import ZENAUTH_AUDIT_CONFIG, ZenAuthAuditConfig
 
-__all__ = ["LOGGER", "AUDIT_LOGGER", "AuditFormatter"]
+__all__ = [
+    "LOGGER",
+    "AUDIT_LOGGER",
+    "AuditFormatter",
+    "AuditQueueHandler",
+    "ZENAUTH_AUDIT_CONFIG",
+    "ZenAuthAuditConfig",
+    "admit_audit_success",
+    "audit_log_stats",
+    "configure_audit_logging",
+    "flush_audit_log",
+]
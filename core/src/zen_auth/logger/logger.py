@@ -1,12 +1,90 @@
-from logging import StreamHandler, getLogger
+from logging import Handler, StreamHandler, getLogger
 
 from .formatter import AuditFormatter
+from .pipeline import AuditQueueHandler
+from .sampling import SuccessAuditSampler, audit_action, parse_policies
+from .settings import ZENAUTH_AUDIT_CONFIG
 
 LOGGER = getLogger("zen_auth")
 AUDIT_LOGGER = getLogger("zen_auth.audit")
 
-handler = StreamHandler()
-handler.setFormatter(AuditFormatter())
-AUDIT_LOGGER.addHandler(handler)
+_audit_handler: Handler | None = None
+_success_sampler: SuccessAuditSampler | None = None
+
+
+def configure_audit_logging(*, background_by_default: bool = False) -> Handler:
+    """(Re)install the audit handler from `ZENAUTH_AUDIT_*` settings.
+
+    With `ZENAUTH_AUDIT_BACKGROUND=true` (or unset and `background_by_default`,
+    as the server's lifespan does) records go through `AuditQueueHandler`, so
+    the caller only pays for an enqueue; the queue is bounded and may drop
+    records. Otherwise they are formatted and written to stderr synchronously,
+    which is what importing the library installs.
+
+    Queued records are also flushed at interpreter exit by `logging.shutdown()`.
+    """
+
+    global _audit_handler, _success_sampler
+
+    cfg = ZENAUTH_AUDIT_CONFIG()
+    handler: Handler
+    if cfg.background if cfg.background is not None else background_by_default:
+        handler = AuditQueueHandler.from_config(cfg)
+    else:
+        handler = StreamHandler()
+        handler.setFormatter(AuditFormatter())
+
+    previous = _audit_handler
+    AUDIT_LOGGER.addHandler(handler)
+    _audit_handler = handler
+    if previous is not None:
+        AUDIT_LOGGER.removeHandler(previous)
+        previous.close()
+
+    policies = parse_policies(cfg.success_policies)
+    previous_sampler = _success_sampler
+    _success_sampler = (
+        SuccessAuditSampler(policies, AUDIT_LOGGER, interval_sec=cfg.aggregate_interval_sec)
+        if policies
+        else None
+    )
+    if previous_sampler is not None:
+        previous_sampler.close()
+    return handler
+
+
+def admit_audit_success(user_name: str, required_context: object, action: str | None = None) -> bool:
+    """Apply the per-action success policy; False means "counted or sampled out, don't write"."""
+
+    sampler = _success_sampler
+    if sampler is None:
+        return True
+    return sampler.admit(action or audit_action(required_context), user_name, required_context)
+
+
+def flush_audit_log(timeout: float = 5.0) -> bool:
+    """Write pending aggregates, then block until queued audit records are written.
+
+    Returns False if the writer did not catch up within `timeout`.
+    """
+
+    if _success_sampler is not None:
+        _success_sampler.flush()
+    handler = _audit_handler
+    if isinstance(handler, AuditQueueHandler):
+        return handler.drain(timeout)
+    if handler is not None:
+        handler.flush()
+    return True
+
+
+def audit_log_stats() -> dict[str, int]:
+    """Counters of the background audit pipeline (empty when running synchronously)."""
+
+    handler = _audit_handler
+    return handler.stats() if isinstance(handler, AuditQueueHandler) else {}
+
+
+configure_audit_logging()
 AUDIT_LOGGER.setLevel("INFO")
 AUDIT_LOGGER.propagate = False
@@ -0,0 +1,274 @@
+"""Queue-based audit log pipeline.
+
+`AuditQueueHandler.emit()` runs on the request thread and only snapshots the
+record into a small dict and enqueues it. A background writer thread drains
+the queue in batches, formats each event as a JSON line and writes the batch
+to a sink (stderr/stdout, a file, or a local datagram socket).
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import socket
+import sys
+import threading
+from typing import Protocol, TextIO
+
+from .formatter import AuditEvent, audit_event, format_event
+from .settings import OverflowPolicy, ZenAuthAuditConfig
+
+LOGGER = logging.getLogger("zen_auth")
+
+
+class AuditSink(Protocol):
+    def write_batch(self, lines: list[str]) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class StreamSink:
+    def __init__(self, stream: TextIO) -> None:
+        self.stream = stream
+
+    def write_batch(self, lines: list[str]) -> None:
+        self.stream.write("\n".join(lines) + "\n")
+        self.stream.flush()
+
+    def close(self) -> None:
+        self.stream.flush()
+
+
+class FileSink:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._fp = open(path, "a", encoding="utf-8")
+
+    def write_batch(self, lines: list[str]) -> None:
+        self._fp.write("\n".join(lines) + "\n")
+        self._fp.flush()
+
+    def close(self) -> None:
+        self._fp.close()
+
+
+class UnixDatagramSink:
+    """Send one datagram per event to a local socket (e.g. a log shipper)."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+
+    def write_batch(self, lines: list[str]) -> None:
+        for line in lines:
+            self._sock.sendto(line.encode("utf-8"), self.path)
+
+    def close(self) -> None:
+        self._sock.close()
+
+
+def open_sink(spec: str) -> AuditSink:
+    """Create a sink from `ZENAUTH_AUDIT_SINK` (`stderr`, `stdout`, `file:<path>`, `unix:<path>`)."""
+
+    kind, _, target = spec.partition(":")
+    kind = kind.strip().lower()
+    if kind == "stderr":
+        return StreamSink(sys.stderr)
+    if kind == "stdout":
+        return StreamSink(sys.stdout)
+    if kind == "file" and target:
+        return FileSink(target)
+    if kind == "unix" and target:
+        return UnixDatagramSink(target)
+    raise ValueError(f"Unsupported audit sink: {spec!r}")
+
+
+class _FlushMarker:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+
+
+class AuditQueueHandler(logging.Handler):
+    """Bounded, non-blocking audit handler with a batching writer thread.
+
+    When the queue is full, `overflow` decides what happens:
+
+    - `drop_new`: discard the new record
+    - `drop_oldest`: discard the oldest queued record to make room
+    - `block`: wait up to `block_timeout_sec`, then discard the new record
+
+    Discarded records are counted in `stats()["dropped"]`.
+    """
+
+    def __init__(
+        self,
+        sink: AuditSink,
+        *,
+        queue_size: int = 10000,
+        overflow: OverflowPolicy = "drop_new",
+        block_timeout_sec: float = 0.05,
+        batch_size: int = 256,
+    ) -> None:
+        super().__init__()
+        self.sink = sink
+        self.overflow = overflow
+        self.block_timeout_sec = block_timeout_sec
+        self.batch_size = max(1, batch_size)
+        self._queue: queue.Queue[AuditEvent | _FlushMarker | None] = queue.Queue(maxsize=max(1, queue_size))
+        self._counter_lock = threading.Lock()
+        self._enqueued = 0
+        self._written = 0
+        self._dropped = 0
+        self._write_errors = 0
+        self._writer: threading.Thread | None = None
+        self._writer_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cfg: ZenAuthAuditConfig) -> AuditQueueHandler:
+        return cls(
+            open_sink(cfg.sink),
+            queue_size=cfg.queue_size,
+            overflow=cfg.overflow,
+            block_timeout_sec=cfg.block_timeout_sec,
+            batch_size=cfg.batch_size,
+        )
+
+    def stats(self) -> dict[str, int]:
+        with self._counter_lock:
+            return {
+                "enqueued": self._enqueued,
+                "written": self._written,
+                "dropped": self._dropped,
+                "write_errors": self._write_errors,
+                "queue_depth": self._queue.qsize(),
+            }
+
+    def _count(self, field: str, n: int = 1) -> None:
+        with self._counter_lock:
+            setattr(self, field, getattr(self, field) + n)
+
+    def _ensure_writer(self) -> None:
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._run, name="zen_auth-audit-writer", daemon=True)
+                self._writer.start()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            event = audit_event(record)
+        except Exception:
+            self.handleError(record)
+            return
+
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            if not self._enqueue_on_overflow(event):
+                self._count("_dropped")
+                return
+        self._count("_enqueued")
+
+    def _enqueue_on_overflow(self, event: AuditEvent) -> bool:
+        if self.overflow == "block":
+            try:
+                self._queue.put(event, timeout=self.block_timeout_sec)
+                return True
+            except queue.Full:
+                return False
+        if self.overflow == "drop_oldest":
+            try:
+                oldest = self._queue.get_nowait()
+            except queue.Empty:
+                oldest = None
+            if isinstance(oldest, _FlushMarker):
+                oldest.done.set()
+            elif oldest is not None:
+                self._count("_dropped")
+            try:
+                self._queue.put_nowait(event)
+                return True
+            except queue.Full:
+                return False
+        return False
+
+    def flush(self) -> None:
+        self.drain()
+
+    def drain(self, timeout: float | None = 5.0) -> bool:
+        """Wait until everything enqueued so far has been written.
+
+        Returns False if the writer did not catch up within `timeout`.
+        """
+
+        if self._writer is None or not self._writer.is_alive():
+            return self._queue.empty()
+        marker = _FlushMarker()
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.done.wait(timeout)
+
+    def close(self) -> None:
+        self.flush()
+        writer = self._writer
+        if writer is not None and writer.is_alive():
+            try:
+                self._queue.put(None, timeout=5.0)
+                writer.join(timeout=5.0)
+            except queue.Full:
+                pass
+        try:
+            self.sink.close()
+        except Exception:
+            pass
+        super().close()
+
+    def _run(self) -> None:
+        while True:
+            # Batches are whatever accumulated while the previous one was
+            # being written, so a busy server writes fewer, larger chunks.
+            item = self._queue.get()
+
+            batch: list[AuditEvent] = []
+            markers: list[_FlushMarker] = []
+            stop = False
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, _FlushMarker):
+                    markers.append(item)
+                else:
+                    batch.append(item)
+                if stop or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._write(batch)
+            for marker in markers:
+                marker.done.set()
+            if stop:
+                return
+
+    def _write(self, batch: list[AuditEvent]) -> None:
+        lines: list[str] = []
+        for event in batch:
+            try:
+                lines.append(format_event(event))
+            except Exception:
+                self._count("_write_errors")
+        if not lines:
+            return
+        try:
+            self.sink.write_batch(lines)
+            self._count("_written", len(lines))
+        except Exception as e:
+            self._count("_write_errors", len(lines))
+            LOGGER.warning("Audit sink write failed (%d records lost): %s", len(lines), e)
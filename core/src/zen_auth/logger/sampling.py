@@ -0,0 +1,190 @@
+"""Per-action sampling and aggregation of successful audit events.
+
+Policies are configured with `ZENAUTH_AUDIT_SUCCESS_POLICIES`, a comma-separated
+list of `<action>=<mode>` entries, where `<action>` is the audit action
+(e.g. `verify_user_role`) or `*` for the high-volume access checks in
+`WILDCARD_ACTIONS`, and `<mode>` is one of:
+
+- `log`: write every success (the default)
+- `sample:<rate>`: write a random fraction of successes (0.0 - 1.0)
+- `aggregate`: write one record per (user, action, required set) every
+  `ZENAUTH_AUDIT_AGGREGATE_INTERVAL_SEC` seconds, with a `count`
+- `aggregate+sample:<rate>`: both
+
+Failures are never sampled or aggregated, and neither are admin changes and
+exports (`ALWAYS_LOGGED`): a policy naming one of those is rejected.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable
+
+# (user_name, action, required roles/scopes)
+AggregateKey = tuple[str, str, tuple[str, ...]]
+
+_REQUIRED_KEYS = ("role_name", "required_roles", "scope_name", "required_scopes", "roles", "scopes")
+
+# Actions a `*` policy applies to: token/credential/permission checks by
+# apps, including the client-side `role_or_scope` check.
+WILDCARD_ACTIONS = frozenset(
+    {
+        "verify_token",
+        "verify_user",
+        "verify_user_role",
+        "verify_user_scope",
+        "verify_user_role_or_scope",
+        "role_or_scope",
+    }
+)
+
+# Admin create/update/delete, exports and access reviews.
+ALWAYS_LOGGED = frozenset({"create", "update", "delete", "export", "access_review"})
+
+
+@dataclass(frozen=True)
+class AuditPolicy:
+    sample_rate: float = 1.0
+    aggregate: bool = False
+
+
+def parse_policies(spec: str) -> dict[str, AuditPolicy]:
+    policies: dict[str, AuditPolicy] = {}
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        action, sep, modes = entry.partition("=")
+        if not sep or not action.strip():
+            raise ValueError(f"Invalid audit policy entry: {entry!r}")
+        if action.strip() in ALWAYS_LOGGED:
+            raise ValueError(f"Audit action {action.strip()!r} is always logged in full: {entry!r}")
+
+        sample_rate: float | None = None
+        aggregate = False
+        for mode in modes.split("+"):
+            mode = mode.strip().lower()
+            if mode == "aggregate":
+                aggregate = True
+            elif mode.startswith("sample:"):
+                sample_rate = float(mode.removeprefix("sample:"))
+                if not 0.0 <= sample_rate <= 1.0:
+                    raise ValueError(f"Audit sample rate must be within [0, 1]: {entry!r}")
+            elif mode != "log":
+                raise ValueError(f"Unknown audit policy mode {mode!r} in {entry!r}")
+        if sample_rate is None:
+            # Plain `aggregate` replaces the individual records.
+            sample_rate = 0.0 if aggregate else 1.0
+        policies[action.strip()] = AuditPolicy(sample_rate=sample_rate, aggregate=aggregate)
+    return policies
+
+
+def audit_action(required_context: object) -> str:
+    if isinstance(required_context, dict):
+        return str(required_context.get("action", "--"))
+    return "--"
+
+
+def required_set(required_context: object) -> tuple[str, ...]:
+    """Flatten the roles/scopes a check asked for into a sorted key."""
+
+    values: list[str] = []
+    if isinstance(required_context, dict):
+        for key in _REQUIRED_KEYS:
+            value = required_context.get(key)
+            if isinstance(value, str):
+                values.append(f"{key}:{value}")
+            elif isinstance(value, Iterable):
+                values.extend(f"{key}:{v}" for v in value)
+    elif isinstance(required_context, Iterable) and not isinstance(required_context, str):
+        values.extend(str(v) for v in required_context)
+    elif required_context is not None:
+        values.append(str(required_context))
+    return tuple(sorted(values))
+
+
+class SuccessAuditSampler:
+    """Decide whether a success event is written, and count aggregated ones.
+
+    Aggregated counts are written to `logger` by a daemon thread every
+    `interval_sec` seconds, and on `flush()`.
+    """
+
+    def __init__(
+        self,
+        policies: dict[str, AuditPolicy],
+        logger: logging.Logger,
+        *,
+        interval_sec: float = 60.0,
+    ) -> None:
+        self.policies = policies
+        self.logger = logger
+        self.interval_sec = interval_sec
+        self._default = policies.get("*")
+        self._lock = threading.Lock()
+        self._counts: dict[AggregateKey, int] = {}
+        self._window_start = time.time()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def admit(self, action: str, user_name: str, required_context: object) -> bool:
+        """Return True if the success event should be written in full."""
+
+        policy = self.policies.get(action)
+        if policy is None and action in WILDCARD_ACTIONS:
+            policy = self._default
+        if policy is None:
+            return True
+
+        if policy.aggregate:
+            key = (user_name, action, required_set(required_context))
+            with self._lock:
+                self._counts[key] = self._counts.get(key, 0) + 1
+            self._ensure_thread()
+
+        rate = policy.sample_rate
+        return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="zen_auth-audit-aggregate", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_sec):
+            self.flush()
+
+    def flush(self) -> int:
+        """Write and reset the aggregated counts; returns the number of records written."""
+
+        now = time.time()
+        with self._lock:
+            counts, self._counts = self._counts, {}
+            window_sec = round(now - self._window_start, 3)
+            self._window_start = now
+
+        for (user_name, action, required), count in counts.items():
+            self.logger.info(
+                "audit aggregate",
+                extra={
+                    "user_name": user_name,
+                    "result": "success",
+                    "required_context": {"action": action, "required": list(required)},
+                    "count": count,
+                    "window_sec": window_sec,
+                },
+            )
+        return len(counts)
+
+    def close(self) -> None:
+        self._stop.set()
+        self.flush()
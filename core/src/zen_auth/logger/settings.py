@@ -0,0 +1,43 @@
+"""Audit log pipeline settings loaded from environment variables."""
+
+from functools import lru_cache
+from typing import ClassVar, Literal
+
+from pydantic_settings import BaseSettings
+
+OverflowPolicy = Literal["drop_new", "drop_oldest", "block"]
+
+
+class ZenAuthAuditConfig(BaseSettings):
+    """Audit logging settings (env vars prefixed with `ZENAUTH_AUDIT_`).
+
+    Read once per process; call `ZENAUTH_AUDIT_CONFIG.cache_clear()` and
+    `configure_audit_logging()` to apply changes at runtime.
+    """
+
+    _ENV_PREFIX: ClassVar[str] = "ZENAUTH_AUDIT_"
+
+    model_config = dict(env_prefix=_ENV_PREFIX, env_file=".env", extra="ignore")
+
+    include_token_timestamps: bool = False
+
+    # Queue records for a background writer thread. When false, records are
+    # formatted and written on the calling thread. Unset: synchronous for
+    # library users, queued in the server (see `configure_audit_logging`).
+    background: bool | None = None
+    # `stderr`, `stdout`, `file:<path>` or `unix:<path>` (datagram socket).
+    sink: str = "stderr"
+    queue_size: int = 10000
+    overflow: OverflowPolicy = "drop_new"
+    # Max time a request may wait for queue space with `overflow=block`.
+    block_timeout_sec: float = 0.05
+    batch_size: int = 256
+
+    # Per-action handling of success events, see `zen_auth.logger.sampling`.
+    success_policies: str = ""
+    aggregate_interval_sec: float = 60.0
+
+
+@lru_cache
+def ZENAUTH_AUDIT_CONFIG() -> ZenAuthAuditConfig:
+    return ZenAuthAuditConfig()
@@ -0,0 +1,23 @@
+from .phases import (
+    Phases,
+    TimingStats,
+    current_phases,
+    parse_server_timing,
+    phase,
+    record_phase,
+    server_timing_header,
+    start_timing,
+    stop_timing,
+)
+
+__all__ = [
+    "Phases",
+    "TimingStats",
+    "current_phases",
+    "parse_server_timing",
+    "phase",
+    "record_phase",
+    "server_timing_header",
+    "start_timing",
+    "stop_timing",
+]
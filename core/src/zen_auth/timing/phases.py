@@ -0,0 +1,116 @@
+"""Per-request phase timings and the `Server-Timing` header.
+
+The server opens a timing scope per request (`start_timing`); code on the
+request path wraps its phases in `phase(name)`. Durations of the same phase
+add up (e.g. two JWT decodes on a refresh). Outside a scope `phase` costs a
+single context variable lookup.
+
+The scope is a dict stored in a `ContextVar`: sync dependencies run on the
+threadpool with a copy of the request context, which still refers to the same
+dict, so their phases are visible to the middleware.
+"""
+
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from time import perf_counter
+from typing import Iterator
+
+# phase name -> accumulated milliseconds
+Phases = dict[str, float]
+
+_PHASES: ContextVar[Phases | None] = ContextVar("zen_auth_timing_phases", default=None)
+
+
+def start_timing() -> Token[Phases | None]:
+    """Open a timing scope for the current request."""
+
+    return _PHASES.set({})
+
+
+def stop_timing(token: Token[Phases | None]) -> None:
+    _PHASES.reset(token)
+
+
+def current_phases() -> Phases | None:
+    return _PHASES.get()
+
+
+def record_phase(name: str, duration_ms: float) -> None:
+    phases = _PHASES.get()
+    if phases is not None:
+        phases[name] = phases.get(name, 0.0) + duration_ms
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Add the duration of the block to phase `name` of the current scope."""
+
+    phases = _PHASES.get()
+    if phases is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = phases.get(name, 0.0) + (perf_counter() - start) * 1000.0
+
+
+def server_timing_header(phases: Phases) -> str:
+    """Format phases as a `Server-Timing` header value (`name;dur=ms, ...`)."""
+
+    return ", ".join(f"{name};dur={ms:.2f}" for name, ms in phases.items())
+
+
+def parse_server_timing(value: str) -> Phases:
+    """Parse a `Server-Timing` header value; metrics without `dur` are skipped."""
+
+    out: Phases = {}
+    for metric in value.split(","):
+        name, *params = (p.strip() for p in metric.split(";"))
+        for param in params:
+            key, _, raw = param.partition("=")
+            if key.strip().lower() != "dur" or not name:
+                continue
+            try:
+                out[name] = out.get(name, 0.0) + float(raw.strip().strip('"'))
+            except ValueError:
+                pass
+    return out
+
+
+class TimingStats:
+    """Thread-safe count/total/max of phase durations per endpoint."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # endpoint -> phase -> [count, total_ms, max_ms]
+        self._values: dict[str, dict[str, list[float]]] = {}
+
+    def record(self, endpoint: str, phases: Phases) -> None:
+        with self._lock:
+            per_endpoint = self._values.setdefault(endpoint, {})
+            for name, ms in phases.items():
+                entry = per_endpoint.get(name)
+                if entry is None:
+                    per_endpoint[name] = [1, ms, ms]
+                else:
+                    entry[0] += 1
+                    entry[1] += ms
+                    entry[2] = max(entry[2], ms)
+
+    def snapshot(self) -> dict[str, dict[str, dict[str, float]]]:
+        with self._lock:
+            return {
+                endpoint: {
+                    name: {"count": int(e[0]), "total_ms": e[1], "max_ms": e[2]} for name, e in phases.items()
+                }
+                for endpoint, phases in self._values.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
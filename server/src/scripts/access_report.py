@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+
+def _bootstrap_sys_path() -> None:
+    """Allow running this file directly without installing packages."""
+
+    repo_root = Path(__file__).resolve().parents[3]
+    for p in (repo_root / "core" / "src", repo_root / "server" / "src"):
+        p_str = str(p)
+        if p_str not in sys.path:
+            sys.path.insert(0, p_str)
+
+
+_bootstrap_sys_path()
+
+from zen_auth.server.persistence.session import (  # noqa: E402
+    create_engine_from_dsn,
+    create_sessionmaker,
+    session_scope,
+)
+from zen_auth.server.usecases.access_matrix import AccessMatrix  # noqa: E402
+
+
+def load_matrix(dsn: str, *, batch_size: int = 10000) -> AccessMatrix:
+    engine = create_engine_from_dsn(dsn)
+    with session_scope(create_sessionmaker(engine)) as session:
+        matrix = AccessMatrix.build(session, batch_size=batch_size)
+    engine.dispose()
+    return matrix
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="Effective user -> scope permissions for access reviews")
+    p.add_argument(
+        "--dsn", required=True, help="SQLAlchemy DSN (e.g. sqlite+pysqlite:////path/to/db.sqlite3)"
+    )
+    p.add_argument("--scope", action="append", help="Print the users holding this scope (repeatable)")
+    p.add_argument("--user", action="append", help="Print the effective scopes of this user (repeatable)")
+    p.add_argument("--counts", action="store_true", help="Print the number of users holding each scope")
+    p.add_argument("--out", type=Path, help="Write the full user_name,scope_name,roles CSV report here")
+    p.add_argument("--batch-size", type=int, default=10000, help="Grant rows fetched per round trip")
+    args = p.parse_args(argv)
+
+    start = time.perf_counter()
+    matrix = load_matrix(args.dsn, batch_size=args.batch_size)
+    print(
+        f"Loaded {len(matrix.users)} users, {len(matrix.role_masks)} roles, {len(matrix.scopes)} scopes "
+        f"({len(matrix.set_roles)} distinct role sets) in {time.perf_counter() - start:.1f}s",
+        file=sys.stderr,
+    )
+
+    for scope in args.scope or []:
+        print(f"# {scope} (roles: {','.join(matrix.roles_with(scope))})")
+        for name in matrix.users_with(scope):
+            print(name)
+    for user in args.user or []:
+        print(f"# {user}")
+        for scope in matrix.scopes_of(user):
+            print(scope)
+    if args.counts:
+        for scope, n in matrix.scope_counts().items():
+            print(f"{scope}\t{n}")
+    if args.out:
+        with args.out.open("w", encoding="utf-8", newline="") as f:
+            f.writelines(matrix.report_lines())
+        print(f"Wrote {args.out} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
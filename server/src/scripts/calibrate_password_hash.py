@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+
+def _bootstrap_sys_path() -> None:
+    """Allow running this file directly without installing packages."""
+
+    repo_root = Path(__file__).resolve().parents[3]
+    for p in (repo_root / "core" / "src", repo_root / "server" / "src"):
+        p_str = str(p)
+        if p_str not in sys.path:
+            sys.path.insert(0, p_str)
+
+
+_bootstrap_sys_path()
+
+from passlib.context import CryptContext  # noqa: E402
+from passlib.registry import get_crypt_handler  # noqa: E402
+from zen_auth.server.usecases.passwords import context_options  # noqa: E402
+
+# Candidate costs per scheme, cheapest first.
+CANDIDATES: dict[str, list[dict[str, int]]] = {
+    "bcrypt": [{"rounds": r} for r in range(10, 16)],
+    "scrypt": [{"rounds": r} for r in range(14, 19)],
+    "argon2": [{"rounds": t, "memory_cost": 65536, "parallelism": 2} for t in range(1, 7)],
+}
+
+# ZenAuthServerConfig env var per (scheme, passlib option).
+ENV_NAMES: dict[tuple[str, str], str] = {
+    ("bcrypt", "rounds"): "ZENAUTH_SERVER_PASSWORD_BCRYPT_ROUNDS",
+    ("scrypt", "rounds"): "ZENAUTH_SERVER_PASSWORD_SCRYPT_ROUNDS",
+    ("argon2", "rounds"): "ZENAUTH_SERVER_PASSWORD_ARGON2_TIME_COST",
+    ("argon2", "memory_cost"): "ZENAUTH_SERVER_PASSWORD_ARGON2_MEMORY_COST",
+    ("argon2", "parallelism"): "ZENAUTH_SERVER_PASSWORD_ARGON2_PARALLELISM",
+}
+
+
+@dataclass(frozen=True)
+class Measurement:
+    scheme: str
+    params: dict[str, int]
+    p50_ms: float
+    p95_ms: float
+    max_ms: float
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    idx = max(0, math.ceil(pct / 100.0 * len(ordered)) - 1)
+    return ordered[idx]
+
+
+def scheme_available(scheme: str) -> bool:
+    try:
+        handler = get_crypt_handler(scheme)
+    except KeyError:
+        return False
+    has_backend = getattr(handler, "has_backend", None)
+    return bool(has_backend()) if callable(has_backend) else True
+
+
+def measure(scheme: str, params: dict[str, int], *, samples: int, concurrency: int) -> Measurement:
+    """Time `samples` verifications, `concurrency` at a time (like concurrent logins)."""
+
+    ctx = CryptContext(**context_options([scheme], {scheme: params}))
+    hashed = ctx.hash("calibration-password")
+
+    def one(_: int) -> float:
+        start = time.perf_counter()
+        ctx.verify("calibration-password", hashed)
+        return (time.perf_counter() - start) * 1000.0
+
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        timings = list(ex.map(one, range(samples)))
+    return Measurement(
+        scheme=scheme,
+        params=params,
+        p50_ms=round(_percentile(timings, 50), 2),
+        p95_ms=round(_percentile(timings, 95), 2),
+        max_ms=round(max(timings), 2),
+    )
+
+
+def calibrate(
+    schemes: list[str], *, target_p95_ms: float, samples: int, concurrency: int
+) -> tuple[list[Measurement], dict[str, Measurement]]:
+    """Measure candidates and pick, per scheme, the highest cost within the target.
+
+    Larger costs of a scheme are skipped once one exceeds twice the target.
+    """
+
+    results: list[Measurement] = []
+    best: dict[str, Measurement] = {}
+    for scheme in schemes:
+        if not scheme_available(scheme):
+            print(f"skip {scheme}: no backend installed", file=sys.stderr)
+            continue
+        for params in CANDIDATES[scheme]:
+            m = measure(scheme, params, samples=samples, concurrency=concurrency)
+            results.append(m)
+            print(f"{scheme:>7} {params}: p50={m.p50_ms:.1f}ms p95={m.p95_ms:.1f}ms", file=sys.stderr)
+            if m.p95_ms <= target_p95_ms:
+                best[scheme] = m
+            elif m.p95_ms > target_p95_ms * 2:
+                break
+    return results, best
+
+
+def env_lines(choice: Measurement, schemes: list[str]) -> list[str]:
+    # Keep the other schemes verifiable so existing hashes migrate on login.
+    ordered = [choice.scheme] + [s for s in schemes if s != choice.scheme]
+    lines = [f"ZENAUTH_SERVER_PASSWORD_SCHEMES={','.join(ordered)}"]
+    for key, value in choice.params.items():
+        lines.append(f"{ENV_NAMES[(choice.scheme, key)]}={value}")
+    return lines
+
+
+def _parse_args(argv: list[str]) -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        description="Benchmark password hash schemes/costs on this host and recommend settings"
+    )
+    p.add_argument("--target-p95-ms", type=float, default=250.0, help="Login hash latency budget (p95)")
+    p.add_argument(
+        "--schemes",
+        default="argon2,scrypt,bcrypt",
+        help="Comma-separated candidate schemes in order of preference",
+    )
+    p.add_argument("--samples", type=int, default=10, help="Verifications per candidate")
+    p.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Parallel verifications (set to the expected concurrent logins per host)",
+    )
+    p.add_argument("--json", action="store_true", help="Print all measurements as JSON")
+    return p.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv or sys.argv[1:])
+    schemes = [s.strip() for s in args.schemes.split(",") if s.strip()]
+    unknown = [s for s in schemes if s not in CANDIDATES]
+    if unknown:
+        raise SystemExit(f"Unsupported schemes: {unknown} (choose from {sorted(CANDIDATES)})")
+
+    results, best = calibrate(
+        schemes, target_p95_ms=args.target_p95_ms, samples=args.samples, concurrency=args.concurrency
+    )
+    choice = next((best[s] for s in schemes if s in best), None)
+
+    if args.json:
+        print(
+            json.dumps(
+                {
+                    "target_p95_ms": args.target_p95_ms,
+                    "concurrency": args.concurrency,
+                    "measurements": [asdict(m) for m in results],
+                    "recommended": asdict(choice) if choice else None,
+                    "env": env_lines(choice, schemes) if choice else [],
+                },
+                indent=2,
+            )
+        )
+    elif choice is None:
+        print(f"No candidate meets p95 <= {args.target_p95_ms}ms; raise the budget or add capacity.")
+    else:
+        print(f"Recommended ({choice.scheme}, p95={choice.p95_ms}ms):")
+        for line in env_lines(choice, schemes):
+            print(line)
+    return 0 if choice is not None else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import argparse
+import itertools
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Iterator
+
+
+def _bootstrap_sys_path() -> None:
+    """Allow running this file directly without installing packages."""
+
+    repo_root = Path(__file__).resolve().parents[3]
+    for p in (repo_root / "core" / "src", repo_root / "server" / "src"):
+        p_str = str(p)
+        if p_str not in sys.path:
+            sys.path.insert(0, p_str)
+
+
+_bootstrap_sys_path()
+
+from sqlalchemy import func, insert, select  # noqa: E402
+from sqlalchemy.engine import Connection  # noqa: E402
+from sqlalchemy.sql import FromClause  # noqa: E402
+from zen_auth.server.persistence.init_db import init_db  # noqa: E402
+from zen_auth.server.persistence.models import (  # noqa: E402
+    RoleOrm,
+    ScopeOrm,
+    UserOrm,
+    role_scopes,
+    user_roles,
+)
+from zen_auth.server.persistence.session import create_engine_from_dsn  # noqa: E402
+from zen_auth.server.usecases.passwords import hash_password  # noqa: E402
+
+_SCOPE_VERBS = ["read", "write", "delete", "admin"]
+_SCOPE_OBJECTS = [
+    "users",
+    "roles",
+    "scopes",
+    "settings",
+    "audit",
+    "billing",
+    "reports",
+    "orders",
+    "inventory",
+    "tickets",
+]
+_DIVISIONS = [
+    "Engineering",
+    "Sales",
+    "Support",
+    "Finance",
+    "HR",
+    "Marketing",
+    "Operations",
+    "Legal",
+    "Research",
+    "Security",
+]
+# Share of users with 1, 2, 3, 4 roles.
+_ROLE_COUNT_WEIGHTS = [0.62, 0.25, 0.09, 0.04]
+
+
+def zipf_weights(n: int, s: float) -> list[float]:
+    """Cumulative weights of ranks 1..n for a Zipf distribution with exponent `s`."""
+
+    return list(itertools.accumulate(1.0 / (rank**s) for rank in range(1, n + 1)))
+
+
+def _sample_distinct(rng: random.Random, names: list[str], cum_weights: list[float], k: int) -> list[str]:
+    k = min(k, len(names))
+    picked: set[str] = set()
+    # Skewed draws repeat the popular names; fall back to uniform after a few tries.
+    for _ in range(k * 4):
+        picked.add(rng.choices(names, cum_weights=cum_weights)[0])
+        if len(picked) == k:
+            return sorted(picked)
+    while len(picked) < k:
+        picked.add(rng.choice(names))
+    return sorted(picked)
+
+
+def scope_names(count: int) -> list[str]:
+    base = [f"{verb}:{obj}" for obj in _SCOPE_OBJECTS for verb in _SCOPE_VERBS]
+    return base[:count] + [f"custom:scope_{i + 1}" for i in range(max(0, count - len(base)))]
+
+
+def role_names(count: int) -> list[str]:
+    return ["admin"] + [f"role_{i + 1:04d}" for i in range(max(0, count - 1))]
+
+
+def role_scope_rows(
+    rng: random.Random, roles: list[str], scopes: list[str], *, skew: float
+) -> list[dict[str, str]]:
+    """`admin` gets every scope; other roles 2..20 scopes, popular scopes first."""
+
+    cum = zipf_weights(len(scopes), skew)
+    rows = [{"role_name": "admin", "scope_name": s} for s in scopes]
+    for role in roles[1:]:
+        k = min(len(scopes), max(2, int(rng.lognormvariate(1.3, 0.6))), 20)
+        rows += [{"role_name": role, "scope_name": s} for s in _sample_distinct(rng, scopes, cum, k)]
+    return rows
+
+
+def user_chunks(
+    rng: random.Random,
+    *,
+    users: int,
+    roles: list[str],
+    password_hashes: list[str],
+    chunk_size: int,
+    skew: float,
+) -> Iterator[tuple[list[dict[str, object]], list[dict[str, str]]]]:
+    """Yield (user rows, user_roles rows) chunks; roles are Zipf distributed, admin is rare."""
+
+    grantable = roles[1:] or roles
+    role_cum = zipf_weights(len(grantable), skew)
+    division_cum = zipf_weights(len(_DIVISIONS), 1.0)
+    width = max(7, len(str(users)))
+    for start in range(0, users, chunk_size):
+        user_rows: list[dict[str, object]] = []
+        role_rows: list[dict[str, str]] = []
+        for i in range(start, min(users, start + chunk_size)):
+            user_name = f"user_{i + 1:0{width}d}"
+            division = rng.choices(_DIVISIONS, cum_weights=division_cum)[0]
+            user_rows.append(
+                {
+                    "user_name": user_name,
+                    "password": password_hashes[i % len(password_hashes)],
+                    "real_name": f"User {i + 1}",
+                    "division": division,
+                    "description": "",
+                    "policy_epoch": 1,
+                }
+            )
+            k = rng.choices((1, 2, 3, 4), weights=_ROLE_COUNT_WEIGHTS)[0]
+            granted = _sample_distinct(rng, grantable, role_cum, k)
+            if rng.random() < 0.001:
+                granted.append("admin")
+            role_rows += [{"user_name": user_name, "role_name": r} for r in granted]
+        yield user_rows, role_rows
+
+
+def _count(conn: Connection, table: FromClause) -> int:
+    return int(conn.execute(select(func.count()).select_from(table)).scalar_one())
+
+
+def generate_dataset(
+    dsn: str,
+    *,
+    users: int,
+    roles: int = 50,
+    scopes: int = 40,
+    seed: int = 42,
+    password: str = "password",
+    password_hash: str | None = None,
+    distinct_hashes: int = 4,
+    chunk_size: int = 10000,
+    skew: float = 1.1,
+    quiet: bool = False,
+) -> dict[str, int]:
+    """Bulk insert a synthetic dataset into an empty DB; return row counts.
+
+    Users, roles and scopes are written with set-based inserts, one
+    transaction per `chunk_size` users. All users share `password`, hashed
+    `distinct_hashes` times up front (or `password_hash` as given), so no
+    hashing happens per user. Names, roles and grants are identical for
+    the same arguments and `seed`; password hashes are too only with
+    `password_hash`, since hashing `password` uses fresh bcrypt salts.
+    """
+
+    engine = create_engine_from_dsn(dsn)
+    init_db(engine)
+    rng = random.Random(seed)
+
+    with engine.connect() as conn:
+        if _count(conn, UserOrm.__table__) or _count(conn, RoleOrm.__table__):
+            raise SystemExit("Target DB already has users or roles; use an empty database")
+
+    hashes = [password_hash] if password_hash else [hash_password(password) for _ in range(distinct_hashes)]
+    role_list = role_names(roles)
+    scope_list = scope_names(scopes)
+
+    with engine.begin() as conn:
+        conn.execute(
+            insert(ScopeOrm),
+            [{"scope_name": s, "display_name": s.replace(":", " ").title()} for s in scope_list],
+        )
+        conn.execute(
+            insert(RoleOrm),
+            [{"role_name": r, "display_name": r.replace("_", " ").title()} for r in role_list],
+        )
+        conn.execute(insert(role_scopes), role_scope_rows(rng, role_list, scope_list, skew=skew))
+
+    start = time.perf_counter()
+    done = 0
+    for user_rows, role_rows in user_chunks(
+        rng, users=users, roles=role_list, password_hashes=hashes, chunk_size=chunk_size, skew=skew
+    ):
+        with engine.begin() as conn:
+            conn.execute(insert(UserOrm), user_rows)
+            conn.execute(insert(user_roles), role_rows)
+        done += len(user_rows)
+        if not quiet:
+            elapsed = time.perf_counter() - start
+            print(f"\rusers {done}/{users} ({done / elapsed if elapsed else 0:,.0f}/s)", end="", flush=True)
+    if not quiet:
+        print()
+
+    with engine.connect() as conn:
+        counts = {
+            "users": _count(conn, UserOrm.__table__),
+            "roles": _count(conn, RoleOrm.__table__),
+            "scopes": _count(conn, ScopeOrm.__table__),
+            "user_roles": _count(conn, user_roles),
+            "role_scopes": _count(conn, role_scopes),
+        }
+    engine.dispose()
+    return counts
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Bulk generate a large synthetic ZenAuth dataset (users/roles/scopes)"
+    )
+    parser.add_argument("--dsn", required=True, help="SQLAlchemy DSN of an empty database")
+    parser.add_argument("--users", type=int, default=100000, help="number of users")
+    parser.add_argument("--roles", type=int, default=50, help="number of roles (including admin)")
+    parser.add_argument("--scopes", type=int, default=40, help="number of scopes")
+    parser.add_argument("--seed", type=int, default=42, help="random seed")
+    parser.add_argument("--password", default="password", help="password of every generated user")
+    parser.add_argument(
+        "--password-hash",
+        help="use this hash as is instead of hashing --password (needed for byte-identical output)",
+    )
+    parser.add_argument("--distinct-hashes", type=int, default=4, help="hashes of --password to cycle")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="users per transaction")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of role/scope popularity")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    counts = generate_dataset(
+        args.dsn,
+        users=args.users,
+        roles=args.roles,
+        scopes=args.scopes,
+        seed=args.seed,
+        password=args.password,
+        password_hash=args.password_hash,
+        distinct_hashes=args.distinct_hashes,
+        chunk_size=args.chunk_size,
+        skew=args.skew,
+    )
+    print(f"Generated: {counts} in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,9 +2,15 @@ from __future__ import annotations
 
 import argparse
 import csv
+import itertools
+import json
+import os
 import sys
-from dataclasses import dataclass
+import time
+from collections import Counter
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, Literal, TypeVar
 
 
 def _bootstrap_sys_path() -> None:
@@ -19,7 +25,8 @@ def _bootstrap_sys_path() -> None:
 
 _bootstrap_sys_path()
 
-from sqlalchemy.orm import Session  # noqa: E402
+import yaml  # noqa: E402
+from sqlalchemy.orm import Session, sessionmaker  # noqa: E402
 from zen_auth.dto import (  # noqa: E402
     RoleDTOForCreate,
     RoleDTOForUpdate,
@@ -42,18 +49,26 @@ from zen_auth.server.persistence.session import (  # noqa: E402
 )
 from zen_auth.server.usecases import (  # noqa: E402
     app_service,
+    bulk_users,
     role_service,
     scope_service,
     user_service,
 )
+from zen_auth.server.usecases.bulk_users import (  # noqa: E402
+    BulkResult,
+    ImportMode,
+    ImportRowError,
+    UserImportRow,
+)
+from zen_auth.server.usecases.passwords import verify_password  # noqa: E402
+
+_T = TypeVar("_T")
 
+# What an input row did to its entity.
+Status = Literal["created", "updated", "unchanged"]
 
-@dataclass(frozen=True)
-class CsvPaths:
-    users: Path | None
-    apps: Path | None
-    roles: Path | None
-    scopes: Path | None
+# Import order: roles/scopes first so later entities can reference them.
+ENTITIES = ("roles", "scopes", "apps", "users")
 
 
 def _split_list(value: str | None) -> list[str]:
@@ -65,20 +80,98 @@ def _split_list(value: str | None) -> list[str]:
     return [x.strip() for x in s.split(",") if x.strip()]
 
 
-def _read_csv_rows(path: Path) -> list[dict[str, str]]:
+def _iter_csv_rows(path: Path) -> Iterator[tuple[int, dict[str, str]]]:
+    """Yield (line number, row) for each non-empty data row."""
+
     with path.open("r", encoding="utf-8", newline="") as f:
         reader = csv.DictReader(f)
         if reader.fieldnames is None:
             raise ValueError(f"CSV has no header: {path}")
-        rows: list[dict[str, str]] = []
         for raw in reader:
             # Normalize: DictReader can return None values
             row: dict[str, str] = {k: (v or "").strip() for k, v in raw.items() if k is not None}
             # Skip fully empty lines
             if not any(row.values()):
                 continue
-            rows.append(row)
-        return rows
+            yield reader.line_num, row
+
+
+def _record_row(line: int, record: object) -> dict[str, str]:
+    """Flatten an NDJSON/YAML record to the string row the CSV reader yields.
+
+    Lists (e.g. `roles: [admin, ops]`) are joined with commas, `null` becomes "".
+    """
+
+    if not isinstance(record, dict):
+        raise ImportRowError(line, f"expected a mapping, got {type(record).__name__}")
+
+    def text(v: object) -> str:
+        if v is None:
+            return ""
+        if isinstance(v, list):
+            return ",".join(text(x) for x in v)
+        return str(v).strip()
+
+    return {str(k): text(v) for k, v in record.items()}
+
+
+def _iter_ndjson_rows(path: Path) -> Iterator[tuple[int, dict[str, str]]]:
+    """Yield (line number, row) for each JSON object line; blank lines are skipped."""
+
+    with path.open("r", encoding="utf-8") as f:
+        for line, text in enumerate(f, start=1):
+            if not text.strip():
+                continue
+            try:
+                record = json.loads(text)
+            except json.JSONDecodeError as e:
+                raise ImportRowError(line, f"invalid JSON: {e.msg}") from e
+            yield line, _record_row(line, record)
+
+
+def _iter_yaml_rows(path: Path) -> Iterator[tuple[int, dict[str, str]]]:
+    """Yield (line number, row) for each mapping of a YAML file.
+
+    The file is a sequence of mappings (or a stream of `---` documents, each a
+    mapping or a sequence of them). Items are composed one at a time from the
+    parser events, so the whole document is never held in memory.
+    """
+
+    with path.open("r", encoding="utf-8") as f:
+        loader = yaml.SafeLoader(f)
+        try:
+            loader.get_event()  # StreamStart
+            while not loader.check_event(yaml.StreamEndEvent):
+                loader.get_event()  # DocumentStart
+                in_sequence = loader.check_event(yaml.SequenceStartEvent)
+                if in_sequence:
+                    loader.get_event()
+                while not loader.check_event(yaml.SequenceEndEvent, yaml.DocumentEndEvent):
+                    line = loader.peek_event().start_mark.line + 1
+                    record = loader.construct_document(loader.compose_node(None, None))
+                    loader.anchors = {}
+                    if record is not None:
+                        yield line, _record_row(line, record)
+                    if not in_sequence:
+                        break
+                if in_sequence:
+                    loader.get_event()  # SequenceEnd
+                loader.get_event()  # DocumentEnd
+        except yaml.YAMLError as e:
+            raise ValueError(f"invalid YAML: {e}") from e
+        finally:
+            loader.dispose()
+
+
+def _iter_rows(path: Path) -> Iterator[tuple[int, dict[str, str]]]:
+    """Stream (line number, row) from a CSV, NDJSON (.ndjson/.jsonl) or YAML (.yaml/.yml) file."""
+
+    suffix = path.suffix.lower()
+    if suffix in (".ndjson", ".jsonl"):
+        return _iter_ndjson_rows(path)
+    if suffix in (".yaml", ".yml"):
+        return _iter_yaml_rows(path)
+    return _iter_csv_rows(path)
 
 
 def _get(row: dict[str, str], key: str) -> str | None:
@@ -89,37 +182,45 @@ def _get(row: dict[str, str], key: str) -> str | None:
     return v if v else None
 
 
-def _upsert_role(session: Session, row: dict[str, str], *, mode: str) -> None:
+def _upsert_role(session: Session, row: dict[str, str], *, mode: str) -> Status:
     role_name = _get(row, "role_name")
     if not role_name:
         raise ValueError("roles.csv: role_name is required")
 
     display_name = _get(row, "display_name") or role_name
     description = _get(row, "description")
+    scopes = _split_list(_get(row, "scopes"))
 
-    exists = session.get(RoleOrm, role_name) is not None
+    obj = session.get(RoleOrm, role_name)
 
-    if mode == "create" and exists:
+    if mode == "create" and obj is not None:
         raise ValueError(f"role already exists: {role_name}")
 
-    if not exists:
+    if obj is None:
         role_service.create_role(
             session,
             RoleDTOForCreate(role_name=role_name, display_name=display_name, description=description),
         )
-    else:
+        if scopes:
+            role_service.set_role_scopes(session, role_name, scopes)
+        return "created"
+
+    # Only touch what differs: set_role_scopes records a policy event.
+    status: Status = "unchanged"
+    if display_name != obj.display_name or (description is not None and description != obj.description):
         role_service.update_role(
             session,
             role_name,
             RoleDTOForUpdate(display_name=display_name, description=description),
         )
-
-    scopes = _split_list(_get(row, "scopes"))
-    if scopes:
+        status = "updated"
+    if scopes and set(scopes) != {s.scope_name for s in obj.scopes}:
         role_service.set_role_scopes(session, role_name, scopes)
+        status = "updated"
+    return status
 
 
-def _upsert_scope(session: Session, row: dict[str, str], *, mode: str) -> None:
+def _upsert_scope(session: Session, row: dict[str, str], *, mode: str) -> Status:
     scope_name = _get(row, "scope_name")
     if not scope_name:
         raise ValueError("scopes.csv: scope_name is required")
@@ -128,12 +229,12 @@ def _upsert_scope(session: Session, row: dict[str, str], *, mode: str) -> None:
     description = _get(row, "description")
     roles = _split_list(_get(row, "roles"))
 
-    exists = session.get(ScopeOrm, scope_name) is not None
+    obj = session.get(ScopeOrm, scope_name)
 
-    if mode == "create" and exists:
+    if mode == "create" and obj is not None:
         raise ValueError(f"scope already exists: {scope_name}")
 
-    if not exists:
+    if obj is None:
         scope_service.create_scope(
             session,
             ScopeDTOForCreate(
@@ -143,19 +244,20 @@ def _upsert_scope(session: Session, row: dict[str, str], *, mode: str) -> None:
                 roles=roles,
             ),
         )
-    else:
-        scope_service.update_scope(
-            session,
-            scope_name,
-            ScopeDTOForUpdate(
-                display_name=display_name,
-                description=description,
-                roles=roles if "roles" in row else None,
-            ),
-        )
+        return "created"
 
+    patch = ScopeDTOForUpdate(
+        display_name=display_name if display_name != obj.display_name else None,
+        description=description if description is not None and description != obj.description else None,
+        roles=roles if "roles" in row and set(roles) != {r.role_name for r in obj.roles} else None,
+    )
+    if not patch.model_dump(exclude_none=True):
+        return "unchanged"
+    scope_service.update_scope(session, scope_name, patch)
+    return "updated"
 
-def _upsert_app(session: Session, row: dict[str, str], *, mode: str) -> None:
+
+def _upsert_app(session: Session, row: dict[str, str], *, mode: str) -> Status:
     app_id = _get(row, "app_id")
     if not app_id:
         raise ValueError("apps.csv: app_id is required")
@@ -166,12 +268,12 @@ def _upsert_app(session: Session, row: dict[str, str], *, mode: str) -> None:
     if not return_to:
         raise ValueError("apps.csv: return_to is required")
 
-    exists = session.get(ClientAppOrm, app_id) is not None
+    obj = session.get(ClientAppOrm, app_id)
 
-    if mode == "create" and exists:
+    if mode == "create" and obj is not None:
         raise ValueError(f"app already exists: {app_id}")
 
-    if not exists:
+    if obj is None:
         app_service.create_app(
             session,
             app_id=app_id,
@@ -179,14 +281,33 @@ def _upsert_app(session: Session, row: dict[str, str], *, mode: str) -> None:
             description=description,
             return_to=return_to,
         )
-    else:
-        app_service.update_app(
-            session,
-            app_id=app_id,
-            display_name=display_name if "display_name" in row else None,
-            description=description if "description" in row else None,
-            return_to=return_to if "return_to" in row else None,
-        )
+        return "created"
+
+    if display_name is not None and (display_name.strip() or app_id) == obj.display_name:
+        display_name = None
+    if description is not None and description == obj.description:
+        description = None
+    if return_to == obj.return_to:
+        return_to = None
+    if display_name is None and description is None and return_to is None:
+        return "unchanged"
+    app_service.update_app(
+        session,
+        app_id=app_id,
+        display_name=display_name,
+        description=description,
+        return_to=return_to,
+    )
+    return "updated"
+
+
+def _same_password(given: str, stored: str, *, already_hashed: bool) -> bool:
+    if already_hashed:
+        return given == stored
+    try:
+        return verify_password(given, stored)
+    except ValueError:
+        return False
 
 
 def _upsert_user(
@@ -195,7 +316,7 @@ def _upsert_user(
     *,
     mode: str,
     password_already_hashed: bool,
-) -> None:
+) -> Status:
     user_name = _get(row, "user_name")
     if not user_name:
         raise ValueError("users.csv: user_name is required")
@@ -210,12 +331,12 @@ def _upsert_user(
     policy_epoch_raw = _get(row, "policy_epoch")
     policy_epoch = int(policy_epoch_raw) if policy_epoch_raw is not None else 1
 
-    exists = session.get(UserOrm, user_name) is not None
+    obj = session.get(UserOrm, user_name)
 
-    if mode == "create" and exists:
+    if mode == "create" and obj is not None:
         raise ValueError(f"user already exists: {user_name}")
 
-    if not exists:
+    if obj is None:
         if not password:
             raise ValueError("users.csv: password is required for new users")
         user_service.create_user(
@@ -231,67 +352,224 @@ def _upsert_user(
             ),
             already_hashed=password_already_hashed,
         )
-        return
-
-    # Update existing
-    user_service.update_user(
-        session,
-        UserDTOForUpdate(
-            user_name=user_name,
-            password=password if "password" in row and password else None,
-            roles=roles if "roles" in row else None,
-            real_name=real_name if "real_name" in row else None,
-            division=division if "division" in row else None,
-            description=description if "description" in row else None,
+        return "created"
+
+    # Update existing. Pass only values that differ: update_user bumps
+    # policy_epoch for any password/roles/division it is given.
+    patch = UserDTOForUpdate(
+        user_name=user_name,
+        password=(
+            password
+            if password and not _same_password(password, obj.password, already_hashed=password_already_hashed)
+            else None
         ),
-        already_hashed=password_already_hashed,
+        roles=roles if "roles" in row and set(roles) != {r.role_name for r in obj.roles} else None,
+        real_name=real_name if real_name is not None and real_name != obj.real_name else None,
+        division=division if division is not None and division != obj.division else None,
+        description=description if description is not None and description != obj.description else None,
     )
+    if not patch.model_dump(exclude={"user_name"}, exclude_none=True):
+        return "unchanged"
+    user_service.update_user(session, patch, already_hashed=password_already_hashed)
+    return "updated"
 
 
-def _apply(
-    session: Session,
-    *,
-    paths: CsvPaths,
-    mode: str,
-    password_already_hashed: bool,
-) -> dict[str, int]:
-    counts = {"roles": 0, "scopes": 0, "apps": 0, "users": 0}
+def _user_import_row(line: int, row: dict[str, str]) -> UserImportRow:
+    policy_epoch_raw = _get(row, "policy_epoch")
+    try:
+        policy_epoch = int(policy_epoch_raw) if policy_epoch_raw is not None else 1
+    except ValueError as e:
+        raise ImportRowError(line, f"invalid policy_epoch: {policy_epoch_raw}") from e
+    return UserImportRow(
+        line=line,
+        user_name=_get(row, "user_name") or "",
+        password=_get(row, "password"),
+        roles=_split_list(_get(row, "roles")) if "roles" in row else None,
+        real_name=_get(row, "real_name"),
+        division=_get(row, "division"),
+        description=_get(row, "description"),
+        policy_epoch=policy_epoch,
+    )
+
+
+def _chunks(items: Iterable[_T], size: int) -> Iterator[list[_T]]:
+    it = iter(items)
+    while chunk := list(itertools.islice(it, size)):
+        yield chunk
+
 
-    # Create roles/scopes first so later entities can reference them.
-    if paths.roles is not None:
-        for row in _read_csv_rows(paths.roles):
-            _upsert_role(session, row, mode=mode)
-            counts["roles"] += 1
+def _checkpoint_key(sources: dict[str, Path]) -> dict[str, object]:
+    # Only the paths: rows after the recorded line may be fixed before resuming.
+    return {"sources": {entity: str(path.resolve()) for entity, path in sources.items()}}
 
-    if paths.scopes is not None:
-        for row in _read_csv_rows(paths.scopes):
-            _upsert_scope(session, row, mode=mode)
-            counts["scopes"] += 1
 
-    if paths.apps is not None:
-        for row in _read_csv_rows(paths.apps):
-            _upsert_app(session, row, mode=mode)
-            counts["apps"] += 1
+def _load_checkpoint(checkpoint: Path, sources: dict[str, Path]) -> tuple[str, int, int] | None:
+    """Return (entity, last committed line, rows committed from its file) of an earlier run, or None."""
+
+    if not checkpoint.exists():
+        return None
+    state = json.loads(checkpoint.read_text(encoding="utf-8"))
+    key = _checkpoint_key(sources)
+    if {k: state.get(k) for k in key} != key:
+        raise SystemExit(f"Checkpoint {checkpoint} was written for {state.get('sources')}, not these files")
+    return str(state["entity"]), int(state["line"]), int(state["rows"])
+
+
+def _save_checkpoint(
+    checkpoint: Path, sources: dict[str, Path], *, entity: str, line: int, rows: int
+) -> None:
+    tmp = checkpoint.with_name(checkpoint.name + ".tmp")
+    state = {**_checkpoint_key(sources), "entity": entity, "line": line, "rows": rows}
+    tmp.write_text(json.dumps(state), encoding="utf-8")
+    os.replace(tmp, checkpoint)
 
-    if paths.users is not None:
-        for row in _read_csv_rows(paths.users):
-            _upsert_user(session, row, mode=mode, password_already_hashed=password_already_hashed)
-            counts["users"] += 1
 
-    return counts
+@contextmanager
+def _chunk_session(session_factory: sessionmaker[Session], dry_run: Session | None) -> Iterator[Session]:
+    """One committed transaction per chunk, or the shared `--dry-run` session.
+
+    The dry-run session is flushed and cleared after each chunk: its changes
+    stay in the (never committed) transaction, so later chunks see them, but
+    not in memory.
+    """
+
+    if dry_run is None:
+        with session_scope(session_factory) as session:
+            yield session
+        return
+    yield dry_run
+    dry_run.flush()
+    dry_run.expunge_all()
+
+
+def _apply_rows(
+    session_factory: sessionmaker[Session],
+    entity: str,
+    path: Path,
+    upsert: Callable[[Session, dict[str, str]], Status],
+    *,
+    chunk_size: int,
+    sources: dict[str, Path],
+    checkpoint: Path | None = None,
+    resume: tuple[int, int] = (0, 0),
+    dry_run: Session | None = None,
+) -> Counter[str]:
+    """Apply a file row by row with `upsert`, committing every `chunk_size` rows.
+
+    With `checkpoint`, the last committed line is recorded after every chunk;
+    rows up to `resume` (line, rows) are skipped. With `dry_run`, rows are
+    applied in that session instead and nothing is committed.
+    """
+
+    resume_line, resumed = resume
+    changes: Counter[str] = Counter()
+    rows = ((line, row) for line, row in _iter_rows(path) if line > resume_line)
+    try:
+        for chunk in _chunks(rows, chunk_size):
+            with _chunk_session(session_factory, dry_run) as session:
+                for line, row in chunk:
+                    try:
+                        changes[upsert(session, row)] += 1
+                    except ImportRowError:
+                        raise
+                    except ValueError as e:
+                        raise ImportRowError(line, str(e)) from e
+            if checkpoint is not None:
+                done = resumed + sum(changes.values())
+                _save_checkpoint(checkpoint, sources, entity=entity, line=chunk[-1][0], rows=done)
+    except ValueError as e:
+        done = resumed + sum(changes.values())
+        raise SystemExit(f"{path.name} {e} ({done} rows before this chunk were committed)") from e
+    return changes
+
+
+def _apply_users_bulk(
+    session_factory: sessionmaker[Session],
+    path: Path,
+    *,
+    mode: ImportMode,
+    password_already_hashed: bool,
+    chunk_size: int,
+    sources: dict[str, Path],
+    hash_workers: int = 0,
+    hash_ahead: int = 2,
+    checkpoint: Path | None = None,
+    resume: tuple[int, int] = (0, 0),
+    dry_run: Session | None = None,
+) -> BulkResult:
+    """Stream a users file in with set-based statements, committing every `chunk_size` rows.
+
+    Each chunk is diffed against the database (`bulk_users.plan_users`) and
+    only real changes are written; with `dry_run` they are written to that
+    session and never committed. Plaintext passwords are hashed by
+    `bulk_users.prehashed` in a process pool while earlier chunks are written.
+    With `checkpoint`, the last committed line is recorded after every chunk;
+    rows up to `resume` (line, rows) are skipped.
+    """
+
+    def stored_passwords(user_names: list[str]) -> dict[str, str]:
+        if dry_run is not None:
+            return bulk_users.stored_passwords(dry_run, user_names)
+        with session_scope(session_factory) as session:
+            return bulk_users.stored_passwords(session, user_names)
+
+    start = time.perf_counter()
+    resume_line, resumed = resume
+    total = BulkResult()
+    rows = (_user_import_row(line, row) for line, row in _iter_rows(path) if line > resume_line)
+    chunks = _chunks(rows, chunk_size)
+    if not password_already_hashed:
+        chunks = bulk_users.prehashed(
+            chunks, workers=hash_workers, ahead=hash_ahead, current=stored_passwords
+        )
+    done = 0
+    try:
+        for chunk in chunks:
+            with _chunk_session(session_factory, dry_run) as session:
+                total += bulk_users.apply_users(session, chunk, mode=mode, already_hashed=True)
+            done = total.created + total.updated + total.unchanged
+            if checkpoint is not None:
+                _save_checkpoint(
+                    checkpoint, sources, entity="users", line=chunk[-1].line, rows=resumed + done
+                )
+            rate = done / (time.perf_counter() - start)
+            print(
+                f"users: {resumed + done} rows (created {total.created}, updated {total.updated}, "
+                f"unchanged {total.unchanged}, {rate:,.0f} rows/s)",
+                file=sys.stderr,
+            )
+    except ValueError as e:
+        raise SystemExit(f"{path.name} {e} ({resumed + done} rows before this chunk were committed)") from e
+    return total
+
+
+def _print_summary(changes: dict[str, Counter[str]], users: BulkResult | None, *, dry_run: bool) -> None:
+    counts = {k: sum(c.values()) for k, c in changes.items()}
+    total = sum(counts.values())
+    print(f"{'Planned' if dry_run else 'Imported'} rows: {counts} (total={total})")
+    for entity, c in changes.items():
+        if not c:
+            continue
+        line = f"  {entity}: {c['created']} created, {c['updated']} updated, {c['unchanged']} unchanged"
+        if entity == "users" and users is not None:
+            fields = ", ".join(f"{k} {v}" for k, v in sorted(users.fields.items()))
+            line += f"; changed fields: {fields or '-'}; policy_epoch bumps: {users.epoch_bumps}"
+        print(line)
+    if dry_run:
+        print("Dry run: nothing was written")
 
 
 def _parse_args(argv: list[str]) -> argparse.Namespace:
-    p = argparse.ArgumentParser(description="Bulk import ZenAuth data from CSV")
+    p = argparse.ArgumentParser(description="Bulk import ZenAuth data from CSV, NDJSON or YAML")
     p.add_argument(
         "--dsn",
         required=True,
         help="SQLAlchemy DSN (e.g. sqlite+pysqlite:////path/to/db.sqlite3)",
     )
-    p.add_argument("--users", type=Path, help="Path to users.csv")
-    p.add_argument("--apps", type=Path, help="Path to apps.csv")
-    p.add_argument("--roles", type=Path, help="Path to roles.csv")
-    p.add_argument("--scopes", type=Path, help="Path to scopes.csv")
+    p.add_argument("--users", type=Path, help="Path to users.csv (or .ndjson/.jsonl/.yaml)")
+    p.add_argument("--apps", type=Path, help="Path to apps.csv (or .ndjson/.jsonl/.yaml)")
+    p.add_argument("--roles", type=Path, help="Path to roles.csv (or .ndjson/.jsonl/.yaml)")
+    p.add_argument("--scopes", type=Path, help="Path to scopes.csv (or .ndjson/.jsonl/.yaml)")
     p.add_argument(
         "--mode",
         choices=["create", "upsert"],
@@ -303,6 +581,34 @@ def _parse_args(argv: list[str]) -> argparse.Namespace:
         action="store_true",
         help="Treat users.csv password as already hashed (bcrypt)",
     )
+    p.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Import users.csv with set-based statements, committing every --chunk-size rows",
+    )
+    p.add_argument("--chunk-size", type=int, default=1000, help="Rows per transaction")
+    p.add_argument(
+        "--hash-workers",
+        type=int,
+        default=0,
+        help="Processes hashing passwords with --bulk (default: CPU count)",
+    )
+    p.add_argument(
+        "--hash-ahead",
+        type=int,
+        default=2,
+        help="Chunks hashed ahead of the one being written with --bulk",
+    )
+    p.add_argument(
+        "--checkpoint",
+        type=Path,
+        help="Record the last committed file and row here and resume from it on rerun",
+    )
+    p.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Compare the files with the database and print what would change, without writing",
+    )
     return p.parse_args(argv)
 
 
@@ -316,18 +622,71 @@ def main(argv: list[str] | None = None) -> int:
     init_db(engine)
     session_factory = create_sessionmaker(engine)
 
-    paths = CsvPaths(users=args.users, apps=args.apps, roles=args.roles, scopes=args.scopes)
-
-    with session_scope(session_factory) as session:
-        counts = _apply(
-            session,
-            paths=paths,
-            mode=args.mode,
-            password_already_hashed=args.password_already_hashed,
-        )
-
-    total = sum(counts.values())
-    print(f"Imported rows: {counts} (total={total})")
+    sources: dict[str, Path] = {e: p for e in ENTITIES if (p := getattr(args, e)) is not None}
+    if args.checkpoint is not None and args.dry_run:
+        raise SystemExit("--checkpoint cannot be combined with --dry-run")
+    resume = _load_checkpoint(args.checkpoint, sources) if args.checkpoint is not None else None
+    if resume is not None:
+        entity, line, rows = resume
+        print(f"Resuming {sources[entity].name} after line {line} ({rows} rows committed)", file=sys.stderr)
+
+    upserts: dict[str, Callable[[Session, dict[str, str]], Status]] = {
+        "roles": lambda session, row: _upsert_role(session, row, mode=args.mode),
+        "scopes": lambda session, row: _upsert_scope(session, row, mode=args.mode),
+        "apps": lambda session, row: _upsert_app(session, row, mode=args.mode),
+        "users": lambda session, row: _upsert_user(
+            session, row, mode=args.mode, password_already_hashed=args.password_already_hashed
+        ),
+    }
+    changes: dict[str, Counter[str]] = {e: Counter() for e in ENTITIES}
+    users: BulkResult | None = None
+    # A dry run applies every file in one transaction that is rolled back.
+    dry_run = session_factory() if args.dry_run else None
+    try:
+        for entity, path in sources.items():
+            at = (0, 0)
+            if resume is not None:
+                if ENTITIES.index(entity) < ENTITIES.index(resume[0]):
+                    continue  # committed by the interrupted run
+                if entity == resume[0]:
+                    at = (resume[1], resume[2])
+            if entity == "users" and args.bulk:
+                users = _apply_users_bulk(
+                    session_factory,
+                    path,
+                    mode=args.mode,
+                    password_already_hashed=args.password_already_hashed,
+                    chunk_size=args.chunk_size,
+                    sources=sources,
+                    hash_workers=args.hash_workers,
+                    hash_ahead=args.hash_ahead,
+                    checkpoint=args.checkpoint,
+                    resume=at,
+                    dry_run=dry_run,
+                )
+                changes["users"] = Counter(
+                    created=users.created, updated=users.updated, unchanged=users.unchanged
+                )
+            else:
+                changes[entity] = _apply_rows(
+                    session_factory,
+                    entity,
+                    path,
+                    upserts[entity],
+                    chunk_size=args.chunk_size,
+                    sources=sources,
+                    checkpoint=args.checkpoint,
+                    resume=at,
+                    dry_run=dry_run,
+                )
+    finally:
+        if dry_run is not None:
+            dry_run.rollback()
+            dry_run.close()
+    if args.checkpoint is not None:
+        args.checkpoint.unlink(missing_ok=True)
+
+    _print_summary(changes, users, dry_run=args.dry_run)
     return 0
 
 
@@ -0,0 +1,151 @@
+"""Admission control for password-verification endpoints.
+
+Login bursts queue bcrypt work that holds threadpool threads for hundreds of
+milliseconds each. `AdmissionController` bounds how many such requests run at
+once and how many may wait (for at most a deadline). Everything beyond that
+is rejected immediately with `429 Too Many Requests` and a `Retry-After`
+estimate, before a threadpool thread or DB connection is taken.
+
+Waiting happens on the event loop (the dependency is async), so queued
+requests do not occupy threadpool threads that `/verify/token` needs.
+
+`PASSWORD_ADMISSION` is the only concurrency gate of those endpoints: the
+route class limiter lets them through and the hash dispatcher does not queue.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import time
+from collections import deque
+from typing import AsyncIterator, Iterator
+
+import anyio
+from fastapi import HTTPException, status
+from zen_auth.timing import record_phase
+
+from .metrics import REGISTRY, Sample, stats_samples
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_concurrent: int = 0,
+        max_queue: int = 64,
+        queue_timeout_sec: float = 2.0,
+    ) -> None:
+        self.name = name
+        self._waiters: deque[anyio.Event] = deque()
+        self._active = 0
+        self._admitted = 0
+        self._rejected = 0
+        self._timed_out = 0
+        # EWMA of how long an admitted request holds its slot.
+        self._hold_sec = 0.25
+        self.configure(
+            max_concurrent=max_concurrent, max_queue=max_queue, queue_timeout_sec=queue_timeout_sec
+        )
+
+    def configure(
+        self, *, max_concurrent: int = 0, max_queue: int = 64, queue_timeout_sec: float = 2.0
+    ) -> None:
+        """Set limits; `max_concurrent=0` means twice the CPU count."""
+
+        self.max_concurrent = max_concurrent if max_concurrent > 0 else (os.cpu_count() or 1) * 2
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout_sec = queue_timeout_sec
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "active": self._active,
+            "waiting": len(self._waiters),
+            "admitted": self._admitted,
+            "rejected": self._rejected,
+            "timed_out": self._timed_out,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+        }
+
+    def retry_after_sec(self) -> int:
+        """Rough time until a new request would get a slot."""
+
+        backlog = len(self._waiters) + 1
+        return max(1, math.ceil(self._hold_sec * backlog / self.max_concurrent))
+
+    def _reject(self, reason: str) -> HTTPException:
+        self._rejected += 1
+        return HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Too many concurrent {self.name} requests ({reason}); retry later",
+            headers={"Retry-After": str(self.retry_after_sec())},
+        )
+
+    async def acquire(self) -> None:
+        """Take a slot, waiting in FIFO order up to `queue_timeout_sec`.
+
+        Raises `HTTPException(429)` when the queue is full or the wait expires.
+        """
+
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            self._admitted += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject("queue full")
+
+        event = anyio.Event()
+        self._waiters.append(event)
+        try:
+            with anyio.move_on_after(self.queue_timeout_sec):
+                await event.wait()
+        except BaseException:
+            # Cancelled from outside (client gone, shutdown): leave the queue,
+            # or pass on a slot that was handed over in the meantime.
+            if event.is_set():
+                self.release()
+            else:
+                self._waiters.remove(event)
+            raise
+        if event.is_set():
+            # `release()` handed its slot over to us.
+            self._admitted += 1
+            return
+
+        self._waiters.remove(event)
+        self._timed_out += 1
+        raise self._reject("queue timeout")
+
+    def release(self, held_sec: float | None = None) -> None:
+        if held_sec is not None:
+            self._hold_sec = 0.8 * self._hold_sec + 0.2 * held_sec
+        if self._waiters:
+            # Hand the slot directly to the oldest waiter (active stays the same).
+            self._waiters.popleft().set()
+        else:
+            self._active -= 1
+
+    async def dependency(self) -> AsyncIterator[None]:
+        """FastAPI dependency holding a slot for the duration of the request."""
+
+        queued = time.perf_counter()
+        await self.acquire()
+        start = time.perf_counter()
+        # The wait for admission is the `queue` phase of Server-Timing.
+        record_phase("queue", (start - queued) * 1000.0)
+        try:
+            yield
+        finally:
+            self.release(time.perf_counter() - start)
+
+
+# Login, `/verify/user` and password changes (see `lifespan` for limits).
+PASSWORD_ADMISSION = AdmissionController("password verification")
+
+
+@REGISTRY.collector("zenauth_admission", "Password endpoint admission control by field.")
+def _admission_samples() -> Iterator[Sample]:
+    return stats_samples(PASSWORD_ADMISSION.stats())
@@ -0,0 +1,38 @@
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+JST = timezone(timedelta(hours=9))
+
+_ts_cache: tuple[int, str] = (-1, "")
+
+
+def jst_timestamp() -> str:
+    """Current time as ISO 8601 in JST with millisecond precision.
+
+    The formatted string is reused for every call within the same millisecond.
+    """
+
+    global _ts_cache
+
+    now_ms = time.time_ns() // 1_000_000
+    cached_ms, cached = _ts_cache
+    if cached_ms == now_ms:
+        return cached
+    ts = datetime.fromtimestamp(now_ms / 1000, JST).isoformat(sep="T", timespec="milliseconds")
+    _ts_cache = (now_ms, ts)
+    return ts
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that serializes pydantic models (also nested in dicts/lists)
+    straight to bytes with pydantic-core, without `jsonable_encoder`.
+
+    The output is compact UTF-8 JSON, like Starlette's `JSONResponse`.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content, inf_nan_mode="null")
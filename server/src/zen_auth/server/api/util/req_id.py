@@ -1,31 +1,63 @@
-import uuid
-from typing import Awaitable, Callable
+import os
+from contextvars import ContextVar
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 _ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+# Two base62 digits per divmod halves the number of big-int divisions.
+_PAIRS = [a + b for a in _ALPHABET for b in _ALPHABET]
+_PAIR_BASE = len(_PAIRS)
 
+_REQ_ID: ContextVar[str] = ContextVar("zen_auth_req_id", default="--")
 
-class RequestIDMiddleWare(BaseHTTPMiddleware):
-    async def dispatch(
-        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
-    ) -> Response:
-        req_id = self._new_rec_id()
-        request.state.req_id = req_id
-        response = await call_next(request)
-        response.headers["X-Request-ID"] = req_id
-        return response
+
+def current_req_id() -> str:
+    """Return the request id of the request being handled ("--" outside a request)."""
+
+    return _REQ_ID.get()
+
+
+def new_req_id() -> str:
+    """Return a random 128-bit id encoded in base62."""
+
+    num = int.from_bytes(os.urandom(16), "big")
+    chars = []
+    while num:
+        num, rem = divmod(num, _PAIR_BASE)
+        chars.append(_PAIRS[rem])
+    return "".join(reversed(chars)).lstrip("0") or "0"
+
+
+def bind_req_id(scope: Scope) -> str:
+    """Assign a request id to `scope` (`request.state.req_id`) and the current context."""
+
+    req_id = new_req_id()
+    scope.setdefault("state", {})["req_id"] = req_id
+    _REQ_ID.set(req_id)
+    return req_id
+
+
+class RequestIDMiddleWare:
+    """Pure ASGI middleware that sets `request.state.req_id` and `X-Request-ID`."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        req_id = bind_req_id(scope)
+
+        async def send_with_req_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Request-ID"] = req_id
+            await send(message)
+
+        await self.app(scope, receive, send_with_req_id)
 
     @staticmethod
     def _new_rec_id() -> str:
-        def uuid2base62(u: uuid.UUID) -> str:
-            num = u.int
-            chars = []
-            base = 62
-            while num > 0:
-                num, rem = divmod(num, base)
-                chars.append(_ALPHABET[rem])
-            return "".join(reversed(chars))
-
-        return uuid2base62(uuid.uuid4())
+        return new_req_id()
@@ -1,24 +1,55 @@
 import os
+from typing import Iterator, Literal
 
-from fastapi import APIRouter, Depends, Request, status
-from fastapi.responses import FileResponse, RedirectResponse, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import (
+    FileResponse,
+    JSONResponse,
+    PlainTextResponse,
+    RedirectResponse,
+    Response,
+    StreamingResponse,
+)
+from zen_auth.claims.base import log_audit_success
 from zen_auth.dto import UserDTO
 from zen_html import H
 
+from ....admission import PASSWORD_ADMISSION
 from ....claims_self import ClaimsSelf
+from ....config import ZENAUTH_SERVER_CONFIG
+from ....persistence.session import get_sessionmaker, session_scope
+from ....profiling import (
+    REQUEST_PROFILES,
+    SAMPLER,
+    ProfiledRoute,
+    collapsed,
+    speedscope,
+)
+from ....route_classes import ROUTE_LIMITERS, threadpool_stats
+from ....throttle import LOGIN_THROTTLE
+from ....usecases import export_service
+from ....usecases.access_matrix import ACCESS_MATRIX, AccessMatrix
+from ....usecases.export_service import ExportFormat, ExportKind
 from .._assets import default_header_links
 from .._tmp_lib import HResponse, TopPage
 from ..url_names import (
+    ADM_ACCESS_REPORT_API,
+    ADM_ACCESS_SCOPE_API,
+    ADM_ACCESS_SUMMARY_API,
     ADM_CSS_PATH,
     ADM_DUAL_LIST_JS_PATH,
+    ADM_EXPORT_API,
     ADM_HELPER_JS_PATH,
+    ADM_PROFILE_API,
     ADM_RBAC_TOP_PAGE,
+    ADM_REQUEST_PROFILE_API,
     ADM_ROLE_LIST_CONTENT,
+    ADM_STATS_API,
     ADM_TOP_PAGE,
     ADM_USER_LIST_CONTENT,
 )
 
-router = APIRouter(prefix="", tags=["admin"])
+router = APIRouter(prefix="", tags=["admin"], route_class=ProfiledRoute)
 
 
 @router.get("/", name=ADM_TOP_PAGE)
@@ -48,6 +79,175 @@ def _rbac_top(
     return RedirectResponse(str(req.url_for(ADM_ROLE_LIST_CONTENT)), status_code=status.HTTP_303_SEE_OTHER)
 
 
+@router.get("/stats", name=ADM_STATS_API)
+async def _stats(
+    user: UserDTO = Depends(ClaimsSelf.role_or_scope(roles=["admin"], scopes=["edit:auth_server"])),
+) -> dict[str, object]:
+    _ = user
+    return {
+        "admission": {"password": PASSWORD_ADMISSION.stats()},
+        "login_throttle": LOGIN_THROTTLE.stats(),
+        "route_classes": ROUTE_LIMITERS.stats(),
+        "shedding": ROUTE_LIMITERS.shed_stats(),
+        "route_class_queues": ROUTE_LIMITERS.queue_stats(),
+        "threadpool": threadpool_stats(),
+    }
+
+
+def _require_profiling() -> None:
+    if not ZENAUTH_SERVER_CONFIG().profiling_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profiling is disabled")
+
+
+@router.get("/profile", name=ADM_PROFILE_API, dependencies=[Depends(_require_profiling)])
+async def _profile(
+    seconds: float = Query(5.0, gt=0),
+    interval_ms: float = Query(5.0, ge=1),
+    format: Literal["collapsed", "speedscope"] = "collapsed",
+    include_idle: bool = False,
+    user: UserDTO = Depends(ClaimsSelf.role_or_scope(roles=["admin"], scopes=["edit:auth_server"])),
+) -> Response:
+    """Sample the stacks of all threads of this worker (see `profiling`)."""
+
+    _ = user
+    seconds = min(seconds, ZENAUTH_SERVER_CONFIG().profiling_max_sec)
+    counts = await SAMPLER.run(seconds, interval_ms / 1000.0, include_idle)
+    if counts is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A profile is already running")
+    if format == "speedscope":
+        return JSONResponse(
+            speedscope(counts, interval_sec=interval_ms / 1000.0, name=f"zen_auth pid {os.getpid()}")
+        )
+    return PlainTextResponse(collapsed(counts))
+
+
+@router.get(
+    "/profile/requests/{req_id}", name=ADM_REQUEST_PROFILE_API, dependencies=[Depends(_require_profiling)]
+)
+def _request_profile(
+    req_id: str,
+    user: UserDTO = Depends(ClaimsSelf.role_or_scope(roles=["admin"], scopes=["edit:auth_server"])),
+) -> Response:
+    """cProfile report of a request sent with `X-ZenAuth-Profile: 1`."""
+
+    _ = user
+    profile = REQUEST_PROFILES.get(req_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No profile for this request")
+    return PlainTextResponse(profile.report())
+
+
+@router.get("/export/{kind}", name=ADM_EXPORT_API)
+def _export(
+    req: Request,
+    kind: ExportKind,
+    format: ExportFormat = "csv",
+    user: UserDTO = Depends(ClaimsSelf.role_or_scope(roles=["admin"], scopes=["edit:auth_server"])),
+) -> Response:
+    """Stream every `kind` record as CSV/NDJSON that `scripts/import_csv.py` reads back.
+
+    The body is produced while it is sent, from its own session (the request
+    dependencies are closed by then); users include their password hashes.
+    """
+
+    log_audit_success(
+        msg="export success",
+        user_name=user.user_name,
+        roles=user.roles,
+        required_context={"action": "export", "target": kind, "format": format},
+        request=req,
+    )
+
+    def body() -> Iterator[str]:
+        with session_scope(get_sessionmaker()) as session:
+            yield from export_service.export_lines(session, kind, format)
+
+    return StreamingResponse(
+        body(),
+        media_type=export_service.MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{kind}.{format}"',
+            "Cache-Control": "no-store",
+        },
+    )
+
+
+def _access_matrix() -> AccessMatrix:
+    return ACCESS_MATRIX.get(get_sessionmaker())
+
+
+@router.get("/access/summary", name=ADM_ACCESS_SUMMARY_API)
+def _access_summary(
+    req: Request,
+    user: UserDTO = Depends(ClaimsSelf.role_or_scope(roles=["admin"], scopes=["edit:auth_server"])),
+) -> Response:
+    """User, role, scope and role-set totals plus the number of users holding each scope."""
+
+    log_audit_success(
+        msg="access review success",
+        user_name=user.user_name,
+        roles=user.roles,
+        required_context={"action": "access_review", "target": "summary"},
+        request=req,
+    )
+    return JSONResponse(_access_matrix().summary(), headers={"Cache-Control": "no-store"})
+
+
+@router.get("/access/scope/{scope_name}", name=ADM_ACCESS_SCOPE_API)
+def _access_scope(
+    req: Request,
+    scope_name: str,
+    user: UserDTO = Depends(ClaimsSelf.role_or_scope(roles=["admin"], scopes=["edit:auth_server"])),
+) -> Response:
+    """Stream the users holding `scope_name` as CSV `user_name,roles` (the roles granting it)."""
+
+    matrix = _access_matrix()
+    if scope_name not in matrix.scopes:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Scope not found")
+    log_audit_success(
+        msg="access review success",
+        user_name=user.user_name,
+        roles=user.roles,
+        required_context={"action": "access_review", "target": "scope", "scope_name": scope_name},
+        request=req,
+    )
+    granting = set(matrix.roles_with(scope_name))
+
+    rows = (
+        {"user_name": name, "roles": [r for r in matrix.set_roles[sid] if r in granting]}
+        for name, sid in matrix.grants_of(scope_name)
+    )
+    return StreamingResponse(
+        export_service.csv_lines(rows, ["user_name", "roles"]),
+        media_type=export_service.MEDIA_TYPES["csv"],
+        headers={"Cache-Control": "no-store"},
+    )
+
+
+@router.get("/access/report", name=ADM_ACCESS_REPORT_API)
+def _access_report(
+    req: Request,
+    user: UserDTO = Depends(ClaimsSelf.role_or_scope(roles=["admin"], scopes=["edit:auth_server"])),
+) -> Response:
+    """Stream every effective grant as CSV `user_name,scope_name,roles` for access reviews."""
+
+    log_audit_success(
+        msg="access review success",
+        user_name=user.user_name,
+        roles=user.roles,
+        required_context={"action": "access_review", "target": "report"},
+        request=req,
+    )
+    return StreamingResponse(
+        _access_matrix().report_lines(),
+        media_type=export_service.MEDIA_TYPES["csv"],
+        headers={
+            "Content-Disposition": 'attachment; filename="access_report.csv"',
+            "Cache-Control": "no-store",
+        },
+    )
+
+
 _assets_dir = os.path.dirname(os.path.abspath(__file__))
 
 
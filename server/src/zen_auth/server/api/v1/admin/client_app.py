@@ -11,6 +11,7 @@ from zen_auth.logger import LOGGER
 from ....claims_self import ClaimsSelf
 from ....persistence.models import ClientAppOrm
 from ....persistence.session import get_session
+from ....profiling import ProfiledRoute
 from ....usecases import app_service
 from .._tmp_lib import ErrorResponse, HResponse
 from ..url_names import (
@@ -23,7 +24,7 @@ from ..url_names import (
 )
 from .client_app_tmpl import ClientAppList, CreateClientAppDialog, EditClientAppDialog
 
-router = APIRouter(prefix="/app", tags=["admin", "client_app"])
+router = APIRouter(prefix="/app", tags=["admin", "client_app"], route_class=ProfiledRoute)
 
 
 def _to_dict(obj: ClientAppOrm) -> dict[str, str | None]:
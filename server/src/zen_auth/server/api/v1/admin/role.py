@@ -15,6 +15,7 @@ from zen_auth.logger import LOGGER
 from ....claims_self import ClaimsSelf
 from ....persistence.models import RoleOrm, role_scopes, user_roles
 from ....persistence.session import get_session
+from ....profiling import ProfiledRoute
 from ....usecases import role_service
 from .._tmp_lib import ErrorResponse, HResponse
 from ..url_names import (
@@ -33,7 +34,7 @@ RoleList: Any = _RoleList
 EditRoleDialog: Any = _EditRoleDialog
 
 
-router = APIRouter(prefix="/role", tags=["admin", "role"])
+router = APIRouter(prefix="/role", tags=["admin", "role"], route_class=ProfiledRoute)
 
 _VALID_NAME = re.compile(r"^[a-zA-Z0-9:_\-\.]+$")
 
@@ -10,6 +10,7 @@ from zen_auth.logger import LOGGER
 
 from ....claims_self import ClaimsSelf
 from ....persistence.session import get_session
+from ....profiling import ProfiledRoute
 from ....usecases import role_service, scope_service
 from .._tmp_lib import ErrorResponse, HResponse
 from ..url_names import (
@@ -22,7 +23,7 @@ from ..url_names import (
 )
 from .scope_tmpl import CreateScopeDialog, EditScopeDialog, ScopeList
 
-router = APIRouter(prefix="/scope", tags=["admin", "scope"])
+router = APIRouter(prefix="/scope", tags=["admin", "scope"], route_class=ProfiledRoute)
 
 _VALID_NAME = re.compile(r"^[a-zA-Z0-9:_\-\.]+$")
 
@@ -5,8 +5,11 @@ from zen_auth.claims.base import log_audit_fail, log_audit_success
 from zen_auth.dto import UserDTO
 from zen_auth.errors import UserNotFoundError, UserVerificationError
 
+from ....admission import PASSWORD_ADMISSION
 from ....claims_self import ClaimsSelf
 from ....persistence.session import get_session
+from ....profiling import ProfiledRoute
+from ....throttle import LOGIN_THROTTLE, log_throttled
 from ....usecases import app_service, user_service
 from .._tmp_lib import ErrorResponse, HResponse, SuccessResponse
 from ..ui_ids import AUTH_CHANGE_PW_ID, AUTH_LOGIN_ID
@@ -21,7 +24,7 @@ from ..url_names import (
 )
 from .auth_tmpl import ChangePasswordPage, LoginPage, NotFoundPage
 
-router = APIRouter(prefix="", tags=["auth"])
+router = APIRouter(prefix="", tags=["auth"], route_class=ProfiledRoute)
 
 LOGIN_APP_ID_COOKIE_NAME = "login_app_id"
 
@@ -81,7 +84,7 @@ def login_page(
     return resp
 
 
-@router.post("/login", name=AUTH_LOGIN_API)
+@router.post("/login", name=AUTH_LOGIN_API, dependencies=[Depends(PASSWORD_ADMISSION.dependency)])
 def login(
     req: Request,
     user_name: str = Form(...),
@@ -89,10 +92,22 @@ def login(
     login_app_id: str | None = Cookie(None, alias=LOGIN_APP_ID_COOKIE_NAME),
     session: Session = Depends(get_session),
 ) -> Response:
+    client_ip = req.client.host if req.client else None
+    throttled = LOGIN_THROTTLE.check(user_name, client_ip)
+    if throttled is not None:
+        log_throttled(req, user_name, "login", throttled)
+        res = ErrorResponse(
+            "Too many failed login attempts. Please try again later.",
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+        res.headers["Retry-After"] = str(throttled.retry_after_sec)
+        return res
+
     return_to = _resolve_return_to(req, session, login_app_id)
     try:
         resp = Response(status_code=status.HTTP_200_OK, headers={"HX-Redirect": return_to})
         user = user_service.verify_user(session, user_name, password)
+        LOGIN_THROTTLE.record_success(user.user_name)
         ClaimsSelf.set_cookie(resp, ClaimsSelf.from_user(user).token)
         resp.delete_cookie(LOGIN_APP_ID_COOKIE_NAME)
 
@@ -106,6 +121,7 @@ def login(
         )
         return resp
     except (UserNotFoundError, UserVerificationError):
+        LOGIN_THROTTLE.record_failure(user_name, client_ip)
         log_audit_fail(
             msg="login failed (invalid credentials)",
             user_name=user_name,
@@ -192,7 +208,9 @@ def _change_password_page(
     return resp
 
 
-@router.post("/change_password", name=AUTH_CHANGE_PW_API)
+@router.post(
+    "/change_password", name=AUTH_CHANGE_PW_API, dependencies=[Depends(PASSWORD_ADMISSION.dependency)]
+)
 def _change_password(
     req: Request,
     password: str = Form(...),
@@ -1,12 +1,22 @@
 from __future__ import annotations
 
-from fastapi import APIRouter
+import asyncio
+import time
+
+from fastapi import APIRouter, Query
 from fastapi.requests import Request
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from zen_auth.dto import PolicyEventsDTO
 
+from ....config import ZENAUTH_SERVER_CONFIG
+from ....persistence.session import create_sessionmaker, get_engine, session_scope
+from ....profiling import ProfiledRoute
+from ....usecases import policy_events
 from ..url_names import (
     AUTH_LOGIN_PAGE,
     META_ENDPOINTS_API,
+    META_POLICY_EVENTS_API,
     VERIFY_TOKEN_API,
     VERIFY_USER_API,
     VERIFY_USER_ROLE_API,
@@ -14,7 +24,7 @@ from ..url_names import (
     VERIFY_USER_SCOPE_API,
 )
 
-router = APIRouter(prefix="", tags=["meta"])
+router = APIRouter(prefix="", tags=["meta"], route_class=ProfiledRoute)
 
 
 @router.get("/endpoints", name=META_ENDPOINTS_API)
@@ -32,5 +42,47 @@ def endpoints(req: Request) -> JSONResponse:
         "verify_user_role": str(req.url_for(VERIFY_USER_ROLE_API)),
         "verify_user_scope": str(req.url_for(VERIFY_USER_SCOPE_API)),
         "verify_user_role_or_scope": str(req.url_for(VERIFY_USER_ROLE_OR_SCOPE_API)),
+        "policy_events": str(req.url_for(META_POLICY_EVENTS_API)),
     }
     return JSONResponse(content={"data": data})
+
+
+# Retention runs piggyback on long-poll reads, at most once per interval per process.
+_PRUNE_INTERVAL_SEC = 3600.0
+_next_prune = 0.0
+
+
+def _read_policy_events(cursor: int | None) -> PolicyEventsDTO:
+    global _next_prune
+
+    cfg = ZENAUTH_SERVER_CONFIG()
+    with session_scope(create_sessionmaker(get_engine())) as session:
+        if cfg.policy_events_retention_days > 0 and time.monotonic() >= _next_prune:
+            _next_prune = time.monotonic() + _PRUNE_INTERVAL_SEC
+            policy_events.prune(session, retention_days=cfg.policy_events_retention_days)
+        return policy_events.list_since(session, cursor, commit_lag_sec=cfg.policy_events_commit_lag_sec)
+
+
+@router.get("/policy_events", name=META_POLICY_EVENTS_API)
+async def policy_events_long_poll(
+    cursor: int | None = Query(None),
+    wait: float = Query(0.0, ge=0.0),
+) -> JSONResponse:
+    """Long-poll for policy changes after `cursor`.
+
+    Returns as soon as events exist (or immediately when `cursor` is omitted
+    or unknown, with `reset=true`), otherwise after `wait` seconds with an
+    empty page. Clients resume by passing back the returned `cursor`.
+
+    This is an async endpoint so waiting clients hold no threadpool thread;
+    each DB read runs in the threadpool.
+    """
+
+    cfg = ZENAUTH_SERVER_CONFIG()
+    deadline = time.monotonic() + min(wait, cfg.policy_events_max_wait_sec)
+    while True:
+        page = await run_in_threadpool(_read_policy_events, cursor)
+        remaining = deadline - time.monotonic()
+        if page.events or page.reset or remaining <= 0:
+            return JSONResponse(content={"data": page.model_dump()})
+        await asyncio.sleep(min(cfg.policy_events_poll_interval_sec, remaining))
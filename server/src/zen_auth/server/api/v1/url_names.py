@@ -49,6 +49,19 @@ ADM_EDIT_APP_CONTENT = "adm_edit_app_content"
 ADM_UPDATE_APP_API = "adm_update_app_api"
 ADM_DELETE_APP_API = "adm_delete_app_api"
 
+# Admin: runtime stats
+ADM_STATS_API = "adm_stats_api"
+ADM_PROFILE_API = "adm_profile_api"
+ADM_REQUEST_PROFILE_API = "adm_request_profile_api"
+
+# Admin: data export
+ADM_EXPORT_API = "adm_export_api"
+
+# Admin: access review
+ADM_ACCESS_SUMMARY_API = "adm_access_summary_api"
+ADM_ACCESS_SCOPE_API = "adm_access_scope_api"
+ADM_ACCESS_REPORT_API = "adm_access_report_api"
+
 # Static assets
 ADM_DUAL_LIST_JS_PATH = "dual_list.js"
 ADM_CSS_PATH = "zenauth_admin.css"
@@ -63,3 +76,4 @@ VERIFY_USER_ROLE_OR_SCOPE_API = "identity_verify_user_role_or_scope"
 
 # META
 META_ENDPOINTS_API = "identity_endpoints"
+META_POLICY_EVENTS_API = "identity_policy_events"
@@ -1,10 +1,8 @@
-from datetime import datetime, timedelta, timezone
 from typing import Any, TypeVar
 
 from fastapi import APIRouter, Body, Depends, HTTPException, status
-from fastapi.encoders import jsonable_encoder
 from fastapi.requests import Request
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import Response
 from jose import JWTError
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
@@ -21,9 +19,13 @@ from zen_auth.errors import (
 )
 from zen_auth.logger import LOGGER
 
+from ....admission import PASSWORD_ADMISSION
 from ....claims_self import ClaimsSelf
 from ....persistence.session import get_session
+from ....profiling import ProfiledRoute
+from ....throttle import LOGIN_THROTTLE, log_throttled
 from ....usecases import rbac_checks, user_service
+from ...util.json_response import FastJSONResponse, jst_timestamp
 from ..url_names import (
     VERIFY_TOKEN_API,
     VERIFY_USER_API,
@@ -32,12 +34,14 @@ from ..url_names import (
     VERIFY_USER_SCOPE_API,
 )
 
-router = APIRouter(prefix="", tags=["verify"])
+router = APIRouter(prefix="", tags=["verify"], route_class=ProfiledRoute)
 
 T = TypeVar("T")
 
 
-class VerifyResponse(JSONResponse):
+class VerifyResponse(FastJSONResponse):
+    """`{"data": ..., "meta": {"req_id", "timestamp"}}` envelope for the verify API."""
+
     def __init__(
         self,
         *,
@@ -49,13 +53,11 @@ class VerifyResponse(JSONResponse):
         background: BackgroundTask | None = None,
     ) -> None:
         meta = {
-            "req_id": getattr(request, "req_id", "--"),
-            "timestamp": datetime.now(tz=timezone(timedelta(hours=9))).isoformat(
-                sep="T", timespec="milliseconds"
-            ),
+            "req_id": getattr(request.state, "req_id", "--"),
+            "timestamp": jst_timestamp(),
         }
         payload: dict[str, Any] = {
-            "data": jsonable_encoder(data),
+            "data": data,
             "meta": meta,
         }
         super().__init__(
@@ -110,14 +112,26 @@ class VerifyUserRoleOrScopeResultDTO(BaseModel):
     allowed: bool
 
 
-@router.post("/user", name=VERIFY_USER_API)
+@router.post("/user", name=VERIFY_USER_API, dependencies=[Depends(PASSWORD_ADMISSION.dependency)])
 def _verify_user(
     req: Request,
     user: Claims.UserPassDTO = Body(),
     session: Session = Depends(get_session),
 ) -> Response:
+    # The peer is the calling app server (or a proxy), shared by all of its
+    # users: an address limit would lock every user of that app out.
+    throttled = LOGIN_THROTTLE.check(user.user_name, None)
+    if throttled is not None:
+        log_throttled(req, user.user_name, "verify_user", throttled)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed attempts; retry later",
+            headers={"Retry-After": str(throttled.retry_after_sec)},
+        )
+
     try:
         user_dto = user_service.verify_user(session, user.user_name, user.password)
+        LOGIN_THROTTLE.record_success(user_dto.user_name)
         token = ClaimsSelf.from_user(user_dto).token
 
         log_audit_success(
@@ -129,6 +143,7 @@ def _verify_user(
         )
         return VerifyResponse(data=Claims.TokenDTO(token=token), request=req)
     except (UserNotFoundError, UserVerificationError) as e:
+        LOGIN_THROTTLE.record_failure(user.user_name, None)
         LOGGER.error("Username or password is incorrect. (user: %s)", user.user_name, exc_info=True)
 
         log_audit_fail(
@@ -1,3 +1,4 @@
+from time import perf_counter
 from typing import Any, Callable, Iterable
 
 from fastapi import Depends, Header
@@ -24,8 +25,10 @@ from zen_auth.errors import (
     UserNotFoundError,
 )
 from zen_auth.logger import LOGGER
+from zen_auth.timing import phase
 
 from .config import ZENAUTH_SERVER_CONFIG
+from .metrics import JWT_ERRORS, JWT_SECONDS
 from .persistence.session import get_session
 from .usecases import rbac_checks, user_service
 
@@ -36,6 +39,27 @@ class ClaimsSelf(Claims):
     Validates JWTs locally and loads users via SQLAlchemy `Session`.
     """
 
+    @classmethod
+    def from_token(cls, token: str) -> Self:
+        start = perf_counter()
+        try:
+            with phase("jwt_decode"):
+                return super().from_token(token)
+        except Exception:
+            JWT_ERRORS.inc()
+            raise
+        finally:
+            JWT_SECONDS.observe(perf_counter() - start, "decode")
+
+    @property
+    def token(self) -> str:
+        start = perf_counter()
+        try:
+            with phase("jwt_encode"):
+                return super().token
+        finally:
+            JWT_SECONDS.observe(perf_counter() - start, "encode")
+
     @classmethod
     def get_user_dto(cls, session: Session, user_name: str) -> UserDTO:
         return user_service.get_user(session, user_name)
@@ -62,7 +86,8 @@ class ClaimsSelf(Claims):
         claims = cls.from_token(token)
         cls._validate_claims(claims)
 
-        user = user_service.get_user(session, claims.sub)
+        with phase("db_user"):
+            user = user_service.get_user(session, claims.sub)
         if claims.policy_epoch < user.policy_epoch:
             raise JWTError("Policy updated")
 
@@ -5,7 +5,7 @@ runtime (e.g., DB connectivity).
 """
 
 from functools import lru_cache
-from typing import ClassVar
+from typing import ClassVar, Literal
 
 from pydantic_settings import BaseSettings
 from zen_auth.errors import ConfigError
@@ -29,6 +29,113 @@ class ZenAuthServerConfig(BaseSettings):
     dsn: str = ""
     refresh_window_sec: int = 300
 
+    # --- Policy-change event stream (`/meta/policy_events`) ---
+    # Upper bound for a client's long-poll wait, and how often a waiting
+    # request re-checks the DB for new events.
+    policy_events_max_wait_sec: float = 25.0
+    policy_events_poll_interval_sec: float = 0.5
+    # Events after an id gap wait this long for the gap's transaction to commit.
+    policy_events_commit_lag_sec: float = 5.0
+    # Events older than this are deleted (0 keeps them forever).
+    policy_events_retention_days: int = 30
+
+    # --- Password hashing ---
+    # Comma-separated passlib schemes; the first hashes new passwords, the rest
+    # are accepted and migrated on login. Costs of 0 keep the library default.
+    # Use `python server/src/scripts/calibrate_password_hash.py` to pick them.
+    password_schemes: str = "bcrypt"
+    password_bcrypt_rounds: int = 0
+    password_scrypt_rounds: int = 0
+    password_argon2_time_cost: int = 0
+    password_argon2_memory_cost: int = 0
+    password_argon2_parallelism: int = 0
+    # Where hashing/verification runs: "inline" (request thread), "thread" or
+    # "process" pool (workers 0 = CPU count). The request thread waits for the
+    # pool either way; how many requests hash at once is set by admission.
+    password_executor: Literal["inline", "thread", "process"] = "inline"
+    password_workers: int = 0
+
+    # --- Admission control for login, /verify/user and password changes ---
+    # The only concurrency gate of these endpoints (they skip the route class
+    # limit). At most `max_concurrent` requests (0 = 2 x CPU count) run at
+    # once; up to `max_queue` more wait for at most `queue_timeout_sec`.
+    # Anything beyond that is rejected immediately with 429 and a Retry-After
+    # header.
+    admission_password_max_concurrent: int = 0
+    admission_password_max_queue: int = 64
+    admission_password_queue_timeout_sec: float = 2.0
+
+    # --- Concurrency per route class ---
+    # Max concurrent requests for /verify, /auth and /admin routes (0 = no
+    # limit); password endpoints are limited by admission instead. Requests
+    # over the limit of a class without shedding wait in a queue of at most
+    # `max_queue` for at most `queue_timeout_sec`, then get 429 + Retry-After.
+    concurrency_verify: int = 32
+    concurrency_auth: int = 8
+    concurrency_admin: int = 4
+    concurrency_max_queue: int = 64
+    concurrency_queue_timeout_sec: float = 2.0
+    # The process-wide default threadpool is left alone unless
+    # `threadpool_size` is set, or `threadpool_autosize` sizes it to the sum of
+    # the class limits and the password admission limit plus 8 threads for
+    # other routes (so /verify always has threads).
+    threadpool_size: int = 0
+    threadpool_autosize: bool = False
+    # CoDel-style shedding of the /verify queue: normally requests wait up to
+    # `max_wait_ms` for a verify slot; once the minimum wait over an interval
+    # reaches `target_ms`, they wait at most `target_ms` and are then rejected
+    # with 503 + Retry-After (keep `max_wait_ms` well below client timeouts).
+    shed_verify_enabled: bool = True
+    shed_verify_target_ms: float = 50.0
+    shed_verify_interval_ms: float = 100.0
+    shed_verify_max_wait_ms: float = 1000.0
+
+    # --- Brute-force throttling for login and /verify/user ---
+    # Failed attempts are counted per user name and (login only: /verify/user
+    # is called by app servers) per client address in a sliding window; at the limit (0 = no limit for that key) attempts are
+    # rejected with 429 before the password hash is verified.
+    # Backend: "memory" (per process) or "module:factory" for a shared store.
+    login_throttle_enabled: bool = True
+    login_throttle_window_sec: float = 300.0
+    login_throttle_max_user_failures: int = 10
+    login_throttle_max_ip_failures: int = 50
+    login_throttle_backend: str = "memory"
+
+    # --- Metrics ---
+    # Serve Prometheus text-format metrics at GET /metrics (opt-in: they expose
+    # pool, throttle and route internals). With `metrics_token` set, scrapers
+    # must send `Authorization: Bearer <token>`; without it, restrict the
+    # endpoint at the reverse proxy.
+    metrics_enabled: bool = False
+    metrics_token: str = ""
+    # Add a `Server-Timing` header with per-phase durations (JWT, DB user load,
+    # RBAC, password, audit, queue wait) to verify and auth responses, and a
+    # `server_timing` field to the access log. Exposes internals; opt-in.
+    server_timing: bool = False
+
+    # --- Query accounting ---
+    # Statements on the server engine slower than this are logged to the
+    # "zen_auth.slow_query" logger with the request id and parameters
+    # redacted (0 disables the log). DB time per request is always added to
+    # the access log as `db_ms` / `db_queries`.
+    slow_query_ms: float = 200.0
+
+    # --- Profiling (admin only) ---
+    # Enables GET /admin/profile (stack sampling of this worker for at most
+    # `profiling_max_sec`) and cProfile reports for admin requests sent with
+    # `X-ZenAuth-Profile: 1` (their sync endpoint only, not dependencies such
+    # as the auth guard). The API routers always wrap sync endpoints for this;
+    # while disabled the wrapper is one context variable lookup per call.
+    profiling_enabled: bool = False
+    profiling_max_sec: float = 30.0
+
+    # --- Access review (admin only) ---
+    # The /admin/access/* endpoints share one effective-permission matrix per
+    # process. It is rebuilt when a policy event is recorded or the number of
+    # users, roles or scopes changes, and at least this often (catches edits
+    # made directly in the database).
+    access_matrix_ttl_sec: float = 300.0
+
     # --- CORS (disabled/locked-down recommended in production) ---
     # Comma-separated list of allowed origins. Use "*" for any origin.
     # Use an empty string to disable CORS middleware entirely.
@@ -53,6 +160,22 @@ class ZenAuthServerConfig(BaseSettings):
     bootstrap_admin_user: str = "admin"
     bootstrap_admin_password: str | None = None
 
+    def password_scheme_list(self) -> list[str]:
+        return [v.strip() for v in self.password_schemes.split(",") if v.strip()]
+
+    def password_costs(self) -> dict[str, dict[str, int]]:
+        """Per-scheme passlib cost options for `passwords.configure_context`."""
+
+        return {
+            "bcrypt": {"rounds": self.password_bcrypt_rounds},
+            "scrypt": {"rounds": self.password_scrypt_rounds},
+            "argon2": {
+                "rounds": self.password_argon2_time_cost,
+                "memory_cost": self.password_argon2_memory_cost,
+                "parallelism": self.password_argon2_parallelism,
+            },
+        }
+
     def model_post_init(self, context: object) -> None:
         if not self.dsn or not self.dsn.strip():
             raise ConfigError(f"{self._ENV_PREFIX}DSN must be set")
@@ -6,10 +6,17 @@ from types import FrameType
 from typing import AsyncIterator
 
 from fastapi import FastAPI
-from zen_auth.logger import LOGGER
+from zen_auth.logger import LOGGER, configure_audit_logging, flush_audit_log
 
+from .admission import PASSWORD_ADMISSION
+from .config import ZENAUTH_SERVER_CONFIG
 from .persistence.init_db import init_db
 from .persistence.session import get_engine
+from .route_classes import ROUTE_LIMITERS
+from .shedding import CoDelShedder
+from .throttle import LOGIN_THROTTLE, load_backend
+from .usecases import passwords
+from .usecases.access_matrix import ACCESS_MATRIX
 
 
 def __handle_signal(sig: int, _frame: FrameType | None) -> None:
@@ -25,10 +32,54 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
         signal.signal(signal.SIGTERM, __handle_signal)
         signal.signal(signal.SIGINT, __handle_signal)
 
+    cfg = ZENAUTH_SERVER_CONFIG()
+    # The library writes audit records synchronously; the server queues them
+    # unless ZENAUTH_AUDIT_BACKGROUND says otherwise.
+    configure_audit_logging(background_by_default=True)
+    passwords.configure_context(cfg.password_scheme_list(), cfg.password_costs())
+
     try:
         init_db(get_engine())
     except Exception as e:
         LOGGER.exception("Failed to initialize database", exc_info=e)
         raise
 
-    yield
+    passwords.configure(cfg.password_executor, workers=cfg.password_workers)
+
+    PASSWORD_ADMISSION.configure(
+        max_concurrent=cfg.admission_password_max_concurrent,
+        max_queue=cfg.admission_password_max_queue,
+        queue_timeout_sec=cfg.admission_password_queue_timeout_sec,
+    )
+
+    verify_shedder = CoDelShedder(
+        target_sec=cfg.shed_verify_target_ms / 1000.0,
+        interval_sec=cfg.shed_verify_interval_ms / 1000.0,
+        max_wait_sec=cfg.shed_verify_max_wait_ms / 1000.0,
+    )
+    ROUTE_LIMITERS.configure(
+        {"verify": cfg.concurrency_verify, "auth": cfg.concurrency_auth, "admin": cfg.concurrency_admin},
+        shedders={"verify": verify_shedder} if cfg.shed_verify_enabled else None,
+        max_queue=cfg.concurrency_max_queue,
+        max_wait_sec=cfg.concurrency_queue_timeout_sec,
+        threadpool_size=cfg.threadpool_size,
+        autosize_threadpool=cfg.threadpool_autosize,
+        password_slots=PASSWORD_ADMISSION.max_concurrent,
+    )
+    LOGIN_THROTTLE.configure(
+        enabled=cfg.login_throttle_enabled,
+        window_sec=cfg.login_throttle_window_sec,
+        max_user_failures=cfg.login_throttle_max_user_failures,
+        max_ip_failures=cfg.login_throttle_max_ip_failures,
+        backend=load_backend(cfg.login_throttle_backend),
+    )
+    ACCESS_MATRIX.configure(ttl_sec=cfg.access_matrix_ttl_sec)
+
+    try:
+        yield
+    finally:
+        passwords.shutdown()
+        # Audit records are written by a background thread; don't lose the
+        # tail of the log on shutdown.
+        if not flush_audit_log():
+            LOGGER.warning("Audit log flush timed out on shutdown")
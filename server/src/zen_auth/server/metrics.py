@@ -0,0 +1,270 @@
+"""In-process metrics in the Prometheus text exposition format.
+
+A deliberately small registry (counters, histograms and collector callbacks)
+so the server needs no extra dependency. `GET /metrics` renders everything:
+
+- HTTP requests by route name, method and status, and latency per route
+- DB pool usage, the time a request waits for a pooled connection, statement
+  time and slow statements
+- password hash/verify timing and in-flight operations
+- JWT encode/decode counts and timing
+- admission, throttling, route class, shedding and audit queue counters
+- hit/miss counts of the server's `lru_cache`s
+"""
+
+from __future__ import annotations
+
+import bisect
+import hmac
+import math
+import threading
+from contextlib import contextmanager
+from functools import _lru_cache_wrapper
+from time import perf_counter
+from typing import Callable, Iterable, Iterator, Sequence
+
+from fastapi import Request
+from fastapi.responses import PlainTextResponse
+from starlette.types import Scope
+from zen_auth.config import ZENAUTH_CONFIG
+from zen_auth.logger import audit_log_stats
+
+from .config import ZENAUTH_SERVER_CONFIG
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; tuned for sub-millisecond verify calls up to multi-second logins.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+LabelValues = tuple[str, ...]
+# (metric name suffix, label pairs, value)
+Sample = tuple[str, Sequence[tuple[str, str]], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs: Sequence[tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(labelvalues, 0.0)
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+        for labelvalues, value in items:
+            yield "", tuple(zip(self.labelnames, labelvalues)), value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (per-bucket counts incl. +Inf, sum)
+        self._values: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labelvalues)
+            if entry is None:
+                entry = self._values[labelvalues] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][idx] += 1
+            entry[1][0] += value
+
+    @contextmanager
+    def time(self, *labelvalues: str) -> Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - start, *labelvalues)
+
+    def count(self, *labelvalues: str) -> int:
+        entry = self._values.get(labelvalues)
+        return sum(entry[0]) if entry else 0
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            items = [(k, list(counts), total[0]) for k, (counts, total) in self._values.items()]
+        for labelvalues, counts, total in items:
+            labels = tuple(zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, n in zip((*self.buckets, math.inf), counts):
+                cumulative += n
+                yield "_bucket", (*labels, ("le", _format_value(bound))), cumulative
+            yield "_count", labels, cumulative
+            yield "_sum", labels, total
+
+
+class Collector:
+    """Samples computed at scrape time (gauges and counters kept elsewhere)."""
+
+    def __init__(self, name: str, help: str, kind: str, fn: Callable[[], Iterable[Sample]]) -> None:
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.fn = fn
+
+    def samples(self) -> Iterable[Sample]:
+        return self.fn()
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric | Collector] = {}
+
+    def register(self, metric: _Metric | Collector) -> None:
+        self._metrics[metric.name] = metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help, labelnames)
+        self.register(metric)
+        return metric
+
+    def histogram(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        metric = Histogram(name, help, labelnames, buckets)
+        self.register(metric)
+        return metric
+
+    def collector(
+        self, name: str, help: str, kind: str = "gauge"
+    ) -> Callable[[Callable[[], Iterable[Sample]]], Callable[[], Iterable[Sample]]]:
+        """Decorator registering a scrape-time sample function."""
+
+        def deco(fn: Callable[[], Iterable[Sample]]) -> Callable[[], Iterable[Sample]]:
+            self.register(Collector(name, help, kind, fn))
+            return fn
+
+        return deco
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "zenauth_http_requests_total", "HTTP requests by route, method and status.", ("route", "method", "status")
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    "zenauth_http_request_duration_seconds", "HTTP request latency by route.", ("route",)
+)
+DB_POOL_WAIT = REGISTRY.histogram(
+    "zenauth_db_pool_wait_seconds", "Time a request waited for a pooled DB connection."
+)
+DB_QUERY_SECONDS = REGISTRY.histogram("zenauth_db_query_seconds", "SQL statement execution time.")
+DB_SLOW_QUERIES = REGISTRY.counter(
+    "zenauth_db_slow_queries_total", "SQL statements slower than `slow_query_ms`."
+)
+PASSWORD_SECONDS = REGISTRY.histogram(
+    "zenauth_password_seconds",
+    "Password hash/verify time including executor queueing, by operation.",
+    ("op",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.5, 5.0),
+)
+JWT_SECONDS = REGISTRY.histogram(
+    "zenauth_jwt_seconds",
+    "JWT encode/decode time by operation.",
+    ("op",),
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.005),
+)
+JWT_ERRORS = REGISTRY.counter("zenauth_jwt_decode_errors_total", "JWTs that failed to decode.")
+
+
+def route_label(scope: Scope) -> str:
+    # The route name (see `url_names`) keeps the label set bounded: no path
+    # parameters such as user names end up in label values.
+    name = getattr(scope.get("route"), "name", None)
+    return name if isinstance(name, str) else "unmatched"
+
+
+def observe_request(scope: Scope, status_code: int, duration_sec: float) -> None:
+    route = route_label(scope)
+    HTTP_REQUESTS.inc(route, scope["method"], str(status_code))
+    HTTP_LATENCY.observe(duration_sec, route)
+
+
+def stats_samples(stats: dict[str, int] | dict[str, int | bool], **labels: str) -> Iterator[Sample]:
+    """Turn a `stats()` dict into samples labelled with its keys as `field`."""
+
+    pairs = tuple(labels.items())
+    for field, value in stats.items():
+        yield "", (*pairs, ("field", field)), float(value)
+
+
+def lru_cache_samples(caches: dict[str, _lru_cache_wrapper[object]]) -> Iterator[Sample]:
+    for name, fn in caches.items():
+        info = fn.cache_info()
+        yield "", (("cache", name), ("result", "hit")), float(info.hits)
+        yield "", (("cache", name), ("result", "miss")), float(info.misses)
+
+
+@REGISTRY.collector("zenauth_audit_queue", "Background audit log pipeline counters by field.")
+def _audit_samples() -> Iterator[Sample]:
+    return stats_samples(audit_log_stats())
+
+
+@REGISTRY.collector("zenauth_cache_requests_total", "lru_cache lookups by cache and result.", "counter")
+def _cache_samples() -> Iterator[Sample]:
+    return lru_cache_samples({"zenauth_config": ZENAUTH_CONFIG, "server_config": ZENAUTH_SERVER_CONFIG})
+
+
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    token = ZENAUTH_SERVER_CONFIG().metrics_token
+    if token:
+        scheme, _, given = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(given.encode(), token.encode()):
+            return PlainTextResponse("Unauthorized", status_code=401, headers={"WWW-Authenticate": "Bearer"})
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -1,13 +1,46 @@
+"""Server ASGI middlewares.
+
+These are plain ASGI callables rather than `BaseHTTPMiddleware` subclasses:
+they add no extra task or body-stream wrapping per layer and keep streaming
+responses intact. Configuration is resolved once, when Starlette builds the
+middleware stack, instead of on every request.
+"""
+
 import logging
 import time
-from typing import Awaitable, Callable
+from contextvars import Token
 from urllib.parse import urlparse
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+import anyio
+from starlette.requests import cookie_parser
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from zen_auth.config import ZENAUTH_CONFIG
+from zen_auth.timing import (
+    Phases,
+    current_phases,
+    record_phase,
+    server_timing_header,
+    start_timing,
+    stop_timing,
+)
 
+from .api.util.req_id import bind_req_id
 from .config import ZENAUTH_SERVER_CONFIG
+from .metrics import observe_request
+from .persistence.query_log import DBTime, start_db_accounting, stop_db_accounting
+from .profiling import (
+    PROFILE_HEADER,
+    REQUEST_PROFILES,
+    RequestProfile,
+    activate,
+    authorize,
+    deactivate,
+    wants_profile,
+)
+from .route_classes import ROUTE_LIMITERS, route_class
+
+_ACCESS_LOGGER = logging.getLogger("access")
 
 
 def _split_csv(value: str) -> list[str]:
@@ -24,77 +57,203 @@ def _origin_from_url(url: str) -> str | None:
         return None
 
 
-class CSRFMiddleware(BaseHTTPMiddleware):
-    _UNSAFE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+class CSRFPolicy:
+    """Origin/Referer check for cookie-authenticated unsafe requests.
 
-    async def dispatch(
-        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
-    ) -> Response:
-        cfg = ZENAUTH_SERVER_CONFIG()
-        if not cfg.csrf_protect:
-            return await call_next(request)
+    Trusted origins come from `csrf_trusted_origins`, falling back to
+    `cors_allow_origins` (unless it is `*`), and finally to the request's own
+    host when neither is configured.
+    """
 
-        if request.method.upper() not in self._UNSAFE_METHODS:
-            return await call_next(request)
+    _UNSAFE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
 
-        auth_cookie_name = ZENAUTH_CONFIG().cookie_name
-        if auth_cookie_name not in request.cookies:
-            return await call_next(request)
+    def __init__(self) -> None:
+        cfg = ZENAUTH_SERVER_CONFIG()
+        self.enabled = cfg.csrf_protect
+        self.allow_no_origin = cfg.csrf_allow_no_origin
+        self.cookie_name = ZENAUTH_CONFIG().cookie_name
 
-        # Resolve trusted origins.
         trusted_raw = cfg.csrf_trusted_origins.strip()
+        cors_raw = cfg.cors_allow_origins.strip()
+        # None means "same origin as the request".
+        self.trusted: frozenset[str] | None
         if trusted_raw:
-            trusted = set(_split_csv(trusted_raw))
+            self.trusted = frozenset(_split_csv(trusted_raw))
+        elif cors_raw and cors_raw != "*":
+            self.trusted = frozenset(_split_csv(cors_raw))
         else:
-            cors_raw = cfg.cors_allow_origins.strip()
-            if cors_raw and cors_raw != "*":
-                trusted = set(_split_csv(cors_raw))
-            else:
-                host = request.headers.get("host")
-                request_origin = f"{request.url.scheme}://{host}" if host else None
-                trusted = {request_origin} if request_origin else set()
+            self.trusted = None
+
+    def check(self, scope: Scope) -> str | None:
+        """Return the failure reason, or None when the request may proceed."""
+
+        if not self.enabled or scope["method"].upper() not in self._UNSAFE_METHODS:
+            return None
+
+        host = origin = referer = cookie = None
+        for key, value in scope["headers"]:
+            if key == b"host":
+                host = value.decode("latin-1")
+            elif key == b"origin":
+                origin = value.decode("latin-1")
+            elif key == b"referer":
+                referer = value.decode("latin-1")
+            elif key == b"cookie":
+                cookie = value.decode("latin-1")
+
+        if not cookie or self.cookie_name not in cookie_parser(cookie):
+            return None
+
+        trusted = self.trusted
+        if trusted is None:
+            trusted = frozenset({f"{scope.get('scheme', 'http')}://{host}"} if host else ())
 
-        origin = request.headers.get("origin")
         if origin:
-            if origin not in trusted:
-                return Response(status_code=403, content="CSRF verification failed (origin)")
-            return await call_next(request)
+            return None if origin in trusted else "origin"
 
-        referer = request.headers.get("referer")
         if referer:
             ref_origin = _origin_from_url(referer)
-            if not ref_origin or ref_origin not in trusted:
-                return Response(status_code=403, content="CSRF verification failed (referer)")
-            return await call_next(request)
+            return None if ref_origin and ref_origin in trusted else "referer"
 
-        if cfg.csrf_allow_no_origin:
-            return await call_next(request)
+        return None if self.allow_no_origin else "missing origin"
 
-        return Response(status_code=403, content="CSRF verification failed (missing origin)")
 
+def _csrf_failure(reason: str) -> Response:
+    return Response(status_code=403, content=f"CSRF verification failed ({reason})")
 
-class AccessLogWithTimeMiddleware(BaseHTTPMiddleware):
-    async def dispatch(
-        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
-    ) -> Response:
 
-        start: float = time.perf_counter()
-        response: Response = await call_next(request)
-        duration_ms: float = (time.perf_counter() - start) * 1000.0
-        client_addr = request.client.host if request.client else "-"
+def _log_access(
+    scope: Scope, status_code: int, start: float, phases: Phases | None = None, db: DBTime | None = None
+) -> None:
+    duration = time.perf_counter() - start
+    observe_request(scope, status_code, duration)
+    if not _ACCESS_LOGGER.isEnabledFor(logging.INFO):
+        return
 
-        request_line: str = (
-            f"{request.method} {request.url.path} " f"HTTP/{request.scope.get('http_version', '1.1')}"
-        )
+    duration_ms = duration * 1000.0
+    client = scope.get("client")
+    request_line = f"{scope['method']} {scope['path']} HTTP/{scope.get('http_version', '1.1')}"
+    extra = {
+        "client_addr": client[0] if client else "-",
+        "request_line": request_line,
+        "status_code": status_code,
+        "duration_ms": f"{duration_ms:.2f}",
+    }
+    if db is not None:
+        extra["db_ms"] = f"{db.ms:.2f}"
+        extra["db_queries"] = db.queries
+    if phases is not None:
+        extra["server_timing"] = " ".join(f"{name}={ms:.2f}" for name, ms in phases.items())
+    _ACCESS_LOGGER.info(request_line, extra=extra)
 
-        logging.getLogger("access").info(
-            request_line,
-            extra={
-                "client_addr": client_addr,
-                "request_line": request_line,
-                "status_code": response.status_code,
-                "duration_ms": f"{duration_ms:.2f}",
-            },
+
+class ServerMiddleware:
+    """Access log, request id, CSRF check and route class limit in a single layer.
+
+    Does the work of separate access log, request id (`RequestIDMiddleWare`)
+    and CSRF (`CSRFPolicy`) layers, outermost first, but with one `send`
+    wrapper and one pass over the request headers. Requests then wait for their route class
+    limiter (see `route_classes`), or are shed with 503 when that queue is
+    overloaded (see `shedding`); the access log time includes that wait. DB
+    statement time is accounted per request (see `persistence.query_log`) and
+    logged with the access line.
+
+    With `profiling_enabled`, admin requests sent with `X-ZenAuth-Profile`
+    are profiled (see `profiling`); the response names the stored report.
+
+    With `server_timing` enabled, verify and auth requests collect phase
+    timings (see `zen_auth.timing`) that are sent as a `Server-Timing` header
+    and written to the access log.
+    """
+
+    _TIMED_CLASSES = frozenset({"verify", "auth"})
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.csrf = CSRFPolicy()
+        self.server_timing = ZENAUTH_SERVER_CONFIG().server_timing
+        self.profiling = ZENAUTH_SERVER_CONFIG().profiling_enabled
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        req_id = bind_req_id(scope)
+        req_id_header = (b"x-request-id", req_id.encode("latin-1"))
+        db, db_token = start_db_accounting(req_id)
+        status_code = 500
+        timing = (
+            start_timing()
+            if self.server_timing and route_class(scope["path"]) in self._TIMED_CLASSES
+            else None
         )
+        phases = current_phases() if timing is not None else None
+        profile: RequestProfile | None = None
+        profile_token: Token[RequestProfile | None] | None = None
+
+        # Route class slot, held until the response starts. It is borrowed on
+        # behalf of the request: the response may be sent from another task.
+        slot: anyio.CapacityLimiter | None = None
+        borrower = object()
+
+        def release_slot() -> None:
+            nonlocal slot
+            if slot is not None:
+                slot.release_on_behalf_of(borrower)
+                slot = None
 
-        return response
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                # A streamed body (exports, reports) is sent after the handler
+                # returned; it must not keep the class slot meanwhile.
+                release_slot()
+                status_code = message["status"]
+                headers = [*message.get("headers", ()), req_id_header]
+                if phases is not None:
+                    phases["total"] = (time.perf_counter() - start) * 1000.0
+                    headers.append((b"server-timing", server_timing_header(phases).encode("latin-1")))
+                if profile is not None:
+                    headers.append((PROFILE_HEADER.encode("latin-1"), req_id_header[1]))
+                message["headers"] = headers
+            await send(message)
+
+        async def start_profile() -> None:
+            # Checking the admin token is a DB lookup: only once CSRF and the
+            # class limiter have let the request through.
+            nonlocal profile, profile_token
+            if self.profiling and wants_profile(scope) and await authorize(scope):
+                profile = RequestProfile()
+                profile_token = activate(profile)
+
+        try:
+            reason = self.csrf.check(scope)
+            route = ROUTE_LIMITERS.lookup(scope["path"])
+            if reason is not None:
+                await _csrf_failure(reason)(scope, receive, send_wrapper)
+            elif route is None:
+                await start_profile()
+                await self.app(scope, receive, send_wrapper)
+            else:
+                limiter, queue = route
+                queued = time.perf_counter()
+                if not await queue.acquire(limiter, borrower):
+                    await queue.reject_response()(scope, receive, send_wrapper)
+                    return
+                slot = limiter
+                record_phase("queue", (time.perf_counter() - queued) * 1000.0)
+                try:
+                    await start_profile()
+                    await self.app(scope, receive, send_wrapper)
+                finally:
+                    release_slot()
+        finally:
+            if timing is not None:
+                stop_timing(timing)
+            stop_db_accounting(db_token)
+            if profile_token is not None and profile is not None:
+                deactivate(profile_token)
+                REQUEST_PROFILES.put(req_id, profile)
+            _log_access(scope, status_code, start, phases, db)
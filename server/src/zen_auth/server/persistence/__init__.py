@@ -1,11 +1,12 @@
 from .base import Base
 from .init_db import init_db
-from .models import RoleOrm, ScopeOrm, UserOrm, role_scopes, user_roles
+from .models import PolicyEventOrm, RoleOrm, ScopeOrm, UserOrm, role_scopes, user_roles
 from .session import (
     create_engine_from_dsn,
     create_sessionmaker,
     get_engine,
     get_session,
+    get_sessionmaker,
     session_scope,
 )
 
@@ -14,6 +15,7 @@ __all__ = [
     "UserOrm",
     "RoleOrm",
     "ScopeOrm",
+    "PolicyEventOrm",
     "user_roles",
     "role_scopes",
     "create_engine_from_dsn",
@@ -21,5 +23,6 @@ __all__ = [
     "create_sessionmaker",
     "session_scope",
     "get_session",
+    "get_sessionmaker",
     "init_db",
 ]
@@ -6,7 +6,7 @@ from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
 from zen_auth.logger import LOGGER
 
-from ..usecases.user_service import pwd_ctx
+from ..usecases.passwords import hash_password
 from .base import Base
 from .models import RoleOrm, UserOrm
 
@@ -56,7 +56,7 @@ def init_db(engine: Engine) -> None:
                 session.add(
                     UserOrm(
                         user_name=user_name,
-                        password=pwd_ctx.hash(password),
+                        password=hash_password(password),
                         roles=[role],
                         real_name="Administrator",
                         division="admin",
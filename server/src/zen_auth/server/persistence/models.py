@@ -114,3 +114,16 @@ class ClientAppOrm(Base):
     updated_at: Mapped[DT.datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
     )
+
+
+class PolicyEventOrm(Base):
+    __tablename__ = "policy_events"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    kind: Mapped[str] = mapped_column(String(32), nullable=False)
+    subject: Mapped[str] = mapped_column(String(255), nullable=False)
+    policy_epoch: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    created_at: Mapped[DT.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
@@ -0,0 +1,106 @@
+"""Per-request DB time accounting and the slow-query log.
+
+`install_query_hooks` adds `before/after_cursor_execute` listeners to an
+engine. Every statement's duration is added to the current request's
+`DBTime` (opened by `ServerMiddleware` with `start_db_accounting`, and
+reported as `db_ms` / `db_queries` in the access log) and to the `db`
+`Server-Timing` phase. Statements slower than the threshold are logged to
+`zen_auth.slow_query` with the request id; bound parameters are never
+logged, only their names (or their count for positional parameters).
+"""
+
+from __future__ import annotations
+
+import logging
+from contextvars import ContextVar, Token
+from time import perf_counter
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+from zen_auth.timing import record_phase
+
+from ..metrics import DB_QUERY_SECONDS, DB_SLOW_QUERIES
+
+SLOW_QUERY_LOGGER = logging.getLogger("zen_auth.slow_query")
+
+_START_KEY = "zen_auth_query_start"
+
+
+class DBTime:
+    """Accumulated statement time of one request."""
+
+    __slots__ = ("req_id", "ms", "queries")
+
+    def __init__(self, req_id: str = "--") -> None:
+        self.req_id = req_id
+        self.ms = 0.0
+        self.queries = 0
+
+
+_DB_TIME: ContextVar[DBTime | None] = ContextVar("zen_auth_db_time", default=None)
+
+
+def start_db_accounting(req_id: str = "--") -> tuple[DBTime, Token[DBTime | None]]:
+    db = DBTime(req_id)
+    return db, _DB_TIME.set(db)
+
+
+def stop_db_accounting(token: Token[DBTime | None]) -> None:
+    _DB_TIME.reset(token)
+
+
+def current_db_time() -> DBTime | None:
+    return _DB_TIME.get()
+
+
+def redact_params(params: Any) -> str:
+    """Describe bound parameters without their values."""
+
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{k}=?" for k in params) + "}"
+    if isinstance(params, (list, tuple)):
+        if params and isinstance(params[0], (dict, list, tuple)):
+            # executemany
+            return f"<{len(params)} rows: {redact_params(params[0])}>"
+        return f"<{len(params)} params>"
+    return "<none>" if params is None else "<redacted>"
+
+
+def install_query_hooks(engine: Engine, *, slow_query_ms: float) -> None:
+    """Account statement time on `engine`; `slow_query_ms <= 0` disables the slow log."""
+
+    slow_sec = slow_query_ms / 1000.0 if slow_query_ms > 0 else None
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(
+        conn: Connection, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+    ) -> None:
+        conn.info.setdefault(_START_KEY, []).append(perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(
+        conn: Connection, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+    ) -> None:
+        starts = conn.info.get(_START_KEY)
+        if not starts:
+            return
+        elapsed = perf_counter() - starts.pop()
+        DB_QUERY_SECONDS.observe(elapsed)
+        ms = elapsed * 1000.0
+        db = _DB_TIME.get()
+        if db is not None:
+            db.ms += ms
+            db.queries += 1
+        record_phase("db", ms)
+        if slow_sec is not None and elapsed >= slow_sec:
+            DB_SLOW_QUERIES.inc()
+            req_id = db.req_id if db is not None else "--"
+            SLOW_QUERY_LOGGER.warning(
+                "Slow query (%.2f ms, req_id=%s): %s params=%s",
+                ms,
+                req_id,
+                " ".join(statement.split()),
+                redact_params(parameters),
+                extra={"req_id": req_id, "duration_ms": f"{ms:.2f}"},
+            )
@@ -2,27 +2,78 @@ from __future__ import annotations
 
 import contextlib
 from collections.abc import Iterator
+from functools import lru_cache
+from time import perf_counter
 
 from sqlalchemy import create_engine
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import QueuePool, StaticPool
 
 from ..config import ZENAUTH_SERVER_CONFIG
+from ..metrics import DB_POOL_WAIT, REGISTRY, Sample
+from .query_log import install_query_hooks
+
+
+def _is_sqlite_memory(dsn: str) -> bool:
+    return dsn.startswith("sqlite") and (":memory:" in dsn or dsn.rstrip("/").endswith("sqlite:"))
 
 
 def create_engine_from_dsn(dsn: str) -> Engine:
-    if dsn.startswith("sqlite"):
+    if _is_sqlite_memory(dsn):
+        # One shared connection, otherwise every connection is a new database.
         return create_engine(
             dsn,
             poolclass=StaticPool,
             connect_args={"check_same_thread": False},
         )
+    if dsn.startswith("sqlite"):
+        return create_engine(dsn, connect_args={"check_same_thread": False})
     return create_engine(dsn, pool_pre_ping=True)
 
 
+@lru_cache(maxsize=8)
+def _engine_for(dsn: str) -> Engine:
+    engine = create_engine_from_dsn(dsn)
+    install_query_hooks(engine, slow_query_ms=ZENAUTH_SERVER_CONFIG().slow_query_ms)
+    return engine
+
+
 def get_engine() -> Engine:
-    return create_engine_from_dsn(ZENAUTH_SERVER_CONFIG().dsn)
+    """Engine for the configured DSN, shared by all requests (one pool per process and DSN)."""
+
+    return _engine_for(ZENAUTH_SERVER_CONFIG().dsn)
+
+
+@lru_cache(maxsize=8)
+def _sessionmaker_for(engine: Engine) -> sessionmaker[Session]:
+    return create_sessionmaker(engine)
+
+
+def get_sessionmaker() -> sessionmaker[Session]:
+    """Session factory of the configured engine.
+
+    For work that outlives the `get_session` dependency, e.g. the body of a
+    streamed response.
+    """
+
+    return _sessionmaker_for(get_engine())
+
+
+@REGISTRY.collector(
+    "zenauth_db_pool", "DB connection pool state by field (checked_out, overflow, size, ...)."
+)
+def _pool_samples() -> Iterator[Sample]:
+    # Only engines created for the configured DSN; other engines (scripts,
+    # tests) manage their own pools.
+    if _engine_for.cache_info().currsize == 0:
+        return
+    pool = get_engine().pool
+    if isinstance(pool, QueuePool):
+        yield "", (("field", "checked_out"),), float(pool.checkedout())
+        yield "", (("field", "checked_in"),), float(pool.checkedin())
+        yield "", (("field", "size"),), float(pool.size())
+        yield "", (("field", "overflow"),), float(max(0, pool.overflow()))
 
 
 def create_sessionmaker(engine: Engine) -> sessionmaker[Session]:
@@ -45,7 +96,9 @@ def session_scope(session_factory: sessionmaker[Session]) -> Iterator[Session]:
 def get_session() -> Iterator[Session]:
     """FastAPI dependency: yields a DB session bound to configured engine."""
 
-    engine = get_engine()
-    session_factory = create_sessionmaker(engine)
-    with session_scope(session_factory) as session:
+    with session_scope(_sessionmaker_for(get_engine())) as session:
+        # Check out the connection up front to measure pool waits.
+        start = perf_counter()
+        session.connection()
+        DB_POOL_WAIT.observe(perf_counter() - start)
         yield session
@@ -0,0 +1,310 @@
+"""On-demand profiling of a live worker (admin only, `profiling_enabled`).
+
+Two tools:
+
+- `sample_stacks` samples the Python stacks of every thread of this process
+  at a fixed interval (`GET /admin/profile`). Output is either collapsed
+  stacks (`frame;frame;frame count`, for flamegraph.pl / speedscope) or a
+  speedscope JSON document. Idle threads (waiting for work or I/O) are
+  skipped by default.
+- Per-request deterministic profiles: an admin request sent with
+  `X-ZenAuth-Profile: 1` runs its sync endpoint under `cProfile`. The response carries `X-ZenAuth-Profile: <req_id>`; the pstats
+  report is kept in a small in-memory ring and served at
+  `GET /admin/profile/requests/{req_id}`.
+
+cProfile only sees the thread it was enabled in, and sync endpoints run on
+threadpool threads. The API routers therefore use `ProfiledRoute`, which
+wraps sync endpoints when the routers are defined (at import, whatever
+`profiling_enabled` says): the wrapper looks up the current request's
+profile (a context variable, copied into the worker thread) and is a plain
+call otherwise. Dependencies (e.g. the auth guard) are not included.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import functools
+import inspect
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextvars import ContextVar, Token
+from typing import Any, Callable
+
+import anyio
+import anyio.to_thread
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+from starlette.types import Scope
+from zen_auth.claims import _extract_bearer
+from zen_auth.config import ZENAUTH_CONFIG
+
+from .claims_self import ClaimsSelf
+from .persistence.session import create_sessionmaker, get_engine, session_scope
+from .usecases import rbac_checks
+
+PROFILE_HEADER = "x-zenauth-profile"
+
+# (file name, function) of frames that mean "this thread is waiting".
+_IDLE_LEAVES = frozenset(
+    {
+        ("threading.py", "wait"),
+        ("threading.py", "_wait_for_tstate_lock"),
+        ("selectors.py", "select"),
+        ("queue.py", "get"),
+        ("connection.py", "wait"),
+        ("socket.py", "accept"),
+    }
+)
+
+
+def _frame_name(code: Any) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def sample_stacks(
+    duration_sec: float, interval_sec: float = 0.005, include_idle: bool = False
+) -> Counter[str]:
+    """Sample all threads for `duration_sec`; return collapsed stack -> sample count."""
+
+    me = threading.get_ident()
+    counts: Counter[str] = Counter()
+    deadline = time.perf_counter() + duration_sec
+    while time.perf_counter() < deadline:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            code = frame.f_code
+            if not include_idle and (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES:
+                continue
+            stack: list[str] = []
+            f: Any = frame
+            while f is not None:
+                stack.append(_frame_name(f.f_code))
+                f = f.f_back
+            stack.append(names.get(ident, str(ident)))
+            counts[";".join(reversed(stack))] += 1
+        time.sleep(interval_sec)
+    return counts
+
+
+def collapsed(counts: Counter[str]) -> str:
+    return "".join(f"{stack} {n}\n" for stack, n in counts.most_common())
+
+
+def speedscope(counts: Counter[str], *, interval_sec: float, name: str = "zen_auth") -> dict[str, object]:
+    """Speedscope "sampled" profile; weights are seconds (samples x interval)."""
+
+    frames: list[dict[str, str]] = []
+    index: dict[str, int] = {}
+    samples: list[list[int]] = []
+    weights: list[float] = []
+    for stack, n in counts.most_common():
+        ids = []
+        for frame in stack.split(";"):
+            if frame not in index:
+                index[frame] = len(frames)
+                frames.append({"name": frame})
+            ids.append(index[frame])
+        samples.append(ids)
+        weights.append(n * interval_sec)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "zen_auth",
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }
+        ],
+    }
+
+
+class StackSampler:
+    """Runs one sampling session at a time, on its own thread."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+
+    async def run(
+        self, duration_sec: float, interval_sec: float, include_idle: bool = False
+    ) -> Counter[str] | None:
+        """Sample for `duration_sec`; None if another session is running."""
+
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            # A private limiter: the sampler must not take a default threadpool token.
+            return await anyio.to_thread.run_sync(
+                sample_stacks, duration_sec, interval_sec, include_idle, limiter=anyio.CapacityLimiter(1)
+            )
+        finally:
+            self._lock.release()
+
+
+SAMPLER = StackSampler()
+
+
+# Python 3.12+ allows a single active cProfile profiler per process
+# ("Another profiling tool is already active"), so profiled calls take turns.
+_CPROFILE_LOCK = threading.Lock()
+
+
+class RequestProfile:
+    """cProfile data of one request, collected from every thread it ran on.
+
+    A call that starts while another profiled call is running is not waited
+    for: it runs unprofiled and the report says the profiler was busy.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._profiles: list[cProfile.Profile] = []
+        self._busy = 0
+
+    def _skip(self) -> None:
+        with self._lock:
+            self._busy += 1
+
+    def call(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        if not _CPROFILE_LOCK.acquire(blocking=False):
+            self._skip()
+            return fn(*args, **kwargs)
+        try:
+            prof = cProfile.Profile()
+            try:
+                prof.enable()
+            except ValueError:
+                # Some other profiling tool owns the process-wide hook.
+                self._skip()
+                return fn(*args, **kwargs)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                prof.disable()
+                with self._lock:
+                    self._profiles.append(prof)
+        finally:
+            _CPROFILE_LOCK.release()
+
+    def report(self, limit: int = 60) -> str:
+        with self._lock:
+            profiles = list(self._profiles)
+            busy = self._busy
+        note = f"{busy} call(s) not profiled: the profiler was busy with another request.\n" if busy else ""
+        if not profiles:
+            return note or "No sync endpoint ran for this request.\n"
+        out = io.StringIO()
+        out.write(note)
+        pstats.Stats(*profiles, stream=out).sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+
+_REQUEST_PROFILE: ContextVar[RequestProfile | None] = ContextVar("zen_auth_request_profile", default=None)
+
+
+def activate(profile: RequestProfile) -> Token[RequestProfile | None]:
+    return _REQUEST_PROFILE.set(profile)
+
+
+def deactivate(token: Token[RequestProfile | None]) -> None:
+    _REQUEST_PROFILE.reset(token)
+
+
+class ProfileStore:
+    """The most recent request profiles, by request id."""
+
+    def __init__(self, max_entries: int = 16) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._items: OrderedDict[str, RequestProfile] = OrderedDict()
+
+    def put(self, req_id: str, profile: RequestProfile) -> None:
+        with self._lock:
+            self._items[req_id] = profile
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def get(self, req_id: str) -> RequestProfile | None:
+        with self._lock:
+            return self._items.get(req_id)
+
+
+REQUEST_PROFILES = ProfileStore()
+
+
+def _is_plain_sync(call: object) -> bool:
+    return (
+        inspect.isfunction(call)
+        and not asyncio.iscoroutinefunction(call)
+        and not inspect.isgeneratorfunction(call)
+        and not inspect.isasyncgenfunction(call)
+    )
+
+
+def _profiled(fn: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        profile = _REQUEST_PROFILE.get()
+        if profile is None:
+            return fn(*args, **kwargs)
+        return profile.call(fn, *args, **kwargs)
+
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """`APIRoute` whose sync endpoint can be profiled per request.
+
+    Used as `route_class` of the API routers. FastAPI reads the endpoint's
+    signature through `functools.wraps`, so the wrapper is transparent; it
+    costs one context variable lookup per call.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        super().__init__(path, _profiled(endpoint) if _is_plain_sync(endpoint) else endpoint, **kwargs)
+
+
+def wants_profile(scope: Scope) -> bool:
+    for key, value in scope["headers"]:
+        if key == PROFILE_HEADER.encode("latin-1"):
+            return value.strip() not in (b"", b"0")
+    return False
+
+
+def _is_admin_token(token: str) -> bool:
+    with session_scope(create_sessionmaker(get_engine())) as session:
+        try:
+            _, user = ClaimsSelf._verify_token_with_session(session, token)
+        except Exception:
+            return False
+        return rbac_checks.has_required_roles(user.roles, ["admin"]) or rbac_checks.has_required_scopes(
+            session, user.user_name, ["edit:auth_server"]
+        )
+
+
+async def authorize(scope: Scope) -> bool:
+    """True if the request carries the token of an admin (role `admin` or scope `edit:auth_server`).
+
+    A token lookup in the DB: `ServerMiddleware` calls it after the CSRF
+    check and the route class limiter.
+    """
+
+    req = Request(scope)
+    token = req.cookies.get(ZENAUTH_CONFIG().cookie_name) or _extract_bearer(req.headers.get("authorization"))
+    if not token:
+        return False
+    return await anyio.to_thread.run_sync(_is_admin_token, token)
@@ -0,0 +1,221 @@
+"""Per route class concurrency limits.
+
+Sync endpoints and dependencies all run on anyio's default threadpool. Each
+route class (verify, auth, admin) gets its own `CapacityLimiter`, held by
+`ServerMiddleware` until the response starts (a streamed body does not keep
+the slot). With the threadpool sized to the sum of the class limits plus
+headroom (`autosize_threadpool`), a class can never occupy more threads than
+its own limit: a bcrypt storm on `/auth` or a slow admin page cannot starve
+`/verify`.
+
+Password endpoints (`PASSWORD_PATHS`) are the exception: their one gate is
+`admission.PASSWORD_ADMISSION`, so they take no class slot here (they still
+count as `auth` for timing). The autosized threadpool reserves threads for
+them too.
+
+Requests over a class limit queue (as cheap coroutines) on their own class
+only, and never without bound: `/verify` is shed CoDel-style (`shedding`),
+other classes wait in a `BoundedQueue` and get a fast `429` when it is full
+or their wait expires.
+
+Limiters are created by `configure()` from the server `lifespan`, inside the
+running event loop; until then requests are not limited.
+"""
+
+from __future__ import annotations
+
+from typing import Iterator, Literal, Protocol
+
+import anyio
+import anyio.to_thread
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp
+from zen_auth.logger import LOGGER
+
+from .metrics import REGISTRY, Sample, stats_samples
+from .shedding import CoDelShedder, borrow, try_borrow
+
+RouteClass = Literal["verify", "auth", "admin"]
+
+# Exact paths whose class differs from their prefix. `/verify/user` checks a
+# password, so it is timed with logins rather than token checks. The sampling
+# profiler only awaits (no thread) for up to a minute and must not hold an
+# admin slot meanwhile.
+ROUTE_CLASS_PATHS: dict[str, RouteClass | None] = {
+    "/zen_auth/v1/verify/user": "auth",
+    "/zen_auth/v1/admin/profile": None,
+}
+
+# Endpoints that verify or hash a password. `PASSWORD_ADMISSION` bounds them,
+# so the class limiter lets them through.
+PASSWORD_PATHS = frozenset(
+    {
+        "/zen_auth/v1/verify/user",
+        "/zen_auth/v1/auth/login",
+        "/zen_auth/v1/auth/change_password",
+    }
+)
+
+# Path prefix -> route class. Other routes (meta, long-poll, static) are not
+# limited here; they only share the threadpool headroom.
+ROUTE_CLASS_PREFIXES: tuple[tuple[str, RouteClass], ...] = (
+    ("/zen_auth/v1/verify/", "verify"),
+    ("/zen_auth/v1/auth/", "auth"),
+    ("/zen_auth/v1/admin/", "admin"),
+)
+
+
+def route_class(path: str) -> RouteClass | None:
+    if path in ROUTE_CLASS_PATHS:
+        return ROUTE_CLASS_PATHS[path]
+    for prefix, name in ROUTE_CLASS_PREFIXES:
+        if path.startswith(prefix):
+            return name
+    return None
+
+
+class ClassQueue(Protocol):
+    """How requests wait for a class slot (`CoDelShedder` or `BoundedQueue`)."""
+
+    async def acquire(self, limiter: anyio.CapacityLimiter, borrower: object | None = None) -> bool: ...
+
+    def reject_response(self) -> ASGIApp: ...
+
+    def stats(self) -> dict[str, int | bool]: ...
+
+
+class BoundedQueue:
+    """FIFO wait for a class slot: at most `max_queue` waiters, each for at most `max_wait_sec`."""
+
+    def __init__(self, *, max_queue: int = 64, max_wait_sec: float = 2.0) -> None:
+        self.max_queue = max(0, max_queue)
+        self.max_wait_sec = max_wait_sec
+        self._admitted = 0
+        self._rejected = 0
+        self._timed_out = 0
+
+    async def acquire(self, limiter: anyio.CapacityLimiter, borrower: object | None = None) -> bool:
+        """Borrow a token from `limiter`, or return False if the queue is full or the wait expires."""
+
+        if try_borrow(limiter, borrower):
+            self._admitted += 1
+            return True
+        if limiter.statistics().tasks_waiting >= self.max_queue:
+            self._rejected += 1
+            return False
+        with anyio.move_on_after(self.max_wait_sec):
+            await borrow(limiter, borrower)
+            self._admitted += 1
+            return True
+        self._timed_out += 1
+        return False
+
+    def reject_response(self) -> ASGIApp:
+        return JSONResponse(
+            {"detail": "Too many concurrent requests; retry later"},
+            status_code=429,
+            headers={"Retry-After": "1"},
+        )
+
+    def stats(self) -> dict[str, int | bool]:
+        return {"admitted": self._admitted, "rejected": self._rejected, "timed_out": self._timed_out}
+
+
+class RouteClassLimiters:
+    def __init__(self) -> None:
+        self.limiters: dict[RouteClass, anyio.CapacityLimiter] = {}
+        self.queues: dict[RouteClass, ClassQueue] = {}
+
+    def configure(
+        self,
+        limits: dict[RouteClass, int],
+        *,
+        shedders: dict[RouteClass, CoDelShedder] | None = None,
+        max_queue: int = 64,
+        max_wait_sec: float = 2.0,
+        threadpool_size: int = 0,
+        autosize_threadpool: bool = False,
+        password_slots: int = 0,
+        headroom: int = 8,
+    ) -> None:
+        """Create class limiters and their queues; optionally resize the default threadpool.
+
+        Args:
+            limits: Max concurrent requests per class; 0 leaves a class unlimited.
+            shedders: Classes whose queue is shed under overload (see `shedding`);
+                the others get a `BoundedQueue(max_queue, max_wait_sec)`.
+            threadpool_size: Set the process-wide default threadpool to this size.
+            autosize_threadpool: Without `threadpool_size`, size it to the sum
+                of the limits, `password_slots` (the password admission limit)
+                and `headroom` threads for other routes. Otherwise the
+                threadpool is left as it is.
+        """
+
+        self.limiters = {name: anyio.CapacityLimiter(n) for name, n in limits.items() if n > 0}
+        shedders = shedders or {}
+        self.queues = {
+            name: shedders.get(name) or BoundedQueue(max_queue=max_queue, max_wait_sec=max_wait_sec)
+            for name in self.limiters
+        }
+        total = threadpool_size or (
+            sum(limits.values()) + password_slots + headroom if autosize_threadpool else 0
+        )
+        if total:
+            pool = anyio.to_thread.current_default_thread_limiter()
+            LOGGER.info("Default threadpool size: %d -> %d", int(pool.total_tokens), total)
+            pool.total_tokens = total
+
+    def limiter_for(self, path: str) -> anyio.CapacityLimiter | None:
+        name = None if path in PASSWORD_PATHS else route_class(path)
+        return self.limiters.get(name) if name is not None else None
+
+    def lookup(self, path: str) -> tuple[anyio.CapacityLimiter, ClassQueue] | None:
+        name = None if path in PASSWORD_PATHS else route_class(path)
+        if name is None or name not in self.limiters:
+            return None
+        return self.limiters[name], self.queues[name]
+
+    def shed_stats(self) -> dict[str, dict[str, int | bool]]:
+        return {name: q.stats() for name, q in self.queues.items() if isinstance(q, CoDelShedder)}
+
+    def queue_stats(self) -> dict[str, dict[str, int | bool]]:
+        return {name: q.stats() for name, q in self.queues.items() if isinstance(q, BoundedQueue)}
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        out: dict[str, dict[str, int]] = {}
+        for name, limiter in self.limiters.items():
+            s = limiter.statistics()
+            out[name] = {
+                "limit": int(s.total_tokens),
+                "active": s.borrowed_tokens,
+                "waiting": s.tasks_waiting,
+            }
+        return out
+
+
+ROUTE_LIMITERS = RouteClassLimiters()
+
+
+@REGISTRY.collector("zenauth_route_class", "Route class concurrency (limit, active, waiting).")
+def _route_class_samples() -> Iterator[Sample]:
+    for name, stats in ROUTE_LIMITERS.stats().items():
+        yield from stats_samples(stats, route_class=name)
+
+
+@REGISTRY.collector("zenauth_shedding", "Route class load shedding (admitted, shed, overloaded).")
+def _shedding_samples() -> Iterator[Sample]:
+    for name, stats in ROUTE_LIMITERS.shed_stats().items():
+        yield from stats_samples(stats, route_class=name)
+
+
+@REGISTRY.collector(
+    "zenauth_route_class_queue", "Route class bounded queues (admitted, rejected, timed out)."
+)
+def _queue_samples() -> Iterator[Sample]:
+    for name, stats in ROUTE_LIMITERS.queue_stats().items():
+        yield from stats_samples(stats, route_class=name)
+
+
+def threadpool_stats() -> dict[str, int]:
+    s = anyio.to_thread.current_default_thread_limiter().statistics()
+    return {"limit": int(s.total_tokens), "active": s.borrowed_tokens, "waiting": s.tasks_waiting}
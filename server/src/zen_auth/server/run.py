@@ -8,11 +8,11 @@ from zen_auth.logger import LOGGER
 from . import ENV
 from .api import router
 from .api.util.error_redirect import error_redirect
-from .api.util.req_id import RequestIDMiddleWare
 from .api.v1.url_names import AUTH_LOGIN_PAGE, META_ENDPOINTS_API
 from .config import ZENAUTH_SERVER_CONFIG
 from .lifespan import lifespan
-from .middleware import AccessLogWithTimeMiddleware, CSRFMiddleware
+from .metrics import metrics_endpoint
+from .middleware import ServerMiddleware
 
 
 def _split_csv(value: str) -> list[str]:
@@ -24,31 +24,28 @@ def create_app() -> FastAPI:
         title="ZenAuth Authentication", version=ENV.BUILD, docs_url=None, redoc_url=None, lifespan=lifespan
     )
 
-    cors = ZENAUTH_SERVER_CONFIG()
-    cors_origins_raw = cors.cors_allow_origins.strip()
+    cfg = ZENAUTH_SERVER_CONFIG()
+    cors_origins_raw = cfg.cors_allow_origins.strip()
     if cors_origins_raw:
         allow_origins = ["*"] if cors_origins_raw == "*" else _split_csv(cors_origins_raw)
-        allow_methods = (
-            ["*"] if cors.cors_allow_methods.strip() == "*" else _split_csv(cors.cors_allow_methods)
-        )
-        allow_headers = (
-            ["*"] if cors.cors_allow_headers.strip() == "*" else _split_csv(cors.cors_allow_headers)
-        )
+        allow_methods = ["*"] if cfg.cors_allow_methods.strip() == "*" else _split_csv(cfg.cors_allow_methods)
+        allow_headers = ["*"] if cfg.cors_allow_headers.strip() == "*" else _split_csv(cfg.cors_allow_headers)
 
         app.add_middleware(
             CORSMiddleware,
             allow_origins=allow_origins,
-            allow_credentials=cors.cors_allow_credentials,
+            allow_credentials=cfg.cors_allow_credentials,
             allow_methods=allow_methods,
             allow_headers=allow_headers,
         )
-    app.add_middleware(RequestIDMiddleWare)
-    app.add_middleware(CSRFMiddleware)
-    app.add_middleware(AccessLogWithTimeMiddleware)
+    # Access log, request id and CSRF check (outermost first) in one layer.
+    app.add_middleware(ServerMiddleware)
 
     # app.mount("/static", StaticFiles(directory="static"), name="static")
 
     app.include_router(router)
+    if cfg.metrics_enabled:
+        app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
 
     return app
 
@@ -0,0 +1,109 @@
+"""CoDel-style load shedding for route class queues.
+
+Requests that wait for a route class limiter (see `route_classes`) are
+normally allowed to queue for up to `max_wait_sec`. When the *minimum* queue
+delay seen during an interval stays at or above `target_sec`, the queue is a
+standing queue rather than a burst: from then on requests are only allowed to
+wait `target_sec` before they are shed with `503` and `Retry-After`. Shedding
+a few requests quickly is better than letting all of them run into the
+client's timeout and retry.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+
+import anyio
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp
+
+
+def try_borrow(limiter: anyio.CapacityLimiter, borrower: object | None = None) -> bool:
+    """Take a token without waiting, for `borrower` (default: the current task)."""
+
+    try:
+        if borrower is None:
+            limiter.acquire_nowait()
+        else:
+            limiter.acquire_on_behalf_of_nowait(borrower)
+    except anyio.WouldBlock:
+        return False
+    return True
+
+
+async def borrow(limiter: anyio.CapacityLimiter, borrower: object | None = None) -> None:
+    if borrower is None:
+        await limiter.acquire()
+    else:
+        await limiter.acquire_on_behalf_of(borrower)
+
+
+class CoDelShedder:
+    def __init__(
+        self, *, target_sec: float = 0.05, interval_sec: float = 0.1, max_wait_sec: float = 1.0
+    ) -> None:
+        self.target_sec = target_sec
+        self.interval_sec = interval_sec
+        self.max_wait_sec = max_wait_sec
+        self.overloaded = False
+        self._interval_min = math.inf
+        self._interval_end = 0.0
+        self._admitted = 0
+        self._shed = 0
+        self._overload_intervals = 0
+
+    def wait_budget(self) -> float:
+        return self.target_sec if self.overloaded else self.max_wait_sec
+
+    def observe(self, delay_sec: float, now: float | None = None) -> None:
+        """Record the queue delay of one request (admitted or shed)."""
+
+        now = time.perf_counter() if now is None else now
+        if delay_sec < self._interval_min:
+            self._interval_min = delay_sec
+        if now >= self._interval_end:
+            self.overloaded = self._interval_min >= self.target_sec
+            if self.overloaded:
+                self._overload_intervals += 1
+            self._interval_min = math.inf
+            self._interval_end = now + self.interval_sec
+
+    async def acquire(self, limiter: anyio.CapacityLimiter, borrower: object | None = None) -> bool:
+        """Borrow a token from `limiter`, or return False if the request is shed."""
+
+        if try_borrow(limiter, borrower):
+            self._admitted += 1
+            self.observe(0.0)
+            return True
+
+        start = time.perf_counter()
+        acquired = False
+        with anyio.move_on_after(self.wait_budget()):
+            await borrow(limiter, borrower)
+            acquired = True
+        self.observe(time.perf_counter() - start)
+        if acquired:
+            self._admitted += 1
+        else:
+            self._shed += 1
+        return acquired
+
+    def stats(self) -> dict[str, int | bool]:
+        return {
+            "admitted": self._admitted,
+            "shed": self._shed,
+            "overloaded": self.overloaded,
+            "overload_intervals": self._overload_intervals,
+        }
+
+    def reject_response(self) -> ASGIApp:
+        return overloaded_response()
+
+
+def overloaded_response(retry_after_sec: int = 1) -> ASGIApp:
+    return JSONResponse(
+        {"detail": "Server overloaded; retry later"},
+        status_code=503,
+        headers={"Retry-After": str(retry_after_sec)},
+    )
@@ -0,0 +1,218 @@
+"""Brute-force throttling for password verification.
+
+Failed credential checks are counted per user name and per client address in
+a sliding window (`/verify/user` is called by app servers, not end users, so
+it only counts per user name). Once either count reaches its limit, further attempts are
+rejected *before* the password hash is verified, so credential-stuffing
+bursts do not cost a bcrypt verification each.
+
+Counts live in a `ThrottleBackend`. The default keeps them in process memory;
+to share them across workers/hosts, point `ZENAUTH_SERVER_LOGIN_THROTTLE_BACKEND`
+at a `module:factory` returning another implementation (e.g. Redis based).
+"""
+
+from __future__ import annotations
+
+import importlib
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterator, Literal, Protocol
+
+from fastapi import Request
+from zen_auth.claims.base import log_audit_fail
+
+from .metrics import REGISTRY, Sample, stats_samples
+
+ThrottleScope = Literal["user", "ip"]
+
+
+class ThrottleBackend(Protocol):
+    def hit(self, key: str, window_sec: float) -> float:
+        """Record one failure for `key`; return the count within the window."""
+        ...
+
+    def count(self, key: str, window_sec: float) -> float:
+        """Return the failure count for `key` within the window."""
+        ...
+
+    def reset(self, key: str) -> None: ...
+
+
+class MemoryThrottleBackend:
+    """Sliding-window counter kept in process memory.
+
+    Each key keeps the counts of the current and previous fixed windows; the
+    previous one is weighted by how much of it still overlaps the sliding
+    window. That is O(1) memory per key, unlike a log of timestamps.
+    """
+
+    def __init__(self, *, max_keys: int = 100_000, clock: Callable[[], float] = time.time) -> None:
+        self.max_keys = max_keys
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (window index, count in that window, count in the previous one)
+        self._buckets: dict[str, tuple[int, int, int]] = {}
+
+    def _current(self, key: str, window_sec: float, now: float) -> tuple[int, int, int]:
+        idx = int(now // window_sec)
+        entry = self._buckets.get(key)
+        if entry is None:
+            return idx, 0, 0
+        entry_idx, cur, prev = entry
+        if entry_idx == idx:
+            return idx, cur, prev
+        if entry_idx == idx - 1:
+            return idx, 0, cur
+        return idx, 0, 0
+
+    @staticmethod
+    def _weighted(idx: int, cur: int, prev: int, window_sec: float, now: float) -> float:
+        elapsed = now / window_sec - idx
+        return cur + prev * (1.0 - elapsed)
+
+    def hit(self, key: str, window_sec: float) -> float:
+        now = self._clock()
+        with self._lock:
+            idx, cur, prev = self._current(key, window_sec, now)
+            cur += 1
+            self._buckets[key] = (idx, cur, prev)
+            if len(self._buckets) > self.max_keys:
+                self._evict(idx)
+        return self._weighted(idx, cur, prev, window_sec, now)
+
+    def count(self, key: str, window_sec: float) -> float:
+        now = self._clock()
+        with self._lock:
+            if key not in self._buckets:
+                return 0.0
+            idx, cur, prev = self._current(key, window_sec, now)
+        return self._weighted(idx, cur, prev, window_sec, now)
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def _evict(self, idx: int) -> None:
+        # Drop keys with no failures in the sliding window; if that is not
+        # enough, drop the oldest inserted half.
+        self._buckets = {k: v for k, v in self._buckets.items() if v[0] >= idx - 1}
+        if len(self._buckets) > self.max_keys:
+            keys = list(self._buckets)
+            for k in keys[: len(keys) // 2]:
+                del self._buckets[k]
+
+
+def load_backend(spec: str) -> ThrottleBackend:
+    """Create a backend from `memory` or a `module:factory` import path."""
+
+    if spec == "memory":
+        return MemoryThrottleBackend()
+    module_name, sep, attr = spec.partition(":")
+    if not sep or not module_name or not attr:
+        raise ValueError(f"Invalid throttle backend {spec!r} (expected 'memory' or 'module:factory')")
+    factory = getattr(importlib.import_module(module_name), attr)
+    backend: ThrottleBackend = factory()
+    return backend
+
+
+@dataclass(frozen=True)
+class ThrottleDecision:
+    scope: ThrottleScope
+    retry_after_sec: int
+
+
+class LoginThrottle:
+    def __init__(self, backend: ThrottleBackend | None = None) -> None:
+        self.backend: ThrottleBackend = backend or MemoryThrottleBackend()
+        self.enabled = True
+        self.window_sec = 300.0
+        self.max_user_failures = 10
+        self.max_ip_failures = 50
+        self._stats_lock = threading.Lock()
+        self._stats = {"checked": 0, "failures": 0, "throttled_user": 0, "throttled_ip": 0}
+
+    def configure(
+        self,
+        *,
+        enabled: bool = True,
+        window_sec: float = 300.0,
+        max_user_failures: int = 10,
+        max_ip_failures: int = 50,
+        backend: ThrottleBackend | None = None,
+    ) -> None:
+        """Set limits; a limit of 0 disables that key."""
+
+        self.enabled = enabled
+        self.window_sec = window_sec
+        self.max_user_failures = max_user_failures
+        self.max_ip_failures = max_ip_failures
+        if backend is not None:
+            self.backend = backend
+
+    def stats(self) -> dict[str, int]:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _count(self, field: str) -> None:
+        # Called from threadpool endpoints.
+        with self._stats_lock:
+            self._stats[field] += 1
+
+    def _keys(self, user_name: str, ip: str | None) -> list[tuple[ThrottleScope, str, int]]:
+        keys: list[tuple[ThrottleScope, str, int]] = []
+        if self.max_user_failures > 0:
+            keys.append(("user", f"user:{user_name}", self.max_user_failures))
+        if ip and self.max_ip_failures > 0:
+            keys.append(("ip", f"ip:{ip}", self.max_ip_failures))
+        return keys
+
+    def _retry_after(self) -> int:
+        # The weighted count decays as the window slides; the end of the
+        # current fixed window is a simple upper bound.
+        return max(1, math.ceil(self.window_sec - time.time() % self.window_sec))
+
+    def check(self, user_name: str, ip: str | None) -> ThrottleDecision | None:
+        """Return a decision if the attempt must be rejected without verifying it."""
+
+        if not self.enabled:
+            return None
+        self._count("checked")
+        for scope, key, limit in self._keys(user_name, ip):
+            if self.backend.count(key, self.window_sec) >= limit:
+                self._count(f"throttled_{scope}")
+                return ThrottleDecision(scope=scope, retry_after_sec=self._retry_after())
+        return None
+
+    def record_failure(self, user_name: str, ip: str | None) -> None:
+        if not self.enabled:
+            return
+        self._count("failures")
+        for _, key, _ in self._keys(user_name, ip):
+            self.backend.hit(key, self.window_sec)
+
+    def record_success(self, user_name: str) -> None:
+        # Only the user key: a shared NAT address keeps its failure count.
+        if self.enabled and self.max_user_failures > 0:
+            self.backend.reset(f"user:{user_name}")
+
+
+# Shared by `auth.login` and `/verify/user` (see `lifespan` for limits).
+LOGIN_THROTTLE = LoginThrottle()
+
+
+@REGISTRY.collector("zenauth_login_throttle", "Brute-force throttle counters by field.", "counter")
+def _throttle_samples() -> Iterator[Sample]:
+    return stats_samples(LOGIN_THROTTLE.stats())
+
+
+def log_throttled(request: Request, user_name: str, action: str, decision: ThrottleDecision) -> None:
+    log_audit_fail(
+        msg=f"{action} throttled (too many failures per {decision.scope})",
+        user_name=user_name,
+        roles=None,
+        required_context={"action": action, "throttled_by": decision.scope},
+        request=request,
+        include_token=False,
+    )
@@ -1,4 +1,15 @@
-from . import app_service, rbac_checks, role_service, scope_service, user_service
+from . import (
+    access_matrix,
+    app_service,
+    bulk_users,
+    export_service,
+    passwords,
+    policy_events,
+    rbac_checks,
+    role_service,
+    scope_service,
+    user_service,
+)
 
 __all__ = [
     "app_service",
@@ -6,4 +17,9 @@ __all__ = [
     "role_service",
     "scope_service",
     "rbac_checks",
+    "policy_events",
+    "passwords",
+    "bulk_users",
+    "export_service",
+    "access_matrix",
 ]
@@ -0,0 +1,427 @@
+"""Set-based user import.
+
+`user_service.create_user`/`update_user` work on one ORM object at a time
+(a `session.get` per user and per role, a flush per new role). For imports
+of many users this module applies a whole chunk of rows with a handful of
+statements:
+
+- existing users and roles are prefetched with `IN` queries,
+- missing roles are created and user/role rows written with executemany,
+  using `INSERT ... ON CONFLICT DO NOTHING` on SQLite and PostgreSQL,
+- updates are sent as ORM bulk `UPDATE`s by primary key (one executemany
+  per distinct set of changed columns).
+
+`prehashed` hashes plaintext passwords of upcoming chunks in a process pool
+while the caller writes the current one, so bcrypt runs outside the DB
+transaction and on every core.
+
+`plan_users` diffs a chunk against the stored users and `apply_plan` writes
+only what differs: a password, role set or division that actually changes
+bumps the user's `policy_epoch` and records a `user_epoch` policy event,
+values equal to the stored ones are left alone (so re-running the same
+import does not invalidate sessions). An empty optional field leaves the
+stored value alone, like the per-row services.
+"""
+
+from __future__ import annotations
+
+import os
+from collections import Counter, deque
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass, field, replace
+from typing import Callable, Iterable, Iterator, Literal, Sequence, TypeVar, cast
+
+from sqlalchemy import Table, delete, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..persistence.models import PolicyEventOrm, RoleOrm, UserOrm, user_roles
+from .passwords import batch_pool, hash_many
+
+ImportMode = Literal["create", "upsert"]
+
+# Keys per `IN (...)` list; well below SQLite's bound-parameter limit.
+IN_BATCH = 500
+
+_T = TypeVar("_T")
+
+
+@dataclass
+class UserImportRow:
+    """One input user. `None` means "not given" (keep the stored value).
+
+    `line` is the position in the source file, used in error messages.
+    """
+
+    line: int
+    user_name: str
+    password: str | None = None
+    roles: list[str] | None = None
+    real_name: str | None = None
+    division: str | None = None
+    description: str | None = None
+    policy_epoch: int = 1
+
+
+@dataclass
+class BulkResult:
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    epoch_bumps: int = 0
+    # Changed columns of updated users ("roles" included) -> number of users.
+    fields: Counter[str] = field(default_factory=Counter)
+
+    def __iadd__(self, other: BulkResult) -> BulkResult:
+        self.created += other.created
+        self.updated += other.updated
+        self.unchanged += other.unchanged
+        self.epoch_bumps += other.epoch_bumps
+        self.fields.update(other.fields)
+        return self
+
+
+class ImportRowError(ValueError):
+    """Invalid input row; `line` is its position in the source file."""
+
+    def __init__(self, line: int, message: str) -> None:
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+
+
+def batched(items: Sequence[_T], size: int = IN_BATCH) -> Iterator[Sequence[_T]]:
+    for start in range(0, len(items), size):
+        end = start + size
+        yield items[start:end]
+
+
+def insert_ignore(session: Session, table: Table, rows: list[dict[str, object]]) -> None:
+    """Insert `rows`, skipping those whose primary key already exists."""
+
+    if not rows:
+        return
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        session.execute(sqlite.insert(table).on_conflict_do_nothing(), rows)
+    elif dialect == "postgresql":
+        session.execute(postgresql.insert(table).on_conflict_do_nothing(), rows)
+    else:
+        keys = [c.name for c in table.primary_key.columns]
+        existing: set[tuple[object, ...]] = set()
+        first = table.c[keys[0]]
+        for batch in batched(sorted({r[keys[0]] for r in rows}, key=str)):
+            cols = [table.c[k] for k in keys]
+            existing.update(tuple(r) for r in session.execute(select(*cols).where(first.in_(batch))))
+        fresh = {tuple(r[k] for k in keys): r for r in rows if tuple(r[k] for k in keys) not in existing}
+        if fresh:
+            session.execute(insert(table), list(fresh.values()))
+
+
+@dataclass
+class StoredUser:
+    password: str
+    real_name: str | None
+    division: str | None
+    description: str | None
+    policy_epoch: int
+    roles: set[str] = field(default_factory=set)
+
+
+def load_users(session: Session, user_names: Iterable[str]) -> dict[str, StoredUser]:
+    """Current state (columns and role names) of the users that exist."""
+
+    names = sorted(set(user_names))
+    found: dict[str, StoredUser] = {}
+    for batch in batched(names):
+        stmt = select(
+            UserOrm.user_name,
+            UserOrm.password,
+            UserOrm.real_name,
+            UserOrm.division,
+            UserOrm.description,
+            UserOrm.policy_epoch,
+        ).where(UserOrm.user_name.in_(batch))
+        for name, password, real_name, division, description, epoch in session.execute(stmt):
+            found[name] = StoredUser(password, real_name, division, description, epoch)
+        grants = select(user_roles.c.user_name, user_roles.c.role_name).where(
+            user_roles.c.user_name.in_(batch)
+        )
+        for name, role in session.execute(grants):
+            found[name].roles.add(role)
+    return found
+
+
+def stored_passwords(session: Session, user_names: Iterable[str]) -> dict[str, str]:
+    """user_name -> password hash of the users that exist."""
+
+    names = sorted(set(user_names))
+    found: dict[str, str] = {}
+    for batch in batched(names):
+        stmt = select(UserOrm.user_name, UserOrm.password).where(UserOrm.user_name.in_(batch))
+        found.update({name: password for name, password in session.execute(stmt)})
+    return found
+
+
+def ensure_roles(session: Session, role_names: Iterable[str]) -> None:
+    """Create missing roles (display name = role name), like `user_service._ensure_roles`."""
+
+    rows: list[dict[str, object]] = [{"role_name": r, "display_name": r} for r in sorted(set(role_names))]
+    insert_ignore(session, cast(Table, RoleOrm.__table__), rows)
+
+
+def _replace_user_roles(session: Session, grants: dict[str, list[str]]) -> None:
+    names = sorted(grants)
+    for batch in batched(names):
+        session.execute(delete(user_roles).where(user_roles.c.user_name.in_(batch)))
+    rows: list[dict[str, object]] = [
+        {"user_name": u, "role_name": r} for u in names for r in dict.fromkeys(grants[u])
+    ]
+    if rows:
+        session.execute(insert(user_roles), rows)
+
+
+@dataclass
+class UserPlan:
+    """Writes that bring a chunk of users in line with the input.
+
+    `update` holds the user_name and only the columns that differ, `grants`
+    the new role list of users whose role set changes.
+    """
+
+    create: list[UserImportRow] = field(default_factory=list)
+    update: list[dict[str, object]] = field(default_factory=list)
+    grants: dict[str, list[str]] = field(default_factory=dict)
+    unchanged: int = 0
+
+    def result(self) -> BulkResult:
+        fields: Counter[str] = Counter()
+        for values in self.update:
+            fields.update(k for k in values if k not in ("user_name", "policy_epoch"))
+        created = {r.user_name for r in self.create}
+        fields.update("roles" for name in self.grants if name not in created)
+        return BulkResult(
+            created=len(self.create),
+            updated=len(self.update),
+            unchanged=self.unchanged,
+            epoch_bumps=sum(1 for values in self.update if "policy_epoch" in values),
+            fields=fields,
+        )
+
+
+def plan_users(
+    session: Session,
+    rows: Sequence[UserImportRow],
+    *,
+    mode: ImportMode = "upsert",
+    already_hashed: bool = False,
+) -> UserPlan:
+    """Diff a chunk of users against the database without writing anything.
+
+    Plaintext passwords are checked against the stored hash (a bcrypt verify
+    per existing user) and hashed only for new users and real changes.
+
+    Args:
+        mode: `create` fails on existing users (and on a user repeated in the
+            chunk, like sequential creates would), `upsert` updates them.
+        already_hashed: `password` is a hash (e.g. chunks from `prehashed`);
+            it is compared with the stored hash as a string.
+    """
+
+    # Last row wins for duplicates within a chunk, like sequential upserts would.
+    by_name: dict[str, UserImportRow] = {}
+    for row in rows:
+        if not row.user_name or not row.user_name.strip():
+            raise ImportRowError(row.line, "user_name is required")
+        if len(row.user_name) > 255:
+            raise ImportRowError(row.line, "user_name cannot exceed 255 characters")
+        if mode == "create" and row.user_name in by_name:
+            raise ImportRowError(row.line, f"user already exists: {row.user_name}")
+        by_name[row.user_name] = row
+
+    stored = load_users(session, by_name)
+    if mode == "create" and stored:
+        first = next(r for r in by_name.values() if r.user_name in stored)
+        raise ImportRowError(first.line, f"user already exists: {first.user_name}")
+    for r in by_name.values():
+        if r.user_name not in stored and not r.password:
+            raise ImportRowError(r.line, "password is required for new users")
+
+    passwords = {r.user_name: r.password for r in by_name.values() if r.password}
+    if not already_hashed and passwords:
+        names = list(passwords)
+        current = [stored[n].password if n in stored else None for n in names]
+        passwords = dict(zip(names, hash_many([passwords[n] for n in names], current)))
+
+    plan = UserPlan()
+    for name, r in by_name.items():
+        cur = stored.get(name)
+        if cur is None:
+            plan.create.append(replace(r, password=passwords[name]))
+            if r.roles:
+                plan.grants[name] = list(dict.fromkeys(r.roles))
+            continue
+
+        values: dict[str, object] = {}
+        if name in passwords and passwords[name] != cur.password:
+            values["password"] = passwords[name]
+        for column in ("real_name", "division", "description"):
+            value = getattr(r, column)
+            if value is not None and value != getattr(cur, column):
+                values[column] = value
+        if r.roles is not None and set(r.roles) != cur.roles:
+            plan.grants[name] = list(dict.fromkeys(r.roles))
+        if "password" in values or "division" in values or name in plan.grants:
+            values["policy_epoch"] = cur.policy_epoch + 1
+        if values:
+            plan.update.append({"user_name": name, **values})
+        else:
+            plan.unchanged += 1
+    return plan
+
+
+def apply_plan(session: Session, plan: UserPlan) -> BulkResult:
+    """Write `plan` in the caller's transaction."""
+
+    ensure_roles(session, (role for roles in plan.grants.values() for role in roles))
+
+    if plan.create:
+        session.execute(
+            insert(UserOrm),
+            [
+                {
+                    "user_name": r.user_name,
+                    "password": r.password,
+                    "real_name": r.real_name or "",
+                    "division": r.division or "",
+                    "description": r.description or "",
+                    "policy_epoch": r.policy_epoch,
+                }
+                for r in plan.create
+            ],
+        )
+    if plan.update:
+        # ORM bulk UPDATE by primary key: one executemany per distinct set of columns.
+        session.execute(update(UserOrm), plan.update)
+
+    _replace_user_roles(session, plan.grants)
+
+    events: list[dict[str, object]] = [
+        {"kind": "user_epoch", "subject": values["user_name"], "policy_epoch": values["policy_epoch"]}
+        for values in plan.update
+        if "policy_epoch" in values
+    ]
+    if events:
+        session.execute(insert(PolicyEventOrm), events)
+
+    return plan.result()
+
+
+def apply_users(
+    session: Session,
+    rows: Sequence[UserImportRow],
+    *,
+    mode: ImportMode = "upsert",
+    already_hashed: bool = False,
+) -> BulkResult:
+    """Create or update a chunk of users in the caller's transaction (`plan_users` + `apply_plan`)."""
+
+    return apply_plan(session, plan_users(session, rows, mode=mode, already_hashed=already_hashed))
+
+
+def _hash_slice(rows: list[UserImportRow], current: list[str | None]) -> list[UserImportRow]:
+    """Hash one row at a time to find the row a failed batch tripped on."""
+
+    out: list[UserImportRow] = []
+    for row, stored in zip(rows, current):
+        try:
+            out.append(replace(row, password=hash_many([row.password or ""], [stored])[0]))
+        except Exception as e:
+            raise ImportRowError(row.line, f"cannot hash password: {e}") from e
+    return out
+
+
+_Pending = list[tuple[Sequence[UserImportRow], list[str | None], Future[list[str]]]]
+
+
+def _submit_chunk(
+    pool: Executor,
+    chunk: list[UserImportRow],
+    slices: int,
+    current: Callable[[list[str]], dict[str, str]] | None,
+    late: set[str],
+) -> _Pending:
+    with_pw = [r for r in chunk if r.password and r.user_name not in late]
+    stored = current([r.user_name for r in with_pw]) if current is not None and with_pw else {}
+    size = max(1, -(-len(with_pw) // slices))
+    pending: _Pending = []
+    for part in batched(with_pw, size):
+        hashes = [stored.get(r.user_name) for r in part]
+        pending.append((part, hashes, pool.submit(hash_many, [r.password or "" for r in part], hashes)))
+    return pending
+
+
+def _collect_chunk(
+    chunk: list[UserImportRow],
+    parts: _Pending,
+    late: set[str],
+    current: Callable[[list[str]], dict[str, str]] | None,
+) -> list[UserImportRow]:
+    hashed: dict[int, UserImportRow] = {}
+    for part, stored, future in parts:
+        try:
+            rows = [replace(r, password=h) for r, h in zip(part, future.result())]
+        except Exception:
+            rows = _hash_slice(list(part), stored)
+        hashed.update((r.line, r) for r in rows)
+    if late:
+        # Earlier chunks are written by now: compare with what they stored.
+        deferred = [r for r in chunk if r.password and r.user_name in late]
+        found = current([r.user_name for r in deferred]) if current is not None else {}
+        hashed.update((r.line, r) for r in _hash_slice(deferred, [found.get(r.user_name) for r in deferred]))
+    return [hashed.get(r.line, r) for r in chunk]
+
+
+def prehashed(
+    chunks: Iterable[list[UserImportRow]],
+    *,
+    workers: int = 0,
+    ahead: int = 2,
+    current: Callable[[list[str]], dict[str, str]] | None = None,
+) -> Iterator[list[UserImportRow]]:
+    """Yield `chunks` in order with plaintext passwords replaced by their hashes.
+
+    Up to `ahead` chunks beyond the one being consumed are read and hashed in
+    a process pool (`workers`, default CPU count), which bounds memory to
+    about `ahead + 1` chunks. A password that cannot be hashed raises
+    `ImportRowError` for its row when its chunk is reached, so errors surface
+    in input order. Pass the yielded chunks to `apply_users` with
+    `already_hashed=True`.
+
+    `current` looks up stored hashes by user name (e.g. `stored_passwords`
+    in a short session); a password matching its stored hash keeps it, so
+    `plan_users` sees it as unchanged. The caller is expected to write each
+    chunk before asking for the next. A user that also appears in an earlier
+    chunk still in flight would be looked up before that chunk is written
+    (and get a new salt, i.e. a bogus password change), so its row is hashed
+    inline when its own chunk is reached instead.
+    """
+
+    workers = workers or os.cpu_count() or 1
+    pool = batch_pool(workers)
+    pending: deque[tuple[list[UserImportRow], set[str], _Pending]] = deque()
+    source = iter(chunks)
+    try:
+        while True:
+            while len(pending) <= ahead:
+                chunk = next(source, None)
+                if chunk is None:
+                    break
+                in_flight = {r.user_name for queued, _, _ in pending for r in queued}
+                late = {r.user_name for r in chunk if r.password and r.user_name in in_flight}
+                pending.append((chunk, late, _submit_chunk(pool, chunk, workers, current, late)))
+            if not pending:
+                return
+            chunk, late, parts = pending.popleft()
+            yield _collect_chunk(chunk, parts, late, current)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
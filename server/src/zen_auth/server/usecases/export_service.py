@@ -0,0 +1,142 @@
+"""Streaming export of users, roles, scopes and client apps.
+
+Records have the columns `scripts/import_csv.py` reads, so an export can be
+imported again (users with `--password-already-hashed`: the password column
+holds the stored hash). Each entity is read with one query joined to its
+association table and ordered by key, fetched `batch_size` rows at a time
+(`yield_per`, a server-side cursor where the driver supports it), and
+grouped on the fly, so memory stays flat however many rows there are.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import itertools
+import json
+from typing import Any, Iterable, Iterator, Literal, Sequence
+
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session
+
+from ..persistence.models import (
+    ClientAppOrm,
+    RoleOrm,
+    ScopeOrm,
+    UserOrm,
+    role_scopes,
+    user_roles,
+)
+
+ExportKind = Literal["users", "roles", "scopes", "apps"]
+ExportFormat = Literal["csv", "ndjson"]
+
+# Import order: roles/scopes before the users and apps that reference them.
+KINDS: tuple[ExportKind, ...] = ("roles", "scopes", "apps", "users")
+
+FIELDS: dict[ExportKind, list[str]] = {
+    "users": ["user_name", "password", "roles", "real_name", "division", "description", "policy_epoch"],
+    "roles": ["role_name", "display_name", "description", "scopes"],
+    "scopes": ["scope_name", "display_name", "description", "roles"],
+    "apps": ["app_id", "display_name", "description", "return_to"],
+}
+
+MEDIA_TYPES: dict[ExportFormat, str] = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _grouped(
+    session: Session, stmt: Select[Any], fields: list[str], batch_size: int
+) -> Iterator[dict[str, Any]]:
+    """Rows of `stmt` are (*columns, joined name) ordered by key; fold the names into a list."""
+
+    rows = session.execute(stmt.execution_options(yield_per=batch_size))
+    for _, group in itertools.groupby(rows, key=lambda r: r[0]):
+        batch = list(group)
+        names = [r[-1] for r in batch if r[-1] is not None]
+        yield {**dict(zip(fields, batch[0][:-1])), fields[-1]: names}
+
+
+def records(session: Session, kind: ExportKind, *, batch_size: int = 1000) -> Iterator[dict[str, Any]]:
+    """Yield the records of `kind` in key order."""
+
+    if kind == "users":
+        users = (
+            select(
+                UserOrm.user_name,
+                UserOrm.password,
+                UserOrm.real_name,
+                UserOrm.division,
+                UserOrm.description,
+                UserOrm.policy_epoch,
+                user_roles.c.role_name,
+            )
+            .outerjoin(user_roles, user_roles.c.user_name == UserOrm.user_name)
+            .order_by(UserOrm.user_name, user_roles.c.role_name)
+        )
+        fields = ["user_name", "password", "real_name", "division", "description", "policy_epoch", "roles"]
+        for rec in _grouped(session, users, fields, batch_size):
+            yield {k: rec[k] for k in FIELDS["users"]}
+    elif kind == "roles":
+        roles = (
+            select(RoleOrm.role_name, RoleOrm.display_name, RoleOrm.description, role_scopes.c.scope_name)
+            .outerjoin(role_scopes, role_scopes.c.role_name == RoleOrm.role_name)
+            .order_by(RoleOrm.role_name, role_scopes.c.scope_name)
+        )
+        yield from _grouped(session, roles, FIELDS["roles"], batch_size)
+    elif kind == "scopes":
+        scopes = (
+            select(ScopeOrm.scope_name, ScopeOrm.display_name, ScopeOrm.description, role_scopes.c.role_name)
+            .outerjoin(role_scopes, role_scopes.c.scope_name == ScopeOrm.scope_name)
+            .order_by(ScopeOrm.scope_name, role_scopes.c.role_name)
+        )
+        yield from _grouped(session, scopes, FIELDS["scopes"], batch_size)
+    else:
+        apps = select(
+            ClientAppOrm.app_id, ClientAppOrm.display_name, ClientAppOrm.description, ClientAppOrm.return_to
+        ).order_by(ClientAppOrm.app_id)
+        for row in session.execute(apps.execution_options(yield_per=batch_size)):
+            yield dict(zip(FIELDS["apps"], row))
+
+
+def _csv_value(value: object) -> object:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return ",".join(value)
+    return value
+
+
+def csv_lines(
+    rows: Iterable[dict[str, Any]], fields: Sequence[str], *, rows_per_chunk: int = 500
+) -> Iterator[str]:
+    """Header, then CSV text in chunks of `rows_per_chunk` records (lists are comma joined)."""
+
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(fields)
+    for n, rec in enumerate(rows, start=1):
+        writer.writerow([_csv_value(rec[f]) for f in fields])
+        if n % rows_per_chunk == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+def ndjson_lines(rows: Iterable[dict[str, Any]]) -> Iterator[str]:
+    for rec in rows:
+        yield json.dumps(rec, ensure_ascii=False) + "\n"
+
+
+def export_lines(
+    session: Session, kind: ExportKind, fmt: ExportFormat = "csv", *, batch_size: int = 1000
+) -> Iterator[str]:
+    """Stream `kind` as CSV or NDJSON text."""
+
+    rows = records(session, kind, batch_size=batch_size)
+    if fmt == "ndjson":
+        return ndjson_lines(rows)
+    return csv_lines(rows, FIELDS[kind])
@@ -0,0 +1,211 @@
+"""Password hashing and verification.
+
+bcrypt costs hundreds of milliseconds of CPU per call. Calls can be
+dispatched to a thread or process pool, which caps how many hashes run at
+once (a process pool also keeps them off the GIL). The calling thread still
+waits for the result, so a pool does not free request threads. How many
+password requests run or wait is bounded by admission control
+(`admission.py`) alone; the dispatcher adds no queue limit of its own.
+
+The executor is configured by the server `lifespan` (inline by default);
+scripts/tests that use the services directly hash inline.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from time import perf_counter
+from typing import Callable, Iterator, Literal, TypeVar
+
+from passlib.context import CryptContext
+from zen_auth.logger import LOGGER
+
+from ..metrics import PASSWORD_SECONDS, REGISTRY, Sample
+
+PasswordExecutorKind = Literal["inline", "thread", "process"]
+
+_T = TypeVar("_T")
+
+pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+# --- Worker-side functions (must be module-level to be picklable) ---
+
+
+def _init_worker(ctx_config: str) -> None:
+    pwd_ctx.load(ctx_config)
+
+
+def _hash(secret: str) -> str:
+    return str(pwd_ctx.hash(secret))
+
+
+def hash_many(secrets: list[str], current: list[str | None] | None = None) -> list[str]:
+    """Hash `secrets` in the calling process (a batch job or pool worker).
+
+    `current` holds the stored hash of each secret (None if there is none);
+    a secret that matches it keeps the stored hash instead of a new one.
+    """
+
+    stored = current or [None] * len(secrets)
+    return [h if h is not None and _matches(s, h) else _hash(s) for s, h in zip(secrets, stored)]
+
+
+def _verify(secret: str, hashed: str) -> bool:
+    return bool(pwd_ctx.verify(secret, hashed))
+
+
+def _matches(secret: str, hashed: str) -> bool:
+    # Stored values that are not a known hash format simply do not match.
+    try:
+        return _verify(secret, hashed)
+    except ValueError:
+        return False
+
+
+def _verify_and_update(secret: str, hashed: str) -> tuple[bool, str | None]:
+    ok, new_hash = pwd_ctx.verify_and_update(secret, hashed)
+    return bool(ok), new_hash
+
+
+def context_options(schemes: list[str], costs: dict[str, dict[str, int]] | None = None) -> dict[str, object]:
+    """Build `CryptContext` options for `schemes` and per-scheme costs.
+
+    Args:
+        schemes: passlib scheme names, e.g. `["argon2", "bcrypt"]`.
+        costs: Per scheme passlib options, e.g. `{"bcrypt": {"rounds": 13}}`.
+            Zero values keep the library default.
+    """
+
+    if not schemes:
+        raise ValueError("At least one password scheme is required")
+
+    options: dict[str, object] = {"schemes": schemes, "deprecated": "auto"}
+    for scheme, params in (costs or {}).items():
+        for key, value in params.items():
+            if not value:
+                continue
+            if key == "rounds":
+                # Pinning the desired range makes retuning in either direction
+                # flag existing hashes for an update.
+                options[f"{scheme}__default_rounds"] = value
+                options[f"{scheme}__min_desired_rounds"] = value
+                options[f"{scheme}__max_desired_rounds"] = value
+            else:
+                options[f"{scheme}__{key}"] = value
+    return options
+
+
+def configure_context(schemes: list[str], costs: dict[str, dict[str, int]] | None = None) -> None:
+    """Set the hash schemes and cost parameters of `pwd_ctx`.
+
+    The first scheme is used for new hashes; the others are still accepted but
+    deprecated. Hashes with a deprecated scheme or a different cost are
+    replaced by `verify_and_update_password` on their next successful login.
+    """
+
+    pwd_ctx.load(context_options(schemes, costs))
+
+
+class _Dispatcher:
+    def __init__(self) -> None:
+        self.kind: PasswordExecutorKind = "inline"
+        self.executor: Executor | None = None
+        # Operations queued or running (for metrics).
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def _track(self, delta: int) -> None:
+        with self._lock:
+            self.in_flight += delta
+
+    def run(self, op: str, fn: Callable[..., _T], *args: str) -> _T:
+        start = perf_counter()
+        self._track(1)
+        try:
+            executor = self.executor
+            if executor is None:
+                return fn(*args)
+            return executor.submit(fn, *args).result()
+        finally:
+            self._track(-1)
+            PASSWORD_SECONDS.observe(perf_counter() - start, op)
+
+
+_dispatcher = _Dispatcher()
+
+
+@REGISTRY.collector("zenauth_password_in_flight", "Password operations queued or running.")
+def _in_flight_samples() -> Iterator[Sample]:
+    yield "", (), float(_dispatcher.in_flight)
+
+
+def configure(kind: PasswordExecutorKind, *, workers: int = 0) -> None:
+    """Select where hashing runs.
+
+    Call after `configure_context`; process workers copy the context settings
+    when they start.
+
+    Args:
+        kind: `inline` (calling thread), `thread` or `process` pool.
+        workers: Pool size; 0 means `os.cpu_count()`.
+    """
+
+    shutdown()
+    if kind == "inline":
+        return
+
+    workers = workers or os.cpu_count() or 1
+    executor: Executor
+    if kind == "process":
+        executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(pwd_ctx.to_string(),)
+        )
+    else:
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="zen_auth-passwords")
+
+    _dispatcher.executor = executor
+    _dispatcher.kind = kind
+    LOGGER.info("Password hashing: %s pool with %d workers", kind, workers)
+
+
+def batch_pool(workers: int = 0) -> ProcessPoolExecutor:
+    """Process pool for batch hashing (`hash_many`) with the current context settings.
+
+    Separate from the request-path executor set up by `configure`; the
+    caller owns and shuts down the pool.
+    """
+
+    return ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count() or 1,
+        initializer=_init_worker,
+        initargs=(pwd_ctx.to_string(),),
+    )
+
+
+def shutdown() -> None:
+    executor = _dispatcher.executor
+    _dispatcher.kind = "inline"
+    _dispatcher.executor = None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def executor_kind() -> PasswordExecutorKind:
+    return _dispatcher.kind
+
+
+def hash_password(secret: str) -> str:
+    return _dispatcher.run("hash", _hash, secret)
+
+
+def verify_password(secret: str, hashed: str) -> bool:
+    return _dispatcher.run("verify", _verify, secret, hashed)
+
+
+def verify_and_update_password(secret: str, hashed: str) -> tuple[bool, str | None]:
+    """Verify `secret`; on success also return a new hash if `hashed` is outdated."""
+
+    return _dispatcher.run("verify", _verify_and_update, secret, hashed)
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import datetime as DT
+from typing import cast
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+from zen_auth.dto import PolicyEventDTO, PolicyEventKind, PolicyEventsDTO
+
+from ..persistence.models import PolicyEventOrm
+
+
+def _iso(dt: DT.datetime | None) -> str | None:
+    return dt.isoformat() if dt is not None else None
+
+
+def event_to_dto(event: PolicyEventOrm) -> PolicyEventDTO:
+    return PolicyEventDTO(
+        id=event.id,
+        kind=cast(PolicyEventKind, event.kind),
+        subject=event.subject,
+        policy_epoch=event.policy_epoch,
+        created_at=_iso(event.created_at),
+    )
+
+
+def record(session: Session, kind: PolicyEventKind, subject: str, *, policy_epoch: int | None = None) -> None:
+    """Append a policy event in the caller's transaction.
+
+    The event becomes visible to listeners only when the change that caused it
+    commits, so clients never evict a cache entry for a rolled-back edit.
+    """
+
+    session.add(PolicyEventOrm(kind=kind, subject=subject, policy_epoch=policy_epoch))
+
+
+def latest_cursor(session: Session) -> int:
+    return int(session.execute(select(func.coalesce(func.max(PolicyEventOrm.id), 0))).scalar_one())
+
+
+def _utc(dt: DT.datetime) -> DT.datetime:
+    # SQLite returns naive UTC timestamps.
+    return dt if dt.tzinfo is not None else dt.replace(tzinfo=DT.timezone.utc)
+
+
+def list_since(
+    session: Session, cursor: int | None, *, limit: int = 500, commit_lag_sec: float = 5.0
+) -> PolicyEventsDTO:
+    """Return events after `cursor`.
+
+    A missing cursor (first subscription), a cursor the server has never
+    issued, or one older than the retained events (see `prune`) returns the
+    latest cursor with `reset=True` and no events.
+
+    Ids are allocated when an event is inserted but become visible when its
+    transaction commits, so with concurrent writers a missing id may still
+    show up later. The page stops before such a gap until the events after
+    it are `commit_lag_sec` old; after that the gap is taken to be a
+    rolled-back insert and skipped.
+    """
+
+    latest = latest_cursor(session)
+    oldest = session.execute(select(func.min(PolicyEventOrm.id))).scalar_one_or_none()
+    if cursor is None or cursor < 0 or cursor > latest or (oldest is not None and cursor < oldest - 1):
+        return PolicyEventsDTO(cursor=latest, reset=True)
+
+    events = session.scalars(
+        select(PolicyEventOrm).where(PolicyEventOrm.id > cursor).order_by(PolicyEventOrm.id).limit(limit)
+    ).all()
+    settled = DT.datetime.now(DT.timezone.utc) - DT.timedelta(seconds=commit_lag_sec)
+    page: list[PolicyEventOrm] = []
+    expected = cursor + 1
+    for event in events:
+        if event.id != expected and _utc(event.created_at) > settled:
+            break
+        page.append(event)
+        expected = event.id + 1
+    if not page:
+        return PolicyEventsDTO(cursor=cursor)
+    return PolicyEventsDTO(cursor=page[-1].id, events=[event_to_dto(e) for e in page])
+
+
+def prune(session: Session, *, retention_days: int) -> int:
+    """Delete events older than `retention_days`; return how many.
+
+    The newest event is always kept so `latest_cursor` (and SQLite's next id)
+    never goes backwards. Clients behind the pruned range get `reset=True`.
+    """
+
+    cutoff = DT.datetime.now(DT.timezone.utc) - DT.timedelta(days=retention_days)
+    result = session.execute(
+        delete(PolicyEventOrm).where(
+            PolicyEventOrm.created_at < cutoff, PolicyEventOrm.id < latest_cursor(session)
+        )
+    )
+    return int(getattr(result, "rowcount", 0) or 0)
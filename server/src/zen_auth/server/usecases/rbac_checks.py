@@ -4,6 +4,7 @@ from typing import Iterable
 
 from sqlalchemy import select
 from sqlalchemy.orm import Session
+from zen_auth.timing import phase
 
 from ..persistence.models import role_scopes, user_roles
 
@@ -15,7 +16,8 @@ def user_has_role(session: Session, user_name: str, role_name: str) -> bool:
         .where(user_roles.c.user_name == user_name, user_roles.c.role_name == role_name)
         .limit(1)
     )
-    return session.execute(stmt).first() is not None
+    with phase("rbac"):
+        return session.execute(stmt).first() is not None
 
 
 def user_allowed_scope(session: Session, user_name: str, scope_name: str) -> bool:
@@ -25,7 +27,8 @@ def user_allowed_scope(session: Session, user_name: str, scope_name: str) -> boo
         .where(user_roles.c.user_name == user_name, role_scopes.c.scope_name == scope_name)
         .limit(1)
     )
-    return session.execute(stmt).first() is not None
+    with phase("rbac"):
+        return session.execute(stmt).first() is not None
 
 
 def user_allowed_scopes(session: Session, user_name: str) -> set[str]:
@@ -35,7 +38,8 @@ def user_allowed_scopes(session: Session, user_name: str) -> set[str]:
         .select_from(user_roles.join(role_scopes, user_roles.c.role_name == role_scopes.c.role_name))
         .where(user_roles.c.user_name == user_name)
     )
-    return set(session.scalars(stmt).all())
+    with phase("rbac"):
+        return set(session.scalars(stmt).all())
 
 
 def has_required_roles(user_roles: Iterable[str], required_roles: Iterable[str]) -> bool:
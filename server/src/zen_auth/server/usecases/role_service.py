@@ -8,6 +8,7 @@ from zen_auth.dto import RoleDTO, RoleDTOForCreate, RoleDTOForUpdate, ScopeDTO
 from zen_auth.errors import RoleAlreadyExistsError, RoleNotFoundError
 
 from ..persistence.models import RoleOrm, ScopeOrm
+from . import policy_events
 
 
 def _iso(dt: DT.datetime | None) -> str | None:
@@ -86,6 +87,7 @@ def delete_role(session: Session, role_name: str) -> None:
     obj.scopes.clear()
 
     session.delete(obj)
+    policy_events.record(session, "role_deleted", role_name)
     session.flush()
 
 
@@ -117,5 +119,6 @@ def set_role_scopes(session: Session, role_name: str, scope_names: list[str]) ->
         raise RoleNotFoundError(f"Role not found: {role_name}", role_name=role_name)
 
     role.scopes = _ensure_scopes(session, scope_names)
+    policy_events.record(session, "role_scopes", role_name)
     session.flush()
     return [scope_to_dto(s) for s in role.scopes]
@@ -8,6 +8,7 @@ from zen_auth.dto import RoleDTO, ScopeDTO, ScopeDTOForCreate, ScopeDTOForUpdate
 from zen_auth.errors import ScopeAlreadyExistsError, ScopeNotFoundError
 
 from ..persistence.models import RoleOrm, ScopeOrm
+from . import policy_events
 
 
 def _iso(dt: DT.datetime | None) -> str | None:
@@ -80,6 +81,7 @@ def create_scope(session: Session, scope: ScopeDTOForCreate) -> ScopeDTO:
     # Optional initial role bindings
     if scope.roles:
         obj.roles = _ensure_roles(session, scope.roles)
+        policy_events.record(session, "scope_roles", scope.scope_name)
         session.flush()
 
     return scope_to_dto(obj)
@@ -96,6 +98,7 @@ def update_scope(session: Session, scope_name: str, patch: ScopeDTOForUpdate) ->
         obj.description = patch.description
     if patch.roles is not None:
         obj.roles = _ensure_roles(session, patch.roles)
+        policy_events.record(session, "scope_roles", scope_name)
 
     session.flush()
     return scope_to_dto(obj)
@@ -108,4 +111,5 @@ def delete_scope(session: Session, scope_name: str) -> None:
 
     obj.roles.clear()
     session.delete(obj)
+    policy_events.record(session, "scope_deleted", scope_name)
     session.flush()
@@ -2,7 +2,6 @@ from __future__ import annotations
 
 import datetime as DT
 
-from passlib.context import CryptContext
 from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 from zen_auth.dto import UserDTO, UserDTOForCreate, UserDTOForUpdate
@@ -11,10 +10,12 @@ from zen_auth.errors import (
     UserNotFoundError,
     UserVerificationError,
 )
+from zen_auth.timing import phase
 
 from ..persistence.models import RoleOrm, UserOrm
-
-pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from . import policy_events
+from .passwords import pwd_ctx  # noqa: F401  (backward-compatible import location)
+from .passwords import hash_password, verify_and_update_password
 
 
 def _iso(dt: DT.datetime | None) -> str | None:
@@ -79,7 +80,7 @@ def create_user(session: Session, user: UserDTOForCreate, *, already_hashed: boo
 
     obj = UserOrm(
         user_name=user.user_name,
-        password=user.password if already_hashed else pwd_ctx.hash(user.password),
+        password=user.password if already_hashed else hash_password(user.password),
         real_name=user.real_name,
         division=user.division,
         description=user.description,
@@ -98,7 +99,7 @@ def update_user(session: Session, user: UserDTOForUpdate, *, already_hashed: boo
 
     epoch_change = False
     if user.password is not None:
-        obj.password = user.password if already_hashed else pwd_ctx.hash(user.password)
+        obj.password = user.password if already_hashed else hash_password(user.password)
         epoch_change = True
     if user.roles is not None:
         obj.roles = _ensure_roles(session, user.roles)
@@ -114,6 +115,7 @@ def update_user(session: Session, user: UserDTOForUpdate, *, already_hashed: boo
 
     if epoch_change:
         obj.policy_epoch += 1
+        policy_events.record(session, "user_epoch", obj.user_name, policy_epoch=obj.policy_epoch)
 
     session.flush()
     return user_to_dto(obj)
@@ -124,15 +126,24 @@ def delete_user(session: Session, user_name: str) -> None:
     if obj is None:
         raise UserNotFoundError(f"User not found: {user_name}", user_name=user_name)
     session.delete(obj)
+    policy_events.record(session, "user_deleted", user_name)
     session.flush()
 
 
 def verify_user(session: Session, user_name: str, password: str) -> UserDTO:
-    obj = session.get(UserOrm, user_name)
+    with phase("db_user"):
+        obj = session.get(UserOrm, user_name)
     if obj is None:
         raise UserNotFoundError(f"User not found: {user_name}", user_name=user_name)
-    if not pwd_ctx.verify(password, obj.password):
+    with phase("password"):
+        ok, new_hash = verify_and_update_password(password, obj.password)
+    if not ok:
         raise UserVerificationError(f"Invalid credentials: {user_name}", user_name=user_name)
+    if new_hash is not None:
+        # Outdated scheme/cost: store the rehash. The password itself did not
+        # change, so the policy epoch (and issued tokens) stay valid.
+        obj.password = new_hash
+        session.flush()
     return user_to_dto(obj)
 
 
@@ -144,7 +155,8 @@ def change_password(session: Session, user_name: str, new_password: str) -> User
     if obj is None:
         raise UserNotFoundError(f"User not found: {user_name}", user_name=user_name)
 
-    obj.password = pwd_ctx.hash(new_password)
+    obj.password = hash_password(new_password)
     obj.policy_epoch += 1
+    policy_events.record(session, "user_epoch", obj.user_name, policy_epoch=obj.policy_epoch)
     session.flush()
     return user_to_dto(obj)
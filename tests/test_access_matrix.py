@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import csv
+import importlib.util
+import io
+import sys
+import threading
+from pathlib import Path
+from typing import Protocol, cast
+
+import pytest
+from fastapi.testclient import TestClient
+from zen_auth.dto import UserDTOForUpdate
+from zen_auth.errors import InvalidTokenError
+from zen_auth.server.config import ZENAUTH_SERVER_CONFIG
+from zen_auth.server.persistence.session import (
+    create_engine_from_dsn,
+    create_sessionmaker,
+    session_scope,
+)
+from zen_auth.server.run import create_app
+from zen_auth.server.usecases import user_service
+from zen_auth.server.usecases.access_matrix import AccessMatrix, AccessMatrixCache
+
+from tests.paths import api_path
+
+_SCRIPTS = Path(__file__).resolve().parents[1] / "server" / "src" / "scripts"
+_FIXTURES = Path(__file__).resolve().parent / "fixtures" / "csv_import"
+
+
+class ScriptModule(Protocol):
+    def main(self, argv: list[str] | None = None) -> int: ...
+
+
+def _load_script(name: str) -> ScriptModule:
+    module_name = f"zenauth_{name}"
+    spec = importlib.util.spec_from_file_location(module_name, _SCRIPTS / f"{name}.py")
+    assert spec is not None
+    assert spec.loader is not None
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = mod
+    spec.loader.exec_module(mod)
+    return cast(ScriptModule, mod)
+
+
+def _seed(tmp_path: Path) -> str:
+    """Fixture roles/scopes plus alice (admin), bob (viewer), carol (both) and dave (no roles)."""
+
+    dsn = f"sqlite+pysqlite:///{(tmp_path / 'access.sqlite3').as_posix()}"
+    users = tmp_path / "users.csv"
+    users.write_text(
+        'user_name,password,roles\nalice,pw,admin\nbob,pw,viewer\ncarol,pw,"admin,viewer"\ndave,pw,\n',
+        encoding="utf-8",
+    )
+    import_csv = _load_script("import_csv")
+    argv = ["--dsn", dsn, "--roles", str(_FIXTURES / "roles.csv"), "--scopes", str(_FIXTURES / "scopes.csv")]
+    assert import_csv.main([*argv, "--users", str(users)]) == 0
+    return dsn
+
+
+def _matrix(dsn: str, batch_size: int = 10000) -> AccessMatrix:
+    engine = create_engine_from_dsn(dsn)
+    with session_scope(create_sessionmaker(engine)) as session:
+        matrix = AccessMatrix.build(session, batch_size=batch_size)
+    engine.dispose()
+    return matrix
+
+
+def test_access_matrix_lookups(tmp_path: Path) -> None:
+    # batch_size=1 crosses a partition boundary inside every user's grants.
+    matrix = _matrix(_seed(tmp_path), batch_size=1)
+
+    assert matrix.users == ["alice", "bob", "carol", "dave"]
+    assert len(matrix.set_roles) == 4
+    assert matrix.scopes_of("alice") == ["read:users", "write:users"]
+    assert matrix.scopes_of("bob") == ["read:users"]
+    assert matrix.scopes_of("dave") == []
+    assert matrix.scopes_of("nobody") == []
+
+    assert list(matrix.users_with("read:users")) == ["alice", "bob", "carol"]
+    assert list(matrix.users_with("write:users")) == ["alice", "carol"]
+    assert list(matrix.users_with("nope")) == []
+    assert matrix.roles_with("read:users") == ["admin", "viewer"]
+    assert matrix.scope_counts() == {"read:users": 3, "write:users": 2}
+
+
+def test_access_report_lines(tmp_path: Path) -> None:
+    matrix = _matrix(_seed(tmp_path))
+    text = "".join(matrix.report_lines(rows_per_chunk=2))
+    rows = list(csv.reader(io.StringIO(text)))
+
+    assert rows[0] == ["user_name", "scope_name", "roles"]
+    assert rows[1:] == [
+        ["alice", "read:users", "admin"],
+        ["alice", "write:users", "admin"],
+        ["bob", "read:users", "viewer"],
+        ["carol", "read:users", "admin,viewer"],
+        ["carol", "write:users", "admin"],
+    ]
+    assert 'carol,read:users,"admin,viewer"\n' in text
+
+
+def test_access_report_script(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    dsn = _seed(tmp_path)
+    capsys.readouterr()
+    access_report = _load_script("access_report")
+    out = tmp_path / "report.csv"
+
+    argv = ["--dsn", dsn, "--scope", "write:users", "--user", "bob", "--counts", "--out", str(out)]
+    assert access_report.main(argv) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines == [
+        "# write:users (roles: admin)",
+        "alice",
+        "carol",
+        "# bob",
+        "read:users",
+        "read:users\t3",
+        "write:users\t2",
+    ]
+    assert out.read_text(encoding="utf-8") == "".join(_matrix(dsn).report_lines())
+
+
+def test_access_matrix_cache_rebuilds_on_change(tmp_path: Path) -> None:
+    dsn = _seed(tmp_path)
+    engine = create_engine_from_dsn(dsn)
+    sessions = create_sessionmaker(engine)
+    cache = AccessMatrixCache()
+
+    threads = [threading.Thread(target=cache.get, args=(sessions,)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    matrix = cache.get(sessions)
+    assert cache.builds == 1
+    assert matrix.users == ["alice", "bob", "carol", "dave"]
+
+    users = tmp_path / "more.csv"
+    users.write_text("user_name,password,roles\nerin,pw,\n", encoding="utf-8")
+    assert _load_script("import_csv").main(["--dsn", dsn, "--users", str(users)]) == 0
+    assert "erin" in cache.get(sessions).users
+    assert cache.builds == 2
+
+    with session_scope(sessions) as session:
+        user_service.update_user(session, UserDTOForUpdate(user_name="dave", roles=["viewer"]))
+    assert cache.get(sessions).scopes_of("dave") == ["read:users"]
+    assert cache.builds == 3
+
+    cache.configure(ttl_sec=0.0)
+    cache.get(sessions)
+    assert cache.builds == 4
+    engine.dispose()
+
+
+def test_admin_access_endpoints(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    dsn = f"sqlite+pysqlite:///{(tmp_path / 'access_api.sqlite3').as_posix()}"
+    argv = ["--dsn", dsn, "--roles", str(_FIXTURES / "roles.csv"), "--scopes", str(_FIXTURES / "scopes.csv")]
+    assert _load_script("import_csv").main(argv) == 0
+    monkeypatch.setenv("ZENAUTH_SERVER_DSN", dsn)
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN", "true")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN_USER", "admin")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN_PASSWORD", "pw")
+    ZENAUTH_SERVER_CONFIG.cache_clear()
+
+    with TestClient(create_app()) as client:
+        with pytest.raises(InvalidTokenError):
+            client.get(api_path("/admin/access/summary"))
+
+        res = client.post(api_path("/auth/login"), data={"user_name": "admin", "password": "pw"})
+        assert res.status_code == 200
+
+        res = client.get(api_path("/admin/access/summary"))
+        assert res.status_code == 200
+        summary = res.json()
+        assert summary["users"] == 1 and summary["role_sets"] == 1
+        assert summary["scope_counts"] == {"read:users": 1, "write:users": 1}
+
+        res = client.get(api_path("/admin/access/scope/write:users"))
+        assert res.status_code == 200
+        assert res.text.splitlines() == ["user_name,roles", "admin,admin"]
+        assert client.get(api_path("/admin/access/scope/nope")).status_code == 404
+
+        res = client.get(api_path("/admin/access/report"))
+        assert res.status_code == 200
+        assert res.headers["cache-control"] == "no-store"
+        assert res.headers["content-type"].startswith("text/csv")
+        lines = res.text.splitlines()
+        assert lines[0] == "user_name,scope_name,roles"
+        assert lines[1:] == ["admin,read:users,admin", "admin,write:users,admin"]
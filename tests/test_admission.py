@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import anyio
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from zen_auth.server.admission import PASSWORD_ADMISSION, AdmissionController
+from zen_auth.server.config import ZENAUTH_SERVER_CONFIG
+from zen_auth.server.run import create_app
+
+from tests.paths import api_path
+
+
+def test_queue_is_bounded_and_fifo() -> None:
+    ctl = AdmissionController("test", max_concurrent=1, max_queue=1, queue_timeout_sec=5.0)
+    order: list[str] = []
+
+    async def main() -> None:
+        await ctl.acquire()
+
+        async def waiter() -> None:
+            await ctl.acquire()
+            order.append("waiter")
+            ctl.release()
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(waiter)
+            await anyio.sleep(0.01)
+            assert ctl.stats()["waiting"] == 1
+
+            with pytest.raises(HTTPException) as exc_info:
+                await ctl.acquire()
+            assert exc_info.value.status_code == 429
+            assert int((exc_info.value.headers or {})["Retry-After"]) >= 1
+
+            order.append("holder")
+            ctl.release(0.1)
+
+    anyio.run(main)
+
+    assert order == ["holder", "waiter"]
+    stats = ctl.stats()
+    assert stats["active"] == 0 and stats["waiting"] == 0
+    assert stats["admitted"] == 2 and stats["rejected"] == 1
+
+
+def test_cancelled_waiter_does_not_leak_its_slot() -> None:
+    ctl = AdmissionController("test", max_concurrent=1, max_queue=4, queue_timeout_sec=5.0)
+
+    async def request() -> None:
+        await ctl.acquire()
+        ctl.release()
+
+    async def main() -> None:
+        await ctl.acquire()
+
+        # Cancelled while still queued: the waiter leaves the queue.
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(request)
+            await anyio.sleep(0.01)
+            assert ctl.stats()["waiting"] == 1
+            tg.cancel_scope.cancel()
+        assert ctl.stats()["waiting"] == 0
+
+        # Cancelled after `release()` handed it the slot but before it ran:
+        # the slot goes back instead of being held by a dead waiter.
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(request)
+            await anyio.sleep(0.01)
+            ctl.release()
+            tg.cancel_scope.cancel()
+
+    anyio.run(main)
+    stats = ctl.stats()
+    assert stats["active"] == 0 and stats["waiting"] == 0
+
+
+def test_queue_timeout_rejects() -> None:
+    ctl = AdmissionController("test", max_concurrent=1, max_queue=4, queue_timeout_sec=0.02)
+
+    async def main() -> None:
+        await ctl.acquire()
+        with pytest.raises(HTTPException) as exc_info:
+            await ctl.acquire()
+        assert exc_info.value.status_code == 429
+
+    anyio.run(main)
+    stats = ctl.stats()
+    assert stats["timed_out"] == 1 and stats["waiting"] == 0 and stats["active"] == 1
+
+
+def test_verify_user_returns_429_when_saturated(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("ZENAUTH_SERVER_DSN", f"sqlite+pysqlite:///{tmp_path / 'admission.sqlite3'}")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN", "true")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN_USER", "admin")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN_PASSWORD", "pw")
+    monkeypatch.setenv("ZENAUTH_SERVER_ADMISSION_PASSWORD_MAX_CONCURRENT", "1")
+    monkeypatch.setenv("ZENAUTH_SERVER_ADMISSION_PASSWORD_MAX_QUEUE", "0")
+    ZENAUTH_SERVER_CONFIG.cache_clear()
+
+    try:
+        with TestClient(create_app()) as client:
+            anyio.run(PASSWORD_ADMISSION.acquire)
+            try:
+                res = client.post(api_path("/verify/user"), json={"user_name": "admin", "password": "pw"})
+                assert res.status_code == 429
+                assert res.headers["Retry-After"].isdigit()
+            finally:
+                PASSWORD_ADMISSION.release()
+
+            res = client.post(api_path("/verify/user"), json={"user_name": "admin", "password": "pw"})
+            assert res.status_code == 200
+            assert PASSWORD_ADMISSION.stats()["active"] == 0
+    finally:
+        ZENAUTH_SERVER_CONFIG.cache_clear()
+        PASSWORD_ADMISSION.configure()
@@ -0,0 +1,205 @@
+# mypy: disable-error-code=no-untyped-def
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+
+import pytest
+from zen_auth.claims import base as claims_base
+from zen_auth.logger import (
+    AUDIT_LOGGER,
+    ZENAUTH_AUDIT_CONFIG,
+    AuditFormatter,
+    AuditQueueHandler,
+    configure_audit_logging,
+    flush_audit_log,
+)
+from zen_auth.logger.pipeline import open_sink
+from zen_auth.logger.sampling import AuditPolicy, SuccessAuditSampler, parse_policies
+
+
+class _MemorySink:
+    def __init__(self, gate: threading.Event | None = None) -> None:
+        self.batches: list[list[str]] = []
+        self.gate = gate
+
+    def write_batch(self, lines: list[str]) -> None:
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.batches.append(list(lines))
+
+    def close(self) -> None:
+        pass
+
+
+def _record(msg: str, **extra: object) -> logging.LogRecord:
+    record = AUDIT_LOGGER.makeRecord(AUDIT_LOGGER.name, logging.INFO, __file__, 0, msg, (), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_queue_handler_writes_json_lines_in_batches():
+    sink = _MemorySink()
+    handler = AuditQueueHandler(sink, batch_size=2)
+
+    for i in range(5):
+        handler.emit(_record(f"m{i}", user_name="alice", result="success", required_context=["admin"]))
+    assert handler.drain(timeout=5)
+
+    lines = [line for batch in sink.batches for line in batch]
+    assert [json.loads(line)["msg"] for line in lines] == ["m0", "m1", "m2", "m3", "m4"]
+    assert all(len(batch) <= 2 for batch in sink.batches)
+    first = json.loads(lines[0])
+    assert first["user_name"] == "alice"
+    assert first["required_context"] == ["admin"]
+    assert first["ts"].endswith("+09:00")
+    assert handler.stats()["written"] == 5
+    handler.close()
+
+
+@pytest.mark.parametrize(
+    "overflow, expected",
+    [("drop_new", ["m0", "m1", "m2"]), ("drop_oldest", ["m0", "m3", "m4"])],
+)
+def test_queue_handler_overflow_policy_counts_drops(overflow, expected):
+    gate = threading.Event()
+    sink = _MemorySink(gate)
+    handler = AuditQueueHandler(sink, queue_size=2, overflow=overflow, batch_size=1)
+
+    # The writer takes m0 and blocks in the sink, so the queue holds two more.
+    handler.emit(_record("m0"))
+    for _ in range(100):
+        if handler.stats()["queue_depth"] == 0:
+            break
+        threading.Event().wait(0.01)
+    for i in range(1, 5):
+        handler.emit(_record(f"m{i}"))
+
+    stats = handler.stats()
+    assert stats["dropped"] == 2
+    gate.set()
+    assert handler.drain(timeout=5)
+    assert [json.loads(b[0])["msg"] for b in sink.batches] == expected
+    handler.close()
+
+
+def test_open_sink_file(tmp_path):
+    path = tmp_path / "audit.log"
+    handler = AuditQueueHandler(open_sink(f"file:{path}"))
+    handler.emit(_record("to-file"))
+    handler.close()
+    assert json.loads(path.read_text(encoding="utf-8"))["msg"] == "to-file"
+
+    with pytest.raises(ValueError):
+        open_sink("kafka:somewhere")
+
+
+def test_token_is_not_decoded_unless_timestamps_are_enabled(monkeypatch):
+    calls: list[str] = []
+
+    def fake_decode(token, *args, **kwargs):
+        calls.append(token)
+        return {"iat": 1, "exp": 2}
+
+    class _Req:
+        cookies = {"access_token": "tok"}
+        headers: dict[str, str] = {}
+
+    monkeypatch.setattr(claims_base.jwt, "decode", fake_decode)
+    ZENAUTH_AUDIT_CONFIG.cache_clear()
+    assert claims_base._token_data(_Req()) is None  # type: ignore[arg-type]
+    assert calls == []
+
+    monkeypatch.setenv("ZENAUTH_AUDIT_INCLUDE_TOKEN_TIMESTAMPS", "true")
+    ZENAUTH_AUDIT_CONFIG.cache_clear()
+    try:
+        assert claims_base._token_data(_Req()) == {"iat": 1, "exp": 2}  # type: ignore[arg-type]
+        assert calls == ["tok"]
+    finally:
+        ZENAUTH_AUDIT_CONFIG.cache_clear()
+
+
+def test_parse_success_policies():
+    policies = parse_policies(
+        "verify_user_role=aggregate, verify_user_scope=sample:0.25, *=aggregate+sample:0.5"
+    )
+    assert policies == {
+        "verify_user_role": AuditPolicy(sample_rate=0.0, aggregate=True),
+        "verify_user_scope": AuditPolicy(sample_rate=0.25, aggregate=False),
+        "*": AuditPolicy(sample_rate=0.5, aggregate=True),
+    }
+    assert parse_policies("") == {}
+    with pytest.raises(ValueError):
+        parse_policies("verify_user_role=sample:2")
+    with pytest.raises(ValueError):
+        parse_policies("verify_user_role=everything")
+
+
+def test_wildcard_policy_never_covers_admin_actions():
+    sampler = SuccessAuditSampler(parse_policies("*=aggregate"), AUDIT_LOGGER)
+    try:
+        assert not sampler.admit("verify_user_role", "alice", {"action": "verify_user_role"})
+        assert not sampler.admit("role_or_scope", "alice", ["admin"])
+        for action in ("create", "update", "delete", "export", "access_review", "login"):
+            assert sampler.admit(action, "admin", {"action": action})
+    finally:
+        sampler.close()
+    with pytest.raises(ValueError, match="always logged"):
+        parse_policies("delete=sample:0.1")
+
+
+def test_success_events_are_aggregated_but_failures_always_logged(monkeypatch):
+    monkeypatch.setenv("ZENAUTH_AUDIT_BACKGROUND", "false")
+    monkeypatch.setenv("ZENAUTH_AUDIT_SUCCESS_POLICIES", "verify_user_role=aggregate")
+    ZENAUTH_AUDIT_CONFIG.cache_clear()
+    records: list[logging.LogRecord] = []
+
+    class _Collect(logging.Handler):
+        def emit(self, record: logging.LogRecord) -> None:
+            records.append(record)
+
+    collector = _Collect()
+    configure_audit_logging()
+    AUDIT_LOGGER.addHandler(collector)
+    try:
+        ctx = {"action": "verify_user_role", "required_roles": ["admin", "ops"], "has_role": True}
+        for _ in range(3):
+            claims_base.log_audit_success("ok", "alice", required_context=ctx)
+        claims_base.log_audit_success("ok", "bob", required_context=ctx)
+        claims_base.log_audit_fail("denied", "alice", required_context=ctx)
+        claims_base.log_audit_success("ok", "alice", required_context={"action": "verify_user"})
+        assert [r.getMessage() for r in records] == ["denied", "ok"]
+
+        flush_audit_log()
+        aggregates = {r.user_name: r for r in records if r.getMessage() == "audit aggregate"}  # type: ignore[attr-defined]
+        assert aggregates["alice"].count == 3  # type: ignore[attr-defined]
+        assert aggregates["bob"].count == 1  # type: ignore[attr-defined]
+        line = json.loads(AuditFormatter().format(aggregates["alice"]))
+        assert line["required_context"] == {
+            "action": "verify_user_role",
+            "required": ["required_roles:admin", "required_roles:ops"],
+        }
+        assert line["count"] == 3
+    finally:
+        AUDIT_LOGGER.removeHandler(collector)
+        monkeypatch.delenv("ZENAUTH_AUDIT_BACKGROUND")
+        monkeypatch.delenv("ZENAUTH_AUDIT_SUCCESS_POLICIES")
+        ZENAUTH_AUDIT_CONFIG.cache_clear()
+        configure_audit_logging()
+
+
+def test_library_writes_synchronously_server_queues(monkeypatch):
+    monkeypatch.delenv("ZENAUTH_AUDIT_BACKGROUND", raising=False)
+    ZENAUTH_AUDIT_CONFIG.cache_clear()
+    try:
+        assert not isinstance(configure_audit_logging(), AuditQueueHandler)
+        assert isinstance(configure_audit_logging(background_by_default=True), AuditQueueHandler)
+        monkeypatch.setenv("ZENAUTH_AUDIT_BACKGROUND", "false")
+        ZENAUTH_AUDIT_CONFIG.cache_clear()
+        assert not isinstance(configure_audit_logging(background_by_default=True), AuditQueueHandler)
+    finally:
+        monkeypatch.delenv("ZENAUTH_AUDIT_BACKGROUND", raising=False)
+        ZENAUTH_AUDIT_CONFIG.cache_clear()
+        configure_audit_logging()
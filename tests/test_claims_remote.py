@@ -123,3 +123,25 @@ async def test_remote_guard_non_200_returns_invalid_token(monkeypatch):
 
     with pytest.raises(InvalidTokenError):
         dep(req, resp, "Bearer tok")
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("status_code, code", [(503, "overloaded"), (429, "rate_limited")])
+async def test_remote_guard_shed_response_is_not_invalid_token(monkeypatch, status_code, code):
+    monkeypatch.setattr(Claims, "_validate_token", classmethod(lambda cls, t: SimpleClaims()))
+
+    def fake_post(*args, **kwargs):
+        resp = FakeResp(status_code=status_code)
+        resp.headers = {"Retry-After": "2"}
+        return resp
+
+    monkeypatch.setattr(Claims, "_POST", fake_post)
+
+    dep = Claims.guard(url="http://auth/verify/token")
+    req = DummyReq(cookies={})
+    resp = Response()
+
+    with pytest.raises(ClaimSourceError) as ei:
+        dep(req, resp, "Bearer tok")
+    assert ei.value.code == code
+    assert ei.value.info == {"status_code": status_code, "retry_after": 2}
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import importlib.util
+import json
+import sys
+from pathlib import Path
+from typing import Protocol, cast
+
+import pytest
+from fastapi.testclient import TestClient
+from zen_auth.errors import InvalidTokenError
+from zen_auth.server.config import ZENAUTH_SERVER_CONFIG
+from zen_auth.server.run import create_app
+
+from tests.paths import api_path
+
+_SCRIPTS = Path(__file__).resolve().parents[1] / "server" / "src" / "scripts"
+
+
+class ScriptModule(Protocol):
+    def main(self, argv: list[str] | None = None) -> int: ...
+
+
+def _load_script(name: str) -> ScriptModule:
+    module_name = f"zenauth_{name}"
+    spec = importlib.util.spec_from_file_location(module_name, _SCRIPTS / f"{name}.py")
+    assert spec is not None
+    assert spec.loader is not None
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = mod
+    spec.loader.exec_module(mod)
+    return cast(ScriptModule, mod)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson"])
+def test_export_import_round_trip_is_lossless(tmp_path: Path, fmt: str) -> None:
+    import_csv = _load_script("import_csv")
+    export_csv = _load_script("export_csv")
+
+    fixtures = Path(__file__).resolve().parent / "fixtures" / "csv_import"
+    dsn1 = f"sqlite+pysqlite:///{(tmp_path / 'one.sqlite3').as_posix()}"
+    dsn2 = f"sqlite+pysqlite:///{(tmp_path / 'two.sqlite3').as_posix()}"
+    kinds = ("roles", "scopes", "apps", "users")
+    assert (
+        import_csv.main(["--dsn", dsn1, *(a for k in kinds for a in (f"--{k}", str(fixtures / f"{k}.csv")))])
+        == 0
+    )
+
+    # Description with a comma, a quote and a newline must survive CSV quoting.
+    users = tmp_path / "users.csv"
+    users.write_text('user_name,description\nalice,"a, ""b""\nc"\n', encoding="utf-8")
+    assert import_csv.main(["--dsn", dsn1, "--users", str(users)]) == 0
+
+    first, second = tmp_path / "first", tmp_path / "second"
+    assert export_csv.main(["--dsn", dsn1, "--out-dir", str(first), "--format", fmt]) == 0
+    files = [str(first / f"{k}.{fmt}") for k in kinds]
+    argv = ["--dsn", dsn2, "--password-already-hashed"]
+    assert import_csv.main([*argv, *(a for k, f in zip(kinds, files) for a in (f"--{k}", f))]) == 0
+    assert export_csv.main(["--dsn", dsn2, "--out-dir", str(second), "--format", fmt]) == 0
+
+    for kind in kinds:
+        assert (first / f"{kind}.{fmt}").read_text(encoding="utf-8") == (second / f"{kind}.{fmt}").read_text(
+            encoding="utf-8"
+        )
+    text = (first / f"users.{fmt}").read_text(encoding="utf-8")
+    assert text.count("$2b$") == 2  # stored hashes, not the plaintext
+
+
+def test_admin_export_endpoint_streams_ndjson(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("ZENAUTH_SERVER_DSN", f"sqlite+pysqlite:///{tmp_path / 'export.sqlite3'}")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN", "true")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN_USER", "admin")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN_PASSWORD", "pw")
+    ZENAUTH_SERVER_CONFIG.cache_clear()
+
+    with TestClient(create_app()) as client:
+        with pytest.raises(InvalidTokenError):
+            client.get(api_path("/admin/export/users"))
+
+        res = client.post(api_path("/auth/login"), data={"user_name": "admin", "password": "pw"})
+        assert res.status_code == 200
+
+        res = client.get(api_path("/admin/export/users"), params={"format": "ndjson"})
+        assert res.status_code == 200
+        assert res.headers["content-type"].startswith("application/x-ndjson")
+        records = [json.loads(line) for line in res.text.splitlines()]
+        assert [r["user_name"] for r in records] == ["admin"]
+        assert records[0]["roles"] == ["admin"] and records[0]["password"].startswith("$2")
+
+        res = client.get(api_path("/admin/export/roles"))
+        assert res.status_code == 200
+        assert res.text.splitlines()[0] == "role_name,display_name,description,scopes"
+
+        assert client.get(api_path("/admin/export/nope")).status_code == 422
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import importlib.util
+import sys
+from pathlib import Path
+from typing import Any, Protocol, cast
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from zen_auth.server.persistence.models import RoleOrm, UserOrm, user_roles
+from zen_auth.server.persistence.session import create_engine_from_dsn
+
+_HASH = "$2b$12$" + "x" * 53
+
+
+class GenerateDatasetModule(Protocol):
+    def generate_dataset(self, dsn: str, **kwargs: Any) -> dict[str, int]: ...
+
+
+def _load_module() -> GenerateDatasetModule:
+    script_path = Path(__file__).resolve().parents[1] / "server" / "src" / "scripts" / "generate_dataset.py"
+    module_name = "zenauth_generate_dataset"
+    spec = importlib.util.spec_from_file_location(module_name, script_path)
+    assert spec is not None
+    assert spec.loader is not None
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = mod
+    spec.loader.exec_module(mod)
+    return cast(GenerateDatasetModule, mod)
+
+
+def _grants(dsn: str) -> list[tuple[str, str]]:
+    with Session(create_engine_from_dsn(dsn)) as session:
+        return [(u, r) for u, r in session.execute(select(user_roles).order_by("user_name", "role_name"))]
+
+
+def test_generate_dataset_bulk_and_deterministic(tmp_path: Path) -> None:
+    mod = _load_module()
+    dsns = [f"sqlite+pysqlite:///{(tmp_path / f'gen{i}.sqlite3').as_posix()}" for i in range(2)]
+    for dsn in dsns:
+        counts = mod.generate_dataset(
+            dsn, users=2500, roles=12, scopes=30, seed=7, password_hash=_HASH, chunk_size=1000, quiet=True
+        )
+        assert counts["users"] == 2500 and counts["roles"] == 12 and counts["scopes"] == 30
+        assert counts["user_roles"] >= 2500
+
+    grants = _grants(dsns[0])
+    assert grants == _grants(dsns[1])
+
+    per_role: dict[str, int] = {}
+    for _, role in grants:
+        per_role[role] = per_role.get(role, 0) + 1
+    # Zipf: the most popular role is granted far more often than the least popular one.
+    assert per_role["role_0001"] > 5 * min(n for r, n in per_role.items() if r != "admin")
+
+    with Session(create_engine_from_dsn(dsns[0])) as session:
+        user = session.get(UserOrm, "user_0000001")
+        assert user is not None and user.password == _HASH and user.roles
+        admin = session.get(RoleOrm, "admin")
+        assert admin is not None and len(admin.scopes) == 30
+        assert session.execute(select(func.count()).select_from(UserOrm)).scalar_one() == 2500
+
+
+def test_generate_dataset_refuses_non_empty_db(tmp_path: Path) -> None:
+    mod = _load_module()
+    dsn = f"sqlite+pysqlite:///{(tmp_path / 'gen.sqlite3').as_posix()}"
+    mod.generate_dataset(dsn, users=10, password_hash=_HASH, quiet=True)
+    try:
+        mod.generate_dataset(dsn, users=10, password_hash=_HASH, quiet=True)
+    except SystemExit as e:
+        assert "empty database" in str(e)
+    else:
+        raise AssertionError("expected SystemExit")
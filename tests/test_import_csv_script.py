@@ -5,10 +5,19 @@ import sys
 from pathlib import Path
 from typing import Protocol, cast
 
+import pytest
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from zen_auth.server.persistence.init_db import init_db
-from zen_auth.server.persistence.models import ClientAppOrm, RoleOrm, ScopeOrm, UserOrm
+from zen_auth.server.persistence.models import (
+    ClientAppOrm,
+    PolicyEventOrm,
+    RoleOrm,
+    ScopeOrm,
+    UserOrm,
+)
 from zen_auth.server.persistence.session import create_engine_from_dsn
+from zen_auth.server.usecases.passwords import verify_password
 
 
 class ImportCsvModule(Protocol):
@@ -123,3 +132,266 @@ def test_import_csv_upsert_updates_existing_data(tmp_path: Path) -> None:
         viewer = session.get(RoleOrm, "viewer")
         assert viewer is not None
         assert viewer.display_name == "Viewer v2"
+
+
+def test_import_csv_bulk_matches_row_mode(tmp_path: Path) -> None:
+    mod = _load_import_csv_module()
+
+    fixtures = Path(__file__).resolve().parent / "fixtures" / "csv_import"
+    dsn = f"sqlite+pysqlite:///{(tmp_path / 'bulk.sqlite3').as_posix()}"
+    args = ["--dsn", dsn, "--roles", str(fixtures / "roles.csv"), "--users", str(fixtures / "users.csv")]
+    assert mod.main([*args, "--bulk", "--chunk-size", "1"]) == 0
+
+    users = tmp_path / "users_update.csv"
+    users.write_text(
+        "user_name,password,roles,real_name,division,description\n"
+        "alice,,admin,,Engineering,updated\n"
+        'bob,,"viewer,ops",,Sales,\n'
+        "carol,pw,newrole,Carol,QA,\n",
+        encoding="utf-8",
+    )
+    assert mod.main(["--dsn", dsn, "--users", str(users), "--bulk", "--chunk-size", "2"]) == 0
+
+    engine = create_engine_from_dsn(dsn)
+    with Session(engine) as session:
+        alice = session.get(UserOrm, "alice")
+        assert alice is not None
+        assert alice.real_name == "Alice" and alice.description == "updated"
+        assert alice.policy_epoch == 1  # same roles and division: no epoch bump
+        assert alice.password.startswith("$2")
+
+        bob = session.get(UserOrm, "bob")
+        assert bob is not None
+        assert {r.role_name for r in bob.roles} == {"viewer", "ops"}
+        assert bob.division == "Sales" and bob.policy_epoch == 2
+
+        carol = session.get(UserOrm, "carol")
+        assert carol is not None and [r.role_name for r in carol.roles] == ["newrole"]
+        assert session.get(RoleOrm, "newrole") is not None
+
+        events = session.scalars(select(PolicyEventOrm.subject).where(PolicyEventOrm.kind == "user_epoch"))
+        assert sorted(events) == ["bob"]
+
+
+def test_import_csv_bulk_create_mode_reports_line(tmp_path: Path) -> None:
+    mod = _load_import_csv_module()
+
+    fixtures = Path(__file__).resolve().parent / "fixtures" / "csv_import"
+    dsn = f"sqlite+pysqlite:///{(tmp_path / 'bulk.sqlite3').as_posix()}"
+    users = str(fixtures / "users.csv")
+    assert mod.main(["--dsn", dsn, "--users", users, "--bulk"]) == 0
+    with pytest.raises(SystemExit, match="line 2: user already exists: alice"):
+        mod.main(["--dsn", dsn, "--users", users, "--bulk", "--mode", "create"])
+
+
+def test_import_csv_bulk_create_mode_rejects_duplicate_in_chunk(tmp_path: Path) -> None:
+    mod = _load_import_csv_module()
+
+    users = tmp_path / "users.csv"
+    users.write_text("user_name,password,roles\nalice,pw1,viewer\nalice,pw2,admin\n", encoding="utf-8")
+    dsn = f"sqlite+pysqlite:///{(tmp_path / 'bulk.sqlite3').as_posix()}"
+    with pytest.raises(SystemExit, match="line 3: user already exists: alice"):
+        mod.main(["--dsn", dsn, "--users", str(users), "--bulk", "--mode", "create"])
+
+
+def test_import_csv_bulk_repeated_user_across_chunks_keeps_hash(tmp_path: Path) -> None:
+    mod = _load_import_csv_module()
+
+    users = tmp_path / "users.csv"
+    users.write_text(
+        "user_name,password,roles\nalice,pw,viewer\nalice,pw,viewer\nalice,pw,viewer\n", encoding="utf-8"
+    )
+    dsn = f"sqlite+pysqlite:///{(tmp_path / 'bulk.sqlite3').as_posix()}"
+    argv = ["--dsn", dsn, "--users", str(users), "--bulk", "--chunk-size", "1", "--hash-workers", "2"]
+    assert mod.main(argv) == 0
+
+    engine = create_engine_from_dsn(dsn)
+    with Session(engine) as session:
+        alice = session.get(UserOrm, "alice")
+        assert alice is not None and alice.policy_epoch == 1
+        stored = alice.password
+    assert mod.main(argv) == 0
+    with Session(engine) as session:
+        alice = session.get(UserOrm, "alice")
+        assert alice is not None and alice.policy_epoch == 1 and alice.password == stored
+
+
+def test_import_csv_bulk_hashes_in_worker_pool(tmp_path: Path) -> None:
+    mod = _load_import_csv_module()
+
+    users = tmp_path / "users.csv"
+    users.write_text(
+        "user_name,password,roles\n" + "".join(f"u{i},pw{i},viewer\n" for i in range(5)) + "u1,,\n",
+        encoding="utf-8",
+    )
+    dsn = f"sqlite+pysqlite:///{(tmp_path / 'bulk.sqlite3').as_posix()}"
+    argv = ["--dsn", dsn, "--users", str(users), "--bulk", "--chunk-size", "2", "--hash-workers", "2"]
+    assert mod.main(argv) == 0
+
+    engine = create_engine_from_dsn(dsn)
+    with Session(engine) as session:
+        for i in range(5):
+            user = session.get(UserOrm, f"u{i}")
+            assert user is not None
+            assert verify_password(f"pw{i}", user.password)
+
+
+def test_import_csv_reads_ndjson_and_yaml(tmp_path: Path) -> None:
+    mod = _load_import_csv_module()
+
+    ndjson = tmp_path / "users.ndjson"
+    ndjson.write_text(
+        '{"user_name": "alice", "password": "h1", "roles": ["admin", "ops"], "policy_epoch": 3}\n'
+        "\n"
+        '{"user_name": "bob", "password": "h2", "roles": "viewer", "division": null}\n',
+        encoding="utf-8",
+    )
+    yml = tmp_path / "users.yaml"
+    yml.write_text(
+        "- user_name: carol\n"
+        "  password: h3\n"
+        "  roles: [viewer]\n"
+        "- user_name: dave\n"
+        "  password: h4\n"
+        "  division: Sales\n",
+        encoding="utf-8",
+    )
+    dsn = f"sqlite+pysqlite:///{(tmp_path / 'stream.sqlite3').as_posix()}"
+    common = ["--dsn", dsn, "--password-already-hashed"]
+    assert mod.main([*common, "--users", str(ndjson)]) == 0
+    assert mod.main([*common, "--users", str(yml), "--bulk"]) == 0
+
+    engine = create_engine_from_dsn(dsn)
+    with Session(engine) as session:
+        alice = session.get(UserOrm, "alice")
+        assert alice is not None and alice.policy_epoch == 3
+        assert {r.role_name for r in alice.roles} == {"admin", "ops"}
+        bob = session.get(UserOrm, "bob")
+        assert bob is not None and bob.division == "" and [r.role_name for r in bob.roles] == ["viewer"]
+        carol = session.get(UserOrm, "carol")
+        assert carol is not None and carol.password == "h3"
+        dave = session.get(UserOrm, "dave")
+        assert dave is not None and dave.division == "Sales" and dave.roles == []
+
+
+def test_import_csv_bulk_resumes_from_checkpoint(tmp_path: Path) -> None:
+    mod = _load_import_csv_module()
+
+    fixtures = Path(__file__).resolve().parent / "fixtures" / "csv_import"
+    users = tmp_path / "users.csv"
+    rows = [f"u{i},h{i},viewer\n" for i in range(5)]
+    rows[3] = "u3,,viewer\n"  # line 5: new user without password
+    users.write_text("user_name,password,roles\n" + "".join(rows), encoding="utf-8")
+    checkpoint = tmp_path / "users.ckpt"
+    dsn = f"sqlite+pysqlite:///{(tmp_path / 'resume.sqlite3').as_posix()}"
+    argv = [
+        *("--dsn", dsn, "--roles", str(fixtures / "roles.csv"), "--users", str(users)),
+        *("--mode", "create", "--password-already-hashed", "--bulk", "--chunk-size", "2"),
+        *("--checkpoint", str(checkpoint)),
+    ]
+
+    with pytest.raises(SystemExit, match="line 5: password is required"):
+        mod.main(argv)
+    assert '"line": 3' in checkpoint.read_text(encoding="utf-8")
+
+    rows[3] = "u3,h3,viewer\n"
+    users.write_text("user_name,password,roles\n" + "".join(rows), encoding="utf-8")
+    # create mode would fail on roles and u0/u1 if they were applied again.
+    assert mod.main(argv) == 0
+    assert not checkpoint.exists()
+
+    engine = create_engine_from_dsn(dsn)
+    with Session(engine) as session:
+        assert sorted(session.scalars(select(UserOrm.user_name))) == [f"u{i}" for i in range(5)]
+
+
+def test_import_csv_row_mode_commits_chunks_and_resumes(tmp_path: Path) -> None:
+    mod = _load_import_csv_module()
+
+    fixtures = Path(__file__).resolve().parent / "fixtures" / "csv_import"
+    users = tmp_path / "users.csv"
+    rows = [f"u{i},pw,viewer\n" for i in range(4)]
+    rows[2] = "u2,,viewer\n"
+    users.write_text("user_name,password,roles\n" + "".join(rows), encoding="utf-8")
+    checkpoint = tmp_path / "import.ckpt"
+    dsn = f"sqlite+pysqlite:///{(tmp_path / 'rows.sqlite3').as_posix()}"
+    argv = [
+        *("--dsn", dsn, "--roles", str(fixtures / "roles.csv"), "--users", str(users)),
+        *("--mode", "create", "--chunk-size", "1", "--checkpoint", str(checkpoint)),
+    ]
+
+    with pytest.raises(SystemExit, match="line 4: .*password is required .*2 rows before"):
+        mod.main(argv)
+    assert '"entity": "users", "line": 3' in checkpoint.read_text(encoding="utf-8")
+    engine = create_engine_from_dsn(dsn)
+    with Session(engine) as session:
+        assert sorted(session.scalars(select(UserOrm.user_name))) == ["u0", "u1"]
+
+    rows[2] = "u2,pw,viewer\n"
+    users.write_text("user_name,password,roles\n" + "".join(rows), encoding="utf-8")
+    # create mode would fail on the roles and u0/u1 if they were applied again.
+    assert mod.main(argv) == 0
+    assert not checkpoint.exists()
+    with Session(engine) as session:
+        assert sorted(session.scalars(select(UserOrm.user_name))) == [f"u{i}" for i in range(4)]
+
+
+def test_import_csv_bulk_dry_run_counts_repeated_user_once(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    mod = _load_import_csv_module()
+
+    users = tmp_path / "users.csv"
+    users.write_text(
+        "user_name,password,roles\nalice,pw,viewer\nbob,pw,\nalice,pw,viewer\n", encoding="utf-8"
+    )
+    dsn = f"sqlite+pysqlite:///{(tmp_path / 'dry.sqlite3').as_posix()}"
+    argv = ["--dsn", dsn, "--users", str(users), "--bulk", "--chunk-size", "1", "--dry-run"]
+    assert mod.main(argv) == 0
+    assert "users: 2 created, 0 updated, 1 unchanged" in capsys.readouterr().out
+
+    engine = create_engine_from_dsn(dsn)
+    with Session(engine) as session:
+        assert session.scalars(select(UserOrm.user_name)).all() == []
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_import_csv_rerun_changes_nothing(
+    tmp_path: Path, bulk: bool, capsys: pytest.CaptureFixture[str]
+) -> None:
+    mod = _load_import_csv_module()
+
+    fixtures = Path(__file__).resolve().parent / "fixtures" / "csv_import"
+    dsn = f"sqlite+pysqlite:///{(tmp_path / 'diff.sqlite3').as_posix()}"
+    args = [
+        *("--dsn", dsn, "--roles", str(fixtures / "roles.csv"), "--scopes", str(fixtures / "scopes.csv")),
+        *("--apps", str(fixtures / "apps.csv"), "--users", str(fixtures / "users.csv")),
+        *(["--bulk"] if bulk else []),
+    ]
+    assert mod.main(args) == 0
+
+    engine = create_engine_from_dsn(dsn)
+    with Session(engine) as session:
+        events_before = len(session.scalars(select(PolicyEventOrm.id)).all())
+
+    # Plaintext passwords are verified against the stored hashes, not rehashed.
+    assert mod.main(args) == 0
+    out = capsys.readouterr().out
+    assert "users: 0 created, 0 updated, 2 unchanged" in out
+    assert "roles: 0 created, 0 updated" in out and "scopes: 0 created, 0 updated" in out
+
+    users = tmp_path / "users.csv"
+    users.write_text(
+        "user_name,password,roles,division\nalice,pw,admin,Research\nbob,pw2,viewer,Support\n",
+        encoding="utf-8",
+    )
+    assert mod.main(["--dsn", dsn, "--users", str(users), "--dry-run", *(["--bulk"] if bulk else [])]) == 0
+    out = capsys.readouterr().out
+    assert "users: 0 created, 2 updated, 0 unchanged" in out and "Dry run" in out
+    if bulk:
+        assert "changed fields: division 1, password 1; policy_epoch bumps: 2" in out
+
+    with Session(engine) as session:
+        assert len(session.scalars(select(PolicyEventOrm.id)).all()) == events_before
+        alice = session.get(UserOrm, "alice")
+        assert alice is not None and alice.division == "Engineering" and alice.policy_epoch == 1
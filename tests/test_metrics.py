@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from zen_auth.server.api.v1.url_names import VERIFY_TOKEN_API
+from zen_auth.server.config import ZENAUTH_SERVER_CONFIG
+from zen_auth.server.metrics import Registry
+from zen_auth.server.run import create_app
+
+from tests.paths import api_path
+
+
+def test_text_exposition_format() -> None:
+    registry = Registry()
+    requests = registry.counter("t_requests_total", "Requests.", ("route",))
+    latency = registry.histogram("t_seconds", "Latency.", buckets=(0.1, 1.0))
+
+    @registry.collector("t_depth", "Queue depth.")
+    def _depth():  # type: ignore[no-untyped-def]
+        yield "", (("queue", 'a"b'),), 3.0
+
+    requests.inc("/x")
+    requests.inc("/x")
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5.0)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE t_requests_total counter" in lines
+    assert 't_requests_total{route="/x"} 2' in lines
+    assert "# TYPE t_seconds histogram" in lines
+    assert 't_seconds_bucket{le="0.1"} 1' in lines
+    assert 't_seconds_bucket{le="1"} 2' in lines
+    assert 't_seconds_bucket{le="+Inf"} 3' in lines
+    assert "t_seconds_count 3" in lines
+    assert "t_seconds_sum 5.55" in lines
+    assert 't_depth{queue="a\\"b"} 3' in lines
+
+
+def test_metrics_endpoint(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("ZENAUTH_SERVER_DSN", f"sqlite+pysqlite:///{tmp_path / 'metrics.sqlite3'}")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN", "true")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN_USER", "admin")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN_PASSWORD", "pw")
+    monkeypatch.setenv("ZENAUTH_SERVER_METRICS_ENABLED", "true")
+    monkeypatch.setenv("ZENAUTH_SERVER_METRICS_TOKEN", "scrape-secret")
+    ZENAUTH_SERVER_CONFIG.cache_clear()
+
+    try:
+        with TestClient(create_app()) as client:
+            res = client.post(api_path("/verify/user"), json={"user_name": "admin", "password": "pw"})
+            assert res.status_code == 200
+            token = res.json()["data"]["token"]
+            res = client.post(api_path("/verify/token"), json={"token": token})
+            assert res.status_code == 200
+
+            assert client.get("/metrics").status_code == 401
+            res = client.get("/metrics", headers={"Authorization": "Bearer wrong"})
+            assert res.status_code == 401 and res.headers["WWW-Authenticate"] == "Bearer"
+
+            res = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+            assert res.status_code == 200
+            assert res.headers["content-type"].startswith("text/plain; version=0.0.4")
+            text = res.text
+    finally:
+        ZENAUTH_SERVER_CONFIG.cache_clear()
+
+    route = VERIFY_TOKEN_API
+    assert f'zenauth_http_requests_total{{route="{route}",method="POST",status="200"}}' in text
+    assert f'zenauth_http_request_duration_seconds_count{{route="{route}"}}' in text
+    assert 'zenauth_password_seconds_count{op="verify"}' in text
+    assert 'zenauth_jwt_seconds_count{op="decode"}' in text
+    assert 'zenauth_jwt_seconds_count{op="encode"}' in text
+    assert "zenauth_db_pool_wait_seconds_count" in text
+    assert 'zenauth_db_pool{field="checked_out"}' in text
+    assert 'zenauth_route_class{route_class="verify",field="limit"} 32' in text
+    assert 'zenauth_admission{field="admitted"}' in text
+    assert 'zenauth_cache_requests_total{cache="server_config",result="hit"}' in text
+
+
+def test_metrics_are_disabled_by_default(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("ZENAUTH_SERVER_METRICS_ENABLED", raising=False)
+    ZENAUTH_SERVER_CONFIG.cache_clear()
+    try:
+        assert TestClient(create_app()).get("/metrics").status_code == 404
+    finally:
+        ZENAUTH_SERVER_CONFIG.cache_clear()
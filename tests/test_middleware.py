@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from zen_auth.server.api.util.req_id import current_req_id
+from zen_auth.server.config import ZENAUTH_SERVER_CONFIG
+from zen_auth.server.middleware import ServerMiddleware
+
+
+@pytest.fixture
+def client(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> TestClient:
+    monkeypatch.setenv("ZENAUTH_SERVER_DSN", f"sqlite+pysqlite:///{tmp_path / 'mw.sqlite3'}")
+    monkeypatch.setenv("ZENAUTH_SERVER_CSRF_TRUSTED_ORIGINS", "http://trusted.example, http://testserver")
+    ZENAUTH_SERVER_CONFIG.cache_clear()
+
+    app = FastAPI()
+    app.add_middleware(ServerMiddleware)
+
+    @app.post("/echo")
+    def echo(request: Request) -> dict[str, str]:
+        return {"state": request.state.req_id, "context": current_req_id()}
+
+    return TestClient(app)
+
+
+def test_request_id_is_exposed_to_handlers_and_headers(client: TestClient) -> None:
+    res = client.post("/echo")
+    assert res.status_code == 200
+    req_id = res.headers["X-Request-ID"]
+    assert req_id
+    assert res.json() == {"state": req_id, "context": req_id}
+    assert client.post("/echo").headers["X-Request-ID"] != req_id
+
+
+def test_csrf_checks_only_cookie_authenticated_unsafe_requests(client: TestClient) -> None:
+    # No auth cookie: not a CSRF target.
+    assert client.post("/echo", headers={"Origin": "http://evil.example"}).status_code == 200
+
+    client.cookies.set("access_token", "x")
+    res = client.post("/echo", headers={"Origin": "http://evil.example"})
+    assert res.status_code == 403
+    assert res.text == "CSRF verification failed (origin)"
+    assert res.headers["X-Request-ID"]
+
+    assert client.post("/echo", headers={"Origin": "http://trusted.example"}).status_code == 200
+    assert client.post("/echo", headers={"Referer": "http://trusted.example/a?b=1"}).status_code == 200
+    assert client.post("/echo", headers={"Referer": "http://evil.example/"}).status_code == 403
+    assert client.post("/echo").text == "CSRF verification failed (missing origin)"
@@ -0,0 +1,102 @@
+# mypy: disable-error-code=no-untyped-def
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+from pathlib import Path
+from typing import Any
+
+import pytest
+from zen_auth.dto import UserDTOForCreate
+from zen_auth.errors import UserVerificationError
+from zen_auth.server.persistence.init_db import init_db
+from zen_auth.server.persistence.models import UserOrm
+from zen_auth.server.persistence.session import (
+    create_engine_from_dsn,
+    create_sessionmaker,
+    session_scope,
+)
+from zen_auth.server.usecases import passwords, user_service
+
+
+@pytest.fixture(autouse=True)
+def _inline_after_test():
+    yield
+    passwords.shutdown()
+    passwords.configure_context(["bcrypt"])
+
+
+@pytest.mark.parametrize("kind", ["inline", "thread", "process"])
+def test_hash_and_verify_on_each_executor(kind):
+    passwords.configure(kind, workers=1)
+    assert passwords.executor_kind() == kind
+
+    hashed = passwords.hash_password("s3cret")
+    assert hashed.startswith("$2b$")
+    assert passwords.verify_password("s3cret", hashed) is True
+    assert passwords.verify_password("wrong", hashed) is False
+
+
+def test_verify_user_rehashes_outdated_hashes(tmp_path):
+    engine = create_engine_from_dsn(f"sqlite:///{tmp_path / 'rehash.db'}")
+    init_db(engine)
+    session_factory = create_sessionmaker(engine)
+
+    passwords.configure_context(["bcrypt"], {"bcrypt": {"rounds": 4}})
+    with session_scope(session_factory) as session:
+        user_service.create_user(session, UserDTOForCreate(user_name="alice", password="pw", roles=[]))
+        old_hash = session.get(UserOrm, "alice").password  # type: ignore[union-attr]
+        assert old_hash.startswith("$2b$04$")
+
+    # Retune the cost: the next successful login migrates the hash.
+    passwords.configure_context(["bcrypt"], {"bcrypt": {"rounds": 5}})
+    with session_scope(session_factory) as session:
+        with pytest.raises(UserVerificationError):
+            user_service.verify_user(session, "alice", "wrong")
+    with session_scope(session_factory) as session:
+        assert session.get(UserOrm, "alice").password == old_hash  # type: ignore[union-attr]
+        user = user_service.verify_user(session, "alice", "pw")
+        assert user.policy_epoch == 1
+
+    # Switch schemes: bcrypt hashes are still accepted, then replaced.
+    passwords.configure_context(["scrypt", "bcrypt"], {"scrypt": {"rounds": 10}})
+    with session_scope(session_factory) as session:
+        assert session.get(UserOrm, "alice").password.startswith("$2b$05$")  # type: ignore[union-attr]
+        user_service.verify_user(session, "alice", "pw")
+    with session_scope(session_factory) as session:
+        assert session.get(UserOrm, "alice").password.startswith("$scrypt$ln=10,")  # type: ignore[union-attr]
+        user_service.verify_user(session, "alice", "pw")
+
+
+def _load_calibrate_module() -> Any:
+    script_path = (
+        Path(__file__).resolve().parents[1] / "server" / "src" / "scripts" / "calibrate_password_hash.py"
+    )
+    module_name = "zenauth_calibrate_password_hash"
+    spec = importlib.util.spec_from_file_location(module_name, script_path)
+    assert spec is not None
+    assert spec.loader is not None
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def test_calibration_recommends_highest_cost_within_budget(monkeypatch):
+    mod = _load_calibrate_module()
+    monkeypatch.setattr(mod, "CANDIDATES", {"bcrypt": [{"rounds": 4}, {"rounds": 5}, {"rounds": 6}]})
+    timings = {4: 10.0, 5: 40.0, 6: 90.0}
+
+    def fake_measure(scheme, params, *, samples, concurrency):
+        t = timings[params["rounds"]]
+        return mod.Measurement(scheme=scheme, params=params, p50_ms=t, p95_ms=t, max_ms=t)
+
+    monkeypatch.setattr(mod, "measure", fake_measure)
+    results, best = mod.calibrate(["bcrypt"], target_p95_ms=50.0, samples=3, concurrency=1)
+    assert [m.params["rounds"] for m in results] == [4, 5, 6]
+    assert best["bcrypt"].params == {"rounds": 5}
+    assert mod.env_lines(best["bcrypt"], ["argon2", "bcrypt"]) == [
+        "ZENAUTH_SERVER_PASSWORD_SCHEMES=bcrypt,argon2",
+        "ZENAUTH_SERVER_PASSWORD_BCRYPT_ROUNDS=5",
+    ]
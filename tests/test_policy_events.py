@@ -0,0 +1,235 @@
+# mypy: disable-error-code=no-untyped-def
+
+from __future__ import annotations
+
+import datetime as DT
+
+import pytest
+from fastapi.responses import Response
+from fastapi.testclient import TestClient
+from zen_auth.claims import Claims
+from zen_auth.claims.listener import PolicyEventListener
+from zen_auth.dto import (
+    PolicyEventDTO,
+    PolicyEventsDTO,
+    RoleDTOForCreate,
+    UserDTOForCreate,
+    UserDTOForUpdate,
+)
+from zen_auth.server.config import ZENAUTH_SERVER_CONFIG
+from zen_auth.server.persistence.init_db import init_db
+from zen_auth.server.persistence.models import PolicyEventOrm
+from zen_auth.server.persistence.session import (
+    create_engine_from_dsn,
+    create_sessionmaker,
+    session_scope,
+)
+from zen_auth.server.run import create_app
+from zen_auth.server.usecases import policy_events, role_service, user_service
+
+from tests.paths import api_path
+
+
+def _session_factory(dsn: str):
+    engine = create_engine_from_dsn(dsn)
+    init_db(engine)
+    return create_sessionmaker(engine)
+
+
+def test_service_changes_record_policy_events(tmp_path):
+    session_factory = _session_factory(f"sqlite:///{tmp_path / 'events.db'}")
+
+    with session_scope(session_factory) as session:
+        first = policy_events.list_since(session, None)
+        assert first.reset is True
+        assert first.cursor == 0
+
+        role_service.create_role(session, RoleDTOForCreate(role_name="viewer", display_name="Viewer"))
+        user_service.create_user(session, UserDTOForCreate(user_name="alice", password="pw", roles=[]))
+        role_service.set_role_scopes(session, "viewer", ["read:users"])
+        user_service.update_user(session, UserDTOForUpdate(user_name="alice", roles=["viewer"]))
+        # Display-only edits do not bump the epoch and publish nothing.
+        user_service.update_user(session, UserDTOForUpdate(user_name="alice", real_name="Alice"))
+        user_service.delete_user(session, "alice")
+
+    with session_scope(session_factory) as session:
+        page = policy_events.list_since(session, 0)
+        assert [(e.kind, e.subject, e.policy_epoch) for e in page.events] == [
+            ("role_scopes", "viewer", None),
+            ("user_epoch", "alice", 2),
+            ("user_deleted", "alice", None),
+        ]
+        assert page.cursor == page.events[-1].id
+
+        assert policy_events.list_since(session, page.cursor).events == []
+        assert policy_events.list_since(session, page.cursor + 100).reset is True
+
+
+def _event(event_id: int, age: DT.timedelta) -> PolicyEventOrm:
+    created_at = DT.datetime.now(DT.timezone.utc) - age
+    return PolicyEventOrm(id=event_id, kind="user_epoch", subject=f"u{event_id}", created_at=created_at)
+
+
+def test_list_since_waits_for_gaps_to_commit(tmp_path):
+    session_factory = _session_factory(f"sqlite:///{tmp_path / 'gaps.db'}")
+
+    # Id 3 is allocated but not visible: an in-flight transaction or a rollback.
+    with session_scope(session_factory) as session:
+        session.add_all([_event(1, DT.timedelta()), _event(2, DT.timedelta()), _event(4, DT.timedelta())])
+
+    with session_scope(session_factory) as session:
+        page = policy_events.list_since(session, 0, commit_lag_sec=60)
+        assert [e.id for e in page.events] == [1, 2]
+        assert page.cursor == 2
+        assert policy_events.list_since(session, 2, commit_lag_sec=60).events == []
+
+        # The late commit shows up at the held-back cursor.
+        session.add(_event(3, DT.timedelta()))
+        session.flush()
+        assert [e.id for e in policy_events.list_since(session, 2, commit_lag_sec=60).events] == [3, 4]
+
+    with session_scope(session_factory) as session:
+        session.add(_event(6, DT.timedelta(minutes=5)))
+        session.flush()
+        # Past the commit lag the gap at 5 is treated as a rolled-back insert.
+        assert [e.id for e in policy_events.list_since(session, 4, commit_lag_sec=60).events] == [6]
+
+
+def test_prune_resets_cursors_behind_retention(tmp_path):
+    session_factory = _session_factory(f"sqlite:///{tmp_path / 'prune.db'}")
+
+    with session_scope(session_factory) as session:
+        session.add_all([_event(1, DT.timedelta(days=40)), _event(2, DT.timedelta(days=40))])
+        session.add(_event(3, DT.timedelta(days=1)))
+
+    with session_scope(session_factory) as session:
+        assert policy_events.prune(session, retention_days=30) == 2
+        assert policy_events.list_since(session, 0).reset is True
+        page = policy_events.list_since(session, 2)
+        assert page.reset is False
+        assert [e.id for e in page.events] == [3]
+
+        # The newest event survives so the cursor never moves backwards.
+        assert policy_events.prune(session, retention_days=0) == 0
+        assert policy_events.latest_cursor(session) == 3
+
+
+def test_policy_events_endpoint_resumes_from_cursor(monkeypatch, tmp_path):
+    dsn = f"sqlite+pysqlite:///{tmp_path / 'zenauth_test.sqlite3'}"
+    monkeypatch.setenv("ZENAUTH_SERVER_DSN", dsn)
+    monkeypatch.setenv("ZENAUTH_SERVER_POLICY_EVENTS_POLL_INTERVAL_SEC", "0.01")
+    ZENAUTH_SERVER_CONFIG.cache_clear()
+
+    with TestClient(create_app()) as client:
+        endpoints = client.get(api_path("/meta/endpoints")).json()["data"]
+        assert endpoints["policy_events"].endswith(api_path("/meta/policy_events"))
+
+        res = client.get(api_path("/meta/policy_events"))
+        assert res.status_code == 200
+        data = res.json()["data"]
+        assert data["reset"] is True
+        cursor = data["cursor"]
+
+        # Nothing new: the long-poll returns an empty page after `wait`.
+        res = client.get(api_path("/meta/policy_events"), params={"cursor": cursor, "wait": 0.05})
+        assert res.json()["data"] == {"cursor": cursor, "reset": False, "events": []}
+
+        with session_scope(_session_factory(dsn)) as session:
+            user_service.create_user(session, UserDTOForCreate(user_name="bob", password="pw", roles=[]))
+            user_service.change_password(session, "bob", "pw2")
+
+        res = client.get(api_path("/meta/policy_events"), params={"cursor": cursor, "wait": 1})
+        data = res.json()["data"]
+        assert [(e["kind"], e["subject"]) for e in data["events"]] == [("user_epoch", "bob")]
+        assert data["cursor"] > cursor
+
+
+def _user_json(user_name: str) -> dict[str, object]:
+    return {
+        "user_name": user_name,
+        "roles": [],
+        "real_name": "",
+        "division": "",
+        "description": "",
+        "policy_epoch": 1,
+    }
+
+
+class _Claims(Claims):
+    pass
+
+
+@pytest.fixture
+def cached_claims(monkeypatch):
+    monkeypatch.setattr(_Claims, "_VERIFY_CACHE_TTL_SEC", 600.0)
+    monkeypatch.setattr(_Claims, "_token_cache", {})
+    monkeypatch.setattr(_Claims, "_decision_cache", {})
+    monkeypatch.setattr(_Claims, "_validate_token", classmethod(lambda cls, t: cls.model_construct(sub="u")))
+    return _Claims
+
+
+class _Req:
+    cookies: dict[str, str] = {}
+    headers: dict[str, str] = {}
+
+
+def test_claims_cache_is_evicted_by_policy_events(cached_claims):
+    posted: list[str] = []
+
+    class Resp:
+        status_code = 200
+
+        def json(self):
+            return {"data": {"token": "tok2", "user": _user_json("u")}}
+
+    def fake_post(url, *args, **kwargs):
+        posted.append(url)
+        return Resp()
+
+    cached_claims._POST = staticmethod(fake_post)  # type: ignore[method-assign]
+    dep = cached_claims.guard(url="http://auth/verify/token")
+
+    dep(_Req(), Response(), "Bearer tok")
+    dep(_Req(), Response(), "Bearer tok")
+    assert len(posted) == 1
+
+    # An unrelated user's epoch bump keeps the entry.
+    other = PolicyEventDTO(id=1, kind="user_epoch", subject="someone", policy_epoch=2)
+    cached_claims.apply_policy_events(PolicyEventsDTO(cursor=1, events=[other]))
+    dep(_Req(), Response(), "Bearer tok")
+    assert len(posted) == 1
+
+    bumped = PolicyEventDTO(id=2, kind="user_epoch", subject="u", policy_epoch=2)
+    cached_claims.apply_policy_events(PolicyEventsDTO(cursor=2, events=[bumped]))
+    dep(_Req(), Response(), "Bearer tok")
+    assert len(posted) == 2
+
+
+def test_policy_listener_poll_applies_page_and_advances_cursor(cached_claims):
+    cached_claims._decision_cache[("u", "role", ("admin",), ())] = (0.0, True)
+    cached_claims._decision_cache[("v", "role", ("admin",), ())] = (0.0, True)
+    requested: list[dict[str, object]] = []
+
+    class Resp:
+        status_code = 200
+
+        def json(self):
+            return {
+                "data": {
+                    "cursor": 7,
+                    "reset": False,
+                    "events": [{"id": 7, "kind": "user_deleted", "subject": "u"}],
+                }
+            }
+
+    def fake_get(url, params=None, timeout=3.0, **kwargs):
+        requested.append(dict(params or {}))
+        return Resp()
+
+    cached_claims._GET = staticmethod(fake_get)  # type: ignore[method-assign]
+    listener = PolicyEventListener(cached_claims, "http://auth/meta/policy_events", wait_sec=1.0)
+
+    listener.poll_once()
+    assert listener.cursor == 7
+    assert requested == [{"cursor": None, "wait": 1.0}]
+    assert list(cached_claims._decision_cache) == [("v", "role", ("admin",), ())]
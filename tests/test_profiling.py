@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.types import Scope
+from zen_auth.server import middleware
+from zen_auth.server.config import ZENAUTH_SERVER_CONFIG
+from zen_auth.server.profiling import (
+    RequestProfile,
+    collapsed,
+    sample_stacks,
+    speedscope,
+)
+from zen_auth.server.route_classes import ROUTE_LIMITERS
+from zen_auth.server.run import create_app
+
+from tests.paths import api_path
+
+
+def _busy_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sample_stacks_sees_busy_thread() -> None:
+    stop = threading.Event()
+    thread = threading.Thread(target=_busy_loop, args=(stop,), name="busy")
+    thread.start()
+    try:
+        counts = sample_stacks(0.1, interval_sec=0.002)
+    finally:
+        stop.set()
+        thread.join()
+
+    busy = [stack for stack in counts if "_busy_loop" in stack]
+    assert busy and all(stack.startswith("busy;") for stack in busy)
+    assert collapsed(counts).splitlines()[0].rsplit(" ", 1)[1].isdigit()
+
+    doc = speedscope(counts, interval_sec=0.002)
+    profile = doc["profiles"][0]  # type: ignore[index]
+    frames = doc["shared"]["frames"]  # type: ignore[index]
+    assert len(profile["samples"]) == len(counts)
+    assert all(i < len(frames) for sample in profile["samples"] for i in sample)
+
+
+@pytest.fixture
+def admin_client(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Iterator[tuple[TestClient, str]]:
+    monkeypatch.setenv("ZENAUTH_SERVER_DSN", f"sqlite+pysqlite:///{tmp_path / 'profiling.sqlite3'}")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN", "true")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN_USER", "admin")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN_PASSWORD", "pw")
+    monkeypatch.setenv("ZENAUTH_SERVER_PROFILING_ENABLED", "true")
+    ZENAUTH_SERVER_CONFIG.cache_clear()
+    try:
+        with TestClient(create_app()) as client:
+            res = client.post(api_path("/verify/user"), json={"user_name": "admin", "password": "pw"})
+            client.cookies.clear()
+            yield client, res.json()["data"]["token"]
+    finally:
+        ZENAUTH_SERVER_CONFIG.cache_clear()
+
+
+def test_request_profile_for_admin(admin_client: tuple[TestClient, str]) -> None:
+    client, token = admin_client
+    auth = {"Authorization": f"Bearer {token}"}
+
+    res = client.post(api_path("/verify/token"), json={"token": token}, headers={"X-ZenAuth-Profile": "1"})
+    assert res.status_code == 200
+    assert "x-zenauth-profile" not in res.headers
+
+    res = client.post(
+        api_path("/verify/token"), json={"token": token}, headers={**auth, "X-ZenAuth-Profile": "1"}
+    )
+    assert res.status_code == 200
+    req_id = res.headers["x-zenauth-profile"]
+    assert req_id == res.headers["x-request-id"]
+
+    report = client.get(api_path(f"/admin/profile/requests/{req_id}"), headers=auth)
+    assert report.status_code == 200
+    assert "_verify_token" in report.text and "function calls" in report.text
+
+    assert client.get(api_path("/admin/profile/requests/unknown"), headers=auth).status_code == 404
+
+
+def test_profile_check_waits_for_the_class_limiter(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("ZENAUTH_SERVER_DSN", f"sqlite+pysqlite:///{tmp_path / 'profiling.sqlite3'}")
+    monkeypatch.setenv("ZENAUTH_SERVER_PROFILING_ENABLED", "true")
+    monkeypatch.setenv("ZENAUTH_SERVER_CONCURRENCY_AUTH", "1")
+    monkeypatch.setenv("ZENAUTH_SERVER_CONCURRENCY_QUEUE_TIMEOUT_SEC", "0.01")
+    ZENAUTH_SERVER_CONFIG.cache_clear()
+    checked: list[str] = []
+
+    async def authorize(scope: Scope) -> bool:
+        checked.append(scope["path"])
+        return False
+
+    monkeypatch.setattr(middleware, "authorize", authorize)
+    try:
+        with TestClient(create_app()) as client:
+            limiter = ROUTE_LIMITERS.limiter_for(api_path("/auth/logout"))
+            assert limiter is not None
+            holder = object()
+            client.portal.call(limiter.acquire_on_behalf_of_nowait, holder)
+            try:
+                headers = {"Authorization": "Bearer x", "X-ZenAuth-Profile": "1"}
+                res = client.post(api_path("/auth/logout"), headers=headers)
+                assert res.status_code == 429
+                assert checked == []
+            finally:
+                client.portal.call(limiter.release_on_behalf_of, holder)
+    finally:
+        ZENAUTH_SERVER_CONFIG.cache_clear()
+
+
+def test_overlapping_request_profiles_do_not_fail() -> None:
+    outer, inner = RequestProfile(), RequestProfile()
+    results: list[int] = []
+
+    def nested() -> int:
+        # Another request's profiled call while `outer` is being profiled.
+        thread = threading.Thread(target=lambda: results.append(inner.call(sum, range(10))))
+        thread.start()
+        thread.join()
+        return 1
+
+    assert outer.call(nested) == 1
+    assert results == [45]
+    assert "function calls" in outer.report()
+    assert inner.report().startswith("1 call(s) not profiled: the profiler was busy")
+
+
+def test_concurrent_profiled_requests(admin_client: tuple[TestClient, str]) -> None:
+    client, token = admin_client
+    headers = {"Authorization": f"Bearer {token}", "X-ZenAuth-Profile": "1"}
+    statuses: list[int] = []
+
+    def request() -> None:
+        for _ in range(5):
+            res = client.post(api_path("/verify/token"), json={"token": token}, headers=headers)
+            statuses.append(res.status_code)
+
+    threads = [threading.Thread(target=request) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert statuses == [200] * 20
+
+
+def test_sampling_endpoint(admin_client: tuple[TestClient, str]) -> None:
+    client, token = admin_client
+    auth = {"Authorization": f"Bearer {token}"}
+
+    res = client.get(
+        api_path("/admin/profile"), params={"seconds": 0.05, "format": "speedscope"}, headers=auth
+    )
+    assert res.status_code == 200
+    assert res.json()["profiles"][0]["type"] == "sampled"
+
+    start = time.perf_counter()
+    res = client.get(api_path("/admin/profile"), params={"seconds": 0.05, "include_idle": True}, headers=auth)
+    assert res.status_code == 200 and time.perf_counter() - start < 5
+    assert res.headers["content-type"].startswith("text/plain")
+
+
+def test_profiling_disabled_by_default(monkeypatch: pytest.MonkeyPatch) -> None:
+    ZENAUTH_SERVER_CONFIG.cache_clear()
+    try:
+        with TestClient(create_app()) as client:
+            assert client.get(api_path("/admin/profile")).status_code == 404
+    finally:
+        ZENAUTH_SERVER_CONFIG.cache_clear()
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from zen_auth.server.config import ZENAUTH_SERVER_CONFIG
+from zen_auth.server.persistence.query_log import (
+    install_query_hooks,
+    redact_params,
+    start_db_accounting,
+    stop_db_accounting,
+)
+from zen_auth.server.persistence.session import create_engine_from_dsn
+from zen_auth.server.run import create_app
+
+from tests.paths import api_path
+
+
+def test_redact_params() -> None:
+    assert redact_params({"user_name_1": "alice", "pw": "secret"}) == "{user_name_1=?, pw=?}"
+    assert redact_params(("alice", 1)) == "<2 params>"
+    assert redact_params([{"a": 1}, {"a": 2}]) == "<2 rows: {a=?}>"
+    assert redact_params(None) == "<none>"
+
+
+def test_statement_time_and_slow_log(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    engine = create_engine_from_dsn(f"sqlite:///{tmp_path / 'q.sqlite3'}")
+    install_query_hooks(engine, slow_query_ms=1e-6)
+
+    db, token = start_db_accounting("req-1")
+    try:
+        with caplog.at_level(logging.WARNING, logger="zen_auth.slow_query"), engine.connect() as conn:
+            conn.execute(text("SELECT :secret"), {"secret": "hunter2"})
+            conn.execute(text("SELECT 1"))
+    finally:
+        stop_db_accounting(token)
+
+    assert db.queries == 2 and db.ms > 0
+    messages = [r.getMessage() for r in caplog.records if r.name == "zen_auth.slow_query"]
+    assert len(messages) == 2
+    assert "req_id=req-1" in messages[0] and "params=<1 params>" in messages[0]
+    assert "hunter2" not in " ".join(messages)
+
+
+def test_slow_log_disabled(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    engine = create_engine_from_dsn(f"sqlite:///{tmp_path / 'q.sqlite3'}")
+    install_query_hooks(engine, slow_query_ms=0)
+    with caplog.at_level(logging.WARNING, logger="zen_auth.slow_query"), engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert not caplog.records
+
+
+def test_access_log_reports_db_time(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    monkeypatch.setenv("ZENAUTH_SERVER_DSN", f"sqlite+pysqlite:///{tmp_path / 'access.sqlite3'}")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN", "true")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN_USER", "admin")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN_PASSWORD", "pw")
+    ZENAUTH_SERVER_CONFIG.cache_clear()
+
+    try:
+        with TestClient(create_app()) as client, caplog.at_level(logging.INFO, logger="access"):
+            res = client.post(api_path("/verify/user"), json={"user_name": "admin", "password": "pw"})
+            assert res.status_code == 200
+    finally:
+        ZENAUTH_SERVER_CONFIG.cache_clear()
+
+    record = next(r for r in caplog.records if r.name == "access" and "/verify/user" in r.getMessage())
+    assert getattr(record, "db_queries") >= 1
+    assert float(getattr(record, "db_ms")) > 0
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Iterator
+
+import anyio
+import anyio.to_thread
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from zen_auth.errors import InvalidTokenError
+from zen_auth.server.admission import PASSWORD_ADMISSION
+from zen_auth.server.config import ZENAUTH_SERVER_CONFIG
+from zen_auth.server.middleware import ServerMiddleware
+from zen_auth.server.route_classes import (
+    PASSWORD_PATHS,
+    ROUTE_LIMITERS,
+    RouteClassLimiters,
+    route_class,
+)
+from zen_auth.server.run import create_app
+
+from tests.paths import api_path
+
+
+def test_route_class_by_prefix() -> None:
+    assert route_class(api_path("/verify/token")) == "verify"
+    assert route_class(api_path("/auth/login")) == "auth"
+    assert route_class(api_path("/admin/user/list")) == "admin"
+    assert route_class(api_path("/meta/policy_events")) is None
+    # Password checks are timed with logins; the async profiler holds no slot.
+    assert route_class(api_path("/verify/user")) == "auth"
+    assert route_class(api_path("/verify/user/role")) == "verify"
+    assert route_class(api_path("/admin/profile")) is None
+    assert route_class(api_path("/admin/profile/requests/x")) == "admin"
+
+
+def test_saturated_class_does_not_block_others() -> None:
+    limiters = RouteClassLimiters()
+
+    async def main() -> None:
+        limiters.configure({"verify": 2, "auth": 1, "admin": 1}, autosize_threadpool=True)
+        assert anyio.to_thread.current_default_thread_limiter().total_tokens == 2 + 1 + 1 + 8
+
+        admin = limiters.limiter_for(api_path("/admin/"))
+        verify = limiters.limiter_for(api_path("/verify/token"))
+        assert admin is not None and verify is not None
+
+        async def hold_admin() -> None:
+            async with admin:
+                await anyio.sleep(0.05)
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(hold_admin)
+            tg.start_soon(hold_admin)
+            await anyio.sleep(0.01)
+            assert limiters.stats()["admin"] == {"limit": 1, "active": 1, "waiting": 1}
+
+            with anyio.fail_after(0.01):
+                async with verify:
+                    assert limiters.stats()["verify"]["active"] == 1
+
+    anyio.run(main)
+
+
+def test_admin_stats_report_route_classes(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("ZENAUTH_SERVER_DSN", f"sqlite+pysqlite:///{tmp_path / 'route_classes.sqlite3'}")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN", "true")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN_USER", "admin")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN_PASSWORD", "pw")
+    monkeypatch.setenv("ZENAUTH_SERVER_CONCURRENCY_ADMIN", "2")
+    monkeypatch.setenv("ZENAUTH_SERVER_THREADPOOL_AUTOSIZE", "true")
+    ZENAUTH_SERVER_CONFIG.cache_clear()
+
+    try:
+        with TestClient(create_app()) as client:
+            res = client.post(api_path("/auth/login"), data={"user_name": "admin", "password": "pw"})
+            assert res.status_code == 200
+
+            res = client.get(api_path("/admin/stats"))
+            assert res.status_code == 200
+            body = res.json()
+            # The stats request itself holds the admin slot.
+            assert body["route_classes"]["admin"] == {"limit": 2, "active": 1, "waiting": 0}
+            password_slots = body["admission"]["password"]["max_concurrent"]
+            assert body["threadpool"]["limit"] == 32 + 8 + 2 + password_slots + 8
+            assert body["admission"]["password"]["admitted"] >= 1
+            # Login is admitted by password admission, not the auth class queue.
+            assert body["route_class_queues"]["auth"]["admitted"] == 0
+    finally:
+        ZENAUTH_SERVER_CONFIG.cache_clear()
+
+
+def test_threadpool_is_left_alone_by_default() -> None:
+    async def main() -> None:
+        pool = anyio.to_thread.current_default_thread_limiter()
+        before = pool.total_tokens
+        RouteClassLimiters().configure({"verify": 100, "auth": 100})
+        assert pool.total_tokens == before
+
+    anyio.run(main)
+
+
+def test_bounded_queue_rejects_with_429(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("ZENAUTH_SERVER_DSN", f"sqlite+pysqlite:///{tmp_path / 'bounded.sqlite3'}")
+    monkeypatch.setenv("ZENAUTH_SERVER_CONCURRENCY_AUTH", "1")
+    monkeypatch.setenv("ZENAUTH_SERVER_CONCURRENCY_QUEUE_TIMEOUT_SEC", "0.01")
+    ZENAUTH_SERVER_CONFIG.cache_clear()
+
+    try:
+        with TestClient(create_app()) as client:
+            limiter = ROUTE_LIMITERS.limiter_for(api_path("/auth/logout"))
+            assert limiter is not None
+            holder = object()
+            client.portal.call(limiter.acquire_on_behalf_of_nowait, holder)
+            try:
+                res = client.post(api_path("/auth/logout"))
+                assert res.status_code == 429
+                assert res.headers["Retry-After"] == "1"
+                # Token checks have their own class: this one reaches the handler.
+                with pytest.raises(InvalidTokenError):
+                    client.post(api_path("/verify/token"), json={"token": "x"})
+            finally:
+                client.portal.call(limiter.release_on_behalf_of, holder)
+
+            assert ROUTE_LIMITERS.queue_stats()["auth"]["timed_out"] == 1
+    finally:
+        ZENAUTH_SERVER_CONFIG.cache_clear()
+
+
+def test_password_endpoints_are_gated_by_admission_only(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setenv("ZENAUTH_SERVER_DSN", f"sqlite+pysqlite:///{tmp_path / 'password_gate.sqlite3'}")
+    monkeypatch.setenv("ZENAUTH_SERVER_CONCURRENCY_AUTH", "1")
+    monkeypatch.setenv("ZENAUTH_SERVER_CONCURRENCY_QUEUE_TIMEOUT_SEC", "0.01")
+    ZENAUTH_SERVER_CONFIG.cache_clear()
+
+    try:
+        with TestClient(create_app()) as client:
+            for path in PASSWORD_PATHS:
+                assert route_class(path) == "auth"
+                assert ROUTE_LIMITERS.limiter_for(path) is None
+
+            limiter = ROUTE_LIMITERS.limiter_for(api_path("/auth/logout"))
+            assert limiter is not None
+            holder = object()
+            client.portal.call(limiter.acquire_on_behalf_of_nowait, holder)
+            try:
+                # A full auth class does not hold up a password check.
+                res = client.post(api_path("/auth/login"), data={"user_name": "u", "password": "p"})
+                assert res.status_code != 429
+            finally:
+                client.portal.call(limiter.release_on_behalf_of, holder)
+
+            assert PASSWORD_ADMISSION.stats()["admitted"] >= 1
+            assert ROUTE_LIMITERS.queue_stats()["auth"]["timed_out"] == 0
+    finally:
+        ZENAUTH_SERVER_CONFIG.cache_clear()
+
+
+def test_streamed_body_does_not_hold_the_class_slot(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("ZENAUTH_SERVER_DSN", f"sqlite+pysqlite:///{tmp_path / 'stream.sqlite3'}")
+    ZENAUTH_SERVER_CONFIG.cache_clear()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        ROUTE_LIMITERS.configure({"admin": 1})
+        yield
+
+    app = FastAPI(lifespan=lifespan)
+    app.add_middleware(ServerMiddleware)
+    seen: list[int] = []
+
+    @app.get(api_path("/admin/stream"))
+    def stream() -> StreamingResponse:
+        seen.append(ROUTE_LIMITERS.stats()["admin"]["active"])
+
+        def body() -> Iterator[str]:
+            seen.append(ROUTE_LIMITERS.stats()["admin"]["active"])
+            yield "data"
+
+        return StreamingResponse(body())
+
+    try:
+        with TestClient(app) as client:
+            assert client.get(api_path("/admin/stream")).text == "data"
+        assert seen == [1, 0]
+    finally:
+        ZENAUTH_SERVER_CONFIG.cache_clear()
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import datetime as DT
+import logging
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from fastapi.testclient import TestClient
+from zen_auth.claims.base import SERVER_TIMING_STATS, Claims, _check_response
+from zen_auth.server.config import ZENAUTH_SERVER_CONFIG
+from zen_auth.server.run import create_app
+from zen_auth.timing import (
+    current_phases,
+    parse_server_timing,
+    phase,
+    record_phase,
+    server_timing_header,
+    start_timing,
+    stop_timing,
+)
+
+from tests.paths import api_path
+
+
+def test_phases_accumulate_within_scope() -> None:
+    with phase("outside"):
+        pass
+    assert current_phases() is None
+
+    token = start_timing()
+    try:
+        record_phase("db_user", 1.5)
+        record_phase("db_user", 0.5)
+        with phase("jwt_decode"):
+            pass
+        phases = current_phases()
+    finally:
+        stop_timing(token)
+
+    assert phases is not None
+    assert phases["db_user"] == 2.0
+    assert "jwt_decode" in phases
+    assert current_phases() is None
+
+
+def test_header_round_trip() -> None:
+    value = server_timing_header({"db_user": 1.234, "total": 10.0})
+    assert value == "db_user;dur=1.23, total;dur=10.00"
+    assert parse_server_timing(value) == {"db_user": 1.23, "total": 10.0}
+    assert parse_server_timing('cache;desc="hit", app;dur=bad, x;dur="2"') == {"x": 2.0}
+
+
+@pytest.fixture
+def app_env(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Iterator[None]:
+    monkeypatch.setenv("ZENAUTH_SERVER_DSN", f"sqlite+pysqlite:///{tmp_path / 'timing.sqlite3'}")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN", "true")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN_USER", "admin")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN_PASSWORD", "pw")
+    ZENAUTH_SERVER_CONFIG.cache_clear()
+    yield
+    ZENAUTH_SERVER_CONFIG.cache_clear()
+
+
+def test_server_timing_header_is_opt_in(app_env: None) -> None:
+    with TestClient(create_app()) as client:
+        res = client.post(api_path("/verify/user"), json={"user_name": "admin", "password": "pw"})
+    assert res.status_code == 200
+    assert "server-timing" not in res.headers
+
+
+def test_verify_responses_report_phases(
+    app_env: None, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    monkeypatch.setenv("ZENAUTH_SERVER_SERVER_TIMING", "true")
+    monkeypatch.setenv("ZENAUTH_SERVER_METRICS_ENABLED", "true")
+    ZENAUTH_SERVER_CONFIG.cache_clear()
+
+    with TestClient(create_app()) as client, caplog.at_level(logging.INFO, logger="access"):
+        res = client.post(api_path("/verify/user"), json={"user_name": "admin", "password": "pw"})
+        assert res.status_code == 200
+        login = parse_server_timing(res.headers["server-timing"])
+
+        token = res.json()["data"]["token"]
+        res = client.post(api_path("/verify/token"), json={"token": token})
+        assert res.status_code == 200
+        verify = parse_server_timing(res.headers["server-timing"])
+
+        res = client.get("/metrics")
+        assert res.status_code == 200 and "server-timing" not in res.headers
+
+    assert {"queue", "db_user", "password", "jwt_encode", "total"} <= login.keys()
+    assert {"queue", "jwt_decode", "db_user", "total"} <= verify.keys()
+    assert "password" not in verify
+    assert verify["total"] >= verify["jwt_decode"]
+
+    records = [r for r in caplog.records if "/verify/token" in r.getMessage()]
+    assert records and "jwt_decode=" in getattr(records[-1], "server_timing")
+
+
+class _Resp:
+    status_code = 200
+    url = "http://auth/zen_auth/v1/verify/token"
+    headers = {"Server-Timing": "jwt_decode;dur=0.20, db_user;dur=1.00, total;dur=1.50"}
+    elapsed = DT.timedelta(milliseconds=4)
+
+
+def test_client_records_server_timing() -> None:
+    SERVER_TIMING_STATS.reset()
+    _check_response(_Resp())  # type: ignore[arg-type]
+    _check_response(_Resp())  # type: ignore[arg-type]
+
+    stats = Claims.server_timing_stats()["/zen_auth/v1/verify/token"]
+    assert stats["db_user"] == {"count": 2, "total_ms": 2.0, "max_ms": 1.0}
+    assert stats["client"]["count"] == 2
+    assert stats["client"]["max_ms"] == pytest.approx(4.0)
+    SERVER_TIMING_STATS.reset()
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import anyio
+import pytest
+from fastapi.testclient import TestClient
+from zen_auth.server.config import ZENAUTH_SERVER_CONFIG
+from zen_auth.server.route_classes import ROUTE_LIMITERS
+from zen_auth.server.run import create_app
+from zen_auth.server.shedding import CoDelShedder
+
+from tests.paths import api_path
+
+
+def test_standing_queue_switches_to_target_budget() -> None:
+    shedder = CoDelShedder(target_sec=0.05, interval_sec=0.1, max_wait_sec=1.0)
+    assert shedder.wait_budget() == 1.0
+
+    # Every request in the interval waited at least the target.
+    shedder.observe(0.2, now=0.0)
+    shedder.observe(0.08, now=0.05)
+    shedder.observe(0.06, now=0.11)
+    assert shedder.overloaded and shedder.wait_budget() == 0.05
+
+    # A single short wait in the next interval ends the overload state.
+    shedder.observe(0.0, now=0.15)
+    shedder.observe(0.3, now=0.22)
+    assert not shedder.overloaded and shedder.wait_budget() == 1.0
+
+
+def test_acquire_sheds_after_budget() -> None:
+    shedder = CoDelShedder(target_sec=0.01, interval_sec=0.1, max_wait_sec=0.02)
+
+    async def main() -> None:
+        limiter = anyio.CapacityLimiter(1)
+        results: list[bool] = []
+
+        async def request() -> None:
+            results.append(await shedder.acquire(limiter))
+
+        assert await shedder.acquire(limiter)
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(request)
+        limiter.release()
+        assert results == [False]
+
+    anyio.run(main)
+    assert shedder.stats()["admitted"] == 1
+    assert shedder.stats()["shed"] == 1
+
+
+def test_verify_returns_503_when_queue_is_shed(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("ZENAUTH_SERVER_DSN", f"sqlite+pysqlite:///{tmp_path / 'shedding.sqlite3'}")
+    monkeypatch.setenv("ZENAUTH_SERVER_CONCURRENCY_VERIFY", "1")
+    monkeypatch.setenv("ZENAUTH_SERVER_SHED_VERIFY_MAX_WAIT_MS", "10")
+    ZENAUTH_SERVER_CONFIG.cache_clear()
+
+    try:
+        with TestClient(create_app()) as client:
+            limiter = ROUTE_LIMITERS.limiter_for(api_path("/verify/token"))
+            assert limiter is not None
+            holder = object()
+            client.portal.call(limiter.acquire_on_behalf_of_nowait, holder)
+            try:
+                res = client.post(api_path("/verify/token"), json={"token": "x"})
+                assert res.status_code == 503
+                assert res.headers["Retry-After"] == "1"
+            finally:
+                client.portal.call(limiter.release_on_behalf_of, holder)
+
+            assert ROUTE_LIMITERS.shed_stats()["verify"]["shed"] == 1
+    finally:
+        ZENAUTH_SERVER_CONFIG.cache_clear()
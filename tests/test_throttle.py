@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from zen_auth.server.config import ZENAUTH_SERVER_CONFIG
+from zen_auth.server.run import create_app
+from zen_auth.server.throttle import (
+    LOGIN_THROTTLE,
+    LoginThrottle,
+    MemoryThrottleBackend,
+    load_backend,
+)
+from zen_auth.server.usecases import user_service
+
+from tests.paths import api_path
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_sliding_window_weights_previous_window() -> None:
+    clock = _Clock()
+    backend = MemoryThrottleBackend(clock=clock)
+
+    for _ in range(4):
+        backend.hit("k", 10.0)
+    assert backend.count("k", 10.0) == pytest.approx(4.0)
+
+    # Half way into the next window, half of the previous count remains.
+    clock.now = 1015.0
+    assert backend.count("k", 10.0) == pytest.approx(2.0)
+    assert backend.hit("k", 10.0) == pytest.approx(3.0)
+
+    # Two windows later everything has expired.
+    clock.now = 1040.0
+    assert backend.count("k", 10.0) == 0.0
+
+    backend.reset("k")
+    assert backend.count("k", 10.0) == 0.0
+
+
+def test_limits_per_user_and_ip() -> None:
+    throttle = LoginThrottle()
+    throttle.configure(max_user_failures=2, max_ip_failures=3)
+
+    throttle.record_failure("alice", "10.0.0.1")
+    assert throttle.check("alice", "10.0.0.1") is None
+    throttle.record_failure("alice", "10.0.0.1")
+    decision = throttle.check("alice", "10.0.0.2")
+    assert decision is not None and decision.scope == "user" and decision.retry_after_sec >= 1
+
+    throttle.record_failure("bob", "10.0.0.1")
+    decision = throttle.check("carol", "10.0.0.1")
+    assert decision is not None and decision.scope == "ip"
+
+    # Success clears the user key only.
+    throttle.record_success("alice")
+    assert throttle.check("alice", "10.0.0.2") is None
+    assert throttle.stats()["throttled_user"] == 1 and throttle.stats()["throttled_ip"] == 1
+
+
+def test_load_backend_spec() -> None:
+    assert isinstance(load_backend("memory"), MemoryThrottleBackend)
+    assert isinstance(load_backend("zen_auth.server.throttle:MemoryThrottleBackend"), MemoryThrottleBackend)
+    with pytest.raises(ValueError):
+        load_backend("no_factory")
+
+
+def test_verify_user_throttled_before_hashing(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("ZENAUTH_SERVER_DSN", f"sqlite+pysqlite:///{tmp_path / 'throttle.sqlite3'}")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN", "true")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN_USER", "admin")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN_PASSWORD", "pw")
+    monkeypatch.setenv("ZENAUTH_SERVER_LOGIN_THROTTLE_MAX_USER_FAILURES", "2")
+    ZENAUTH_SERVER_CONFIG.cache_clear()
+
+    try:
+        with TestClient(create_app(), raise_server_exceptions=False) as client:
+            for _ in range(2):
+                res = client.post(
+                    api_path("/verify/user"),
+                    json={"user_name": "admin", "password": "wrong"},
+                    follow_redirects=False,
+                )
+                assert res.status_code != 200
+
+            verified: list[str] = []
+            real_verify = user_service.verify_and_update_password
+            monkeypatch.setattr(
+                user_service,
+                "verify_and_update_password",
+                lambda secret, hashed: verified.append(secret) or real_verify(secret, hashed),
+            )
+            res = client.post(api_path("/verify/user"), json={"user_name": "admin", "password": "pw"})
+            assert res.status_code == 429
+            assert res.headers["Retry-After"].isdigit()
+            assert verified == []
+            assert LOGIN_THROTTLE.stats()["throttled_user"] >= 1
+    finally:
+        ZENAUTH_SERVER_CONFIG.cache_clear()
+        LOGIN_THROTTLE.configure(backend=MemoryThrottleBackend())
+
+
+def test_verify_user_ignores_caller_address(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    # Every /verify/user call comes from the same app server address.
+    monkeypatch.setenv("ZENAUTH_SERVER_DSN", f"sqlite+pysqlite:///{tmp_path / 'throttle.sqlite3'}")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN", "true")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN_USER", "admin")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN_PASSWORD", "pw")
+    monkeypatch.setenv("ZENAUTH_SERVER_LOGIN_THROTTLE_MAX_IP_FAILURES", "1")
+    ZENAUTH_SERVER_CONFIG.cache_clear()
+
+    try:
+        with TestClient(create_app(), raise_server_exceptions=False) as client:
+            for name in ("someone", "other"):
+                res = client.post(api_path("/verify/user"), json={"user_name": name, "password": "wrong"})
+                assert res.status_code != 200
+            res = client.post(api_path("/verify/user"), json={"user_name": "admin", "password": "pw"})
+            assert res.status_code == 200
+            assert LOGIN_THROTTLE.stats()["throttled_ip"] == 0
+    finally:
+        ZENAUTH_SERVER_CONFIG.cache_clear()
+        LOGIN_THROTTLE.configure(backend=MemoryThrottleBackend())
+
+
+def test_stats_are_exact_under_threads() -> None:
+    throttle = LoginThrottle()
+
+    def fail() -> None:
+        for _ in range(1000):
+            throttle.record_failure("u", None)
+
+    threads = [threading.Thread(target=fail) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert throttle.stats()["failures"] == 8000
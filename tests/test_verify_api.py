@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import re
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from zen_auth.server.config import ZENAUTH_SERVER_CONFIG
+from zen_auth.server.run import create_app
+
+from tests.paths import api_path
+
+
+@pytest.fixture
+def client(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> TestClient:
+    monkeypatch.setenv("ZENAUTH_SERVER_DSN", f"sqlite+pysqlite:///{tmp_path / 'verify.sqlite3'}")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN", "true")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN_USER", "admin")
+    monkeypatch.setenv("ZENAUTH_SERVER_BOOTSTRAP_ADMIN_PASSWORD", "pw")
+    ZENAUTH_SERVER_CONFIG.cache_clear()
+    return TestClient(create_app())
+
+
+def test_verify_response_envelope(client: TestClient) -> None:
+    with client:
+        res = client.post(api_path("/verify/user"), json={"user_name": "admin", "password": "pw"})
+        assert res.status_code == 200
+        body = res.json()
+        assert set(body) == {"data", "meta"}
+        assert body["data"]["token"]
+        assert body["meta"]["req_id"] == res.headers["X-Request-ID"]
+        assert re.fullmatch(r"\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.\d{3}\+09:00", body["meta"]["timestamp"])
+
+        res = client.post(api_path("/verify/token"), json={"token": body["data"]["token"]})
+        assert res.status_code == 200
+        user = res.json()["data"]["user"]
+        assert user["user_name"] == "admin"
+        assert user["password"] is None
+
+        res = client.post(
+            api_path("/verify/user/role"), json={"user_name": "admin", "required_roles": ["no-such-role"]}
+        )
+        assert res.status_code == 403
+        assert res.json()["data"] == {"user_name": "admin", "role_name": None, "has_role": False}